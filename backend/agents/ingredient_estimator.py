@@ -1,16 +1,21 @@
 """Ingredient Estimator - Estimates nutrients for a single ingredient."""
 
 import json
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
-from langchain_anthropic import ChatAnthropic
-from langchain_core.prompts import PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field, create_model
 
+from agents.prompt_caching import cached_system_message
 from config.nutrients import NUTRIENTS, get_formatted_nutrient_list
 from config.settings import settings
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import create_chat_model
+from utils.cancellation import OperationCancelled
 from utils.logger import get_logger
+from utils.serialization import to_json
 
 
 # Dynamically create Pydantic model for nutrient estimates
@@ -38,6 +43,33 @@ class IngredientEstimationResult(BaseModel):
     confidence_level: str = Field(description="Confidence: high/medium/low")
 
 
+@lru_cache(maxsize=None)
+def build_system_prompt() -> str:
+    """Build the static estimator instructions (once per process)."""
+    parser = JsonOutputParser(pydantic_object=IngredientEstimationResult)
+    return f"""You are a nutritional expert. Estimate nutritional values for a SINGLE ingredient.
+
+You will be given the ingredient, its amount and optional notes. Analyze this ingredient and provide estimates for ALL these nutrients:
+{get_formatted_nutrient_list()}
+
+Instructions:
+1. Focus ONLY on this specific ingredient and amount
+2. Use standard nutritional databases and knowledge
+3. Account for the specific amount given
+4. For nutrients that are negligible in this ingredient, use 0.0
+5. Be precise - this is for a single ingredient, not a complete meal
+
+{parser.get_format_instructions()}
+
+Provide your response as valid JSON only."""
+
+
+# Per-call part of the prompt
+USER_TEMPLATE = """Ingredient: {ingredient_name}
+Amount: {amount}
+Notes: {notes}"""
+
+
 class IngredientEstimator:
     """Agent that estimates nutrients for a single ingredient."""
 
@@ -47,9 +79,9 @@ class IngredientEstimator:
         Args:
             model_name: LLM model to use (defaults to settings.estimator_model)
         """
-        self.llm = ChatAnthropic(
+        self.llm = create_chat_model(
+            "ingredient_estimator",
             model=model_name or settings.estimator_model,
-            anthropic_api_key=settings.anthropic_api_key,
             temperature=0.3,
             max_tokens=1024,  # Limit for single ingredient nutrient estimates
         )
@@ -57,33 +89,11 @@ class IngredientEstimator:
         # Create output parser for structured responses
         self.parser = JsonOutputParser(pydantic_object=IngredientEstimationResult)
 
-        # Create prompt template
-        self.prompt = PromptTemplate(
-            template="""You are a nutritional expert. Estimate nutritional values for a SINGLE ingredient.
-
-Ingredient: {ingredient_name}
-Amount: {amount}
-Notes: {notes}
-
-Analyze this ingredient and provide estimates for ALL these nutrients:
-{nutrient_list}
-
-Instructions:
-1. Focus ONLY on this specific ingredient and amount
-2. Use standard nutritional databases and knowledge
-3. Account for the specific amount given
-4. For nutrients that are negligible in this ingredient, use 0.0
-5. Be precise - this is for a single ingredient, not a complete meal
-
-{format_instructions}
-
-Provide your response as valid JSON only.""",
-            input_variables=["ingredient_name", "amount", "notes"],
-            partial_variables={
-                "format_instructions": self.parser.get_format_instructions(),
-                "nutrient_list": get_formatted_nutrient_list(),
-            },
-        )
+        # Create prompt: cached static instructions + per-ingredient user message
+        self.prompt = ChatPromptTemplate.from_messages([
+            cached_system_message(build_system_prompt()),
+            ("human", USER_TEMPLATE),
+        ])
 
         # Create the chain
         self.chain = self.prompt | self.llm | self.parser
@@ -124,13 +134,15 @@ Provide your response as valid JSON only.""",
             logger.log_interaction(
                 agent_name="estimator",
                 prompt=prompt_text,
-                response=json.dumps(result, indent=2),
+                response=to_json(result, pretty=True),
                 ingredient_name=ingredient_name,
                 metadata={"amount": amount, "notes": notes}
             )
 
             return result
 
+        except (OperationCancelled, LLMUnavailable):
+            raise
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON response for {ingredient_name}: {e}")
             # Return default structure
@@ -178,6 +190,8 @@ Provide your response as valid JSON only.""",
 
             return result
 
+        except (OperationCancelled, LLMUnavailable):
+            raise
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON response for {ingredient_name}: {e}")
             # Return default structure
@@ -1,15 +1,20 @@
 """Ingredient Validator - Validates nutrient estimates for a single ingredient."""
 
 import json
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
-from langchain_anthropic import ChatAnthropic
-from langchain_core.prompts import PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 
+from agents.prompt_caching import cached_system_message
 from config.settings import settings
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import create_chat_model
+from utils.cancellation import OperationCancelled
 from utils.logger import get_logger
+from utils.serialization import to_json
 
 
 class ValidationResult(BaseModel):
@@ -20,6 +25,34 @@ class ValidationResult(BaseModel):
     issues_found: int = Field(default=0, description="Number of issues found")
 
 
+@lru_cache(maxsize=None)
+def build_system_prompt() -> str:
+    """Build the static validator instructions (once per process)."""
+    parser = JsonOutputParser(pydantic_object=ValidationResult)
+    return f"""You are a nutritional fact-checker. Verify nutrient estimates for a SINGLE ingredient.
+
+You will be given the ingredient, its amount and the nutrient estimates to verify.
+
+Your task:
+1. Check if the estimates are realistic for THIS specific ingredient and amount
+2. Compare against known nutritional databases
+3. Accept estimates within ±25% of expected values as correct
+4. Only reject if values are significantly wrong or unrealistic
+5. Be reasonable - small variations are acceptable for single ingredients
+
+{parser.get_format_instructions()}
+
+Provide your response as valid JSON only."""
+
+
+# Per-call part of the prompt
+USER_TEMPLATE = """Ingredient: {ingredient_name}
+Amount: {amount}
+
+Nutrient estimates to verify:
+{estimates_json}"""
+
+
 class IngredientValidator:
     """Agent that validates nutrient estimates for a single ingredient."""
 
@@ -29,9 +62,9 @@ class IngredientValidator:
         Args:
             model_name: LLM model to use (defaults to settings.critic_model)
         """
-        self.llm = ChatAnthropic(
+        self.llm = create_chat_model(
+            "ingredient_validator",
             model=model_name or settings.critic_model,
-            anthropic_api_key=settings.anthropic_api_key,
             temperature=0.2,  # Lower temperature for more consistent validation
             max_tokens=512,  # Limit for validation feedback (short responses)
         )
@@ -39,31 +72,11 @@ class IngredientValidator:
         # Create output parser for structured responses
         self.parser = JsonOutputParser(pydantic_object=ValidationResult)
 
-        # Create prompt template
-        self.prompt = PromptTemplate(
-            template="""You are a nutritional fact-checker. Verify nutrient estimates for a SINGLE ingredient.
-
-Ingredient: {ingredient_name}
-Amount: {amount}
-
-Nutrient estimates to verify:
-{estimates_json}
-
-Your task:
-1. Check if the estimates are realistic for THIS specific ingredient and amount
-2. Compare against known nutritional databases
-3. Accept estimates within ±25% of expected values as correct
-4. Only reject if values are significantly wrong or unrealistic
-5. Be reasonable - small variations are acceptable for single ingredients
-
-{format_instructions}
-
-Provide your response as valid JSON only.""",
-            input_variables=["ingredient_name", "amount", "estimates_json"],
-            partial_variables={
-                "format_instructions": self.parser.get_format_instructions(),
-            },
-        )
+        # Create prompt: cached static instructions + per-ingredient user message
+        self.prompt = ChatPromptTemplate.from_messages([
+            cached_system_message(build_system_prompt()),
+            ("human", USER_TEMPLATE),
+        ])
 
         # Create the chain
         self.chain = self.prompt | self.llm | self.parser
@@ -82,10 +95,11 @@ Provide your response as valid JSON only.""",
             estimates: Nutrient estimates to validate
 
         Returns:
-            Dict with validation results
+            Dict with validation results (``error`` set when approval was defaulted
+            because the response could not be obtained or parsed)
         """
         # Convert estimates to JSON for the prompt
-        estimates_json = json.dumps(estimates, indent=2)
+        estimates_json = to_json(estimates, pretty=True)
 
         try:
             # Format prompt for logging
@@ -107,13 +121,15 @@ Provide your response as valid JSON only.""",
             logger.log_interaction(
                 agent_name="validator",
                 prompt=prompt_text,
-                response=json.dumps(result, indent=2),
+                response=to_json(result, pretty=True),
                 ingredient_name=ingredient_name,
                 metadata={"amount": amount, "approved": result.get("approved")}
             )
 
             return result
 
+        except (OperationCancelled, LLMUnavailable):
+            raise
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON response for {ingredient_name}: {e}")
             # Default to approved on error
@@ -121,6 +137,7 @@ Provide your response as valid JSON only.""",
                 "approved": True,
                 "feedback": None,
                 "issues_found": 0,
+                "error": True,
             }
         except Exception as e:
             print(f"Error during validation for {ingredient_name}: {e}")
@@ -129,6 +146,7 @@ Provide your response as valid JSON only.""",
                 "approved": True,
                 "feedback": None,
                 "issues_found": 0,
+                "error": True,
             }
 
     async def validate(
@@ -148,7 +166,7 @@ Provide your response as valid JSON only.""",
             Dict with validation results
         """
         # Convert estimates to JSON for the prompt
-        estimates_json = json.dumps(estimates, indent=2)
+        estimates_json = to_json(estimates, pretty=True)
 
         try:
             # Invoke the chain
@@ -160,6 +178,8 @@ Provide your response as valid JSON only.""",
 
             return result
 
+        except (OperationCancelled, LLMUnavailable):
+            raise
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON response for {ingredient_name}: {e}")
             # Default to approved on error
@@ -167,6 +187,7 @@ Provide your response as valid JSON only.""",
                 "approved": True,
                 "feedback": None,
                 "issues_found": 0,
+                "error": True,
             }
         except Exception as e:
             print(f"Error during validation for {ingredient_name}: {e}")
@@ -175,4 +196,5 @@ Provide your response as valid JSON only.""",
                 "approved": True,
                 "feedback": None,
                 "issues_found": 0,
+                "error": True,
             }
@@ -1,15 +1,21 @@
 """Preprocessing Agent - Infers ingredients and cooking process from meal description."""
 
 import json
-from typing import Any, Dict, Optional, List
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, List
 
-from langchain_anthropic import ChatAnthropic
-from langchain_core.prompts import PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 
+from agents.prompt_caching import cached_system_message
 from config.settings import settings
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import create_chat_model
+from utils.cancellation import OperationCancelled
+from utils.incremental_json import JsonArrayStream
 from utils.logger import get_logger
+from utils.serialization import to_json
 
 
 class IngredientEstimate(BaseModel):
@@ -41,31 +47,11 @@ class PreprocessingResult(BaseModel):
     reasoning: str = Field(description="Explanation of how ingredients were inferred")
 
 
-class PreprocessingAgent:
-    """Agent that preprocesses meal descriptions to infer ingredients and cooking process."""
-
-    def __init__(self, model_name: Optional[str] = None):
-        """Initialize the preprocessing agent.
-
-        Args:
-            model_name: LLM model to use (defaults to settings.estimator_model)
-        """
-        self.llm = ChatAnthropic(
-            model=model_name or settings.estimator_model,
-            anthropic_api_key=settings.anthropic_api_key,
-            temperature=0.3,
-            max_tokens=1500,  # Limit for ingredient list + cooking process
-        )
-
-        # Create output parser for structured responses
-        self.parser = JsonOutputParser(pydantic_object=PreprocessingResult)
-
-        # Create prompt template
-        self.prompt = PromptTemplate(
-            template="""You are a culinary expert specializing in recipe analysis. Given a meal description, infer the likely ingredients, quantities, and cooking process.
-
-Meal description:
-{description}
+@lru_cache(maxsize=None)
+def build_system_prompt() -> str:
+    """Build the static preprocessing instructions (once per process)."""
+    parser = JsonOutputParser(pydantic_object=PreprocessingResult)
+    return f"""You are a culinary expert specializing in recipe analysis. Given a meal description, infer the likely ingredients, quantities, and cooking process.
 
 Your task:
 1. List ALL likely ingredients with realistic quantities (be specific with amounts and units)
@@ -82,15 +68,41 @@ Examples:
 - "pancakes" → 120g all-purpose flour, 2 tablespoons sugar, 1 tablespoon baking powder, 1/2 teaspoon salt, 240ml milk, 1 large egg (65g), 2 tablespoons melted butter
 - "grilled chicken salad" → 150g chicken breast, 100g mixed greens, 50g cherry tomatoes, 30g cucumber, 1 tablespoon olive oil, etc.
 
-{format_instructions}
+{parser.get_format_instructions()}
+
+Provide your response as valid JSON only."""
+
+
+# Per-call part of the prompt
+USER_TEMPLATE = """Meal description:
+{description}"""
+
 
-Provide your response as valid JSON only.""",
-            input_variables=["description"],
-            partial_variables={
-                "format_instructions": self.parser.get_format_instructions(),
-            },
+class PreprocessingAgent:
+    """Agent that preprocesses meal descriptions to infer ingredients and cooking process."""
+
+    def __init__(self, model_name: Optional[str] = None):
+        """Initialize the preprocessing agent.
+
+        Args:
+            model_name: LLM model to use (defaults to settings.estimator_model)
+        """
+        self.llm = create_chat_model(
+            "preprocessing",
+            model=model_name or settings.estimator_model,
+            temperature=0.3,
+            max_tokens=1500,  # Limit for ingredient list + cooking process
         )
 
+        # Create output parser for structured responses
+        self.parser = JsonOutputParser(pydantic_object=PreprocessingResult)
+
+        # Create prompt: cached static instructions + per-meal user message
+        self.prompt = ChatPromptTemplate.from_messages([
+            cached_system_message(build_system_prompt()),
+            ("human", USER_TEMPLATE),
+        ])
+
         # Create the chain
         self.chain = self.prompt | self.llm | self.parser
 
@@ -117,7 +129,7 @@ Provide your response as valid JSON only.""",
             logger.log_interaction(
                 agent_name="preprocessing",
                 prompt=prompt_text,
-                response=json.dumps(result, indent=2),
+                response=to_json(result, pretty=True),
                 metadata={"description": description}
             )
 
@@ -129,6 +141,8 @@ Provide your response as valid JSON only.""",
 
             return state
 
+        except (OperationCancelled, LLMUnavailable):
+            raise
         except Exception as e:
             print(f"Error during preprocessing: {e}")
 
@@ -157,6 +171,8 @@ Provide your response as valid JSON only.""",
             result = await self.chain.ainvoke({"description": description})
             return result
 
+        except (OperationCancelled, LLMUnavailable):
+            raise
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON response: {e}")
             # Return default structure
@@ -181,3 +197,70 @@ Provide your response as valid JSON only.""",
                 "meal_category": "unknown",
                 "reasoning": f"Error: {str(e)}",
             }
+
+    async def preprocess_streaming(
+        self,
+        description: str,
+        on_ingredient: Callable[[Dict[str, Any]], None],
+    ) -> Dict[str, Any]:
+        """Preprocess a meal description, reporting ingredients while the response streams.
+
+        The response is scanned as it arrives; ``on_ingredient`` is called for each
+        ingredient as soon as its object is complete, so estimation can start before
+        the cooking process and reasoning have been generated.
+
+        Args:
+            description: Natural language meal description
+            on_ingredient: Called with each complete ``{name, amount, notes}`` dict
+
+        Returns:
+            Dict with ingredients, cooking_process, meal_category and reasoning (if the
+            full response cannot be parsed, the ingredients streamed so far)
+
+        Raises:
+            LLMUnavailable: If the LLM is unavailable or the ``llm_deadline`` passes
+                before the stream ends (ingredients already reported keep running)
+        """
+        stream = JsonArrayStream("ingredients")
+        streamed: List[Dict[str, Any]] = []
+        try:
+            async for chunk in (self.prompt | self.llm).astream({"description": description}):
+                for item in stream.feed(_chunk_text(chunk)):
+                    if isinstance(item, dict) and item.get("name") and item.get("amount"):
+                        streamed.append(item)
+                        on_ingredient(item)
+
+            result = self.parser.parse(stream.text)
+
+            logger = get_logger()
+            logger.log_interaction(
+                agent_name="preprocessing",
+                prompt=self.prompt.format(description=description),
+                response=to_json(result, pretty=True),
+                metadata={"description": description, "streamed_ingredients": len(streamed)}
+            )
+            return result
+
+        except (OperationCancelled, LLMUnavailable):
+            raise
+        except Exception as e:
+            print(f"Error during streamed preprocessing: {e}")
+            return {
+                "ingredients": streamed,
+                "cooking_process": {
+                    "method": "unknown",
+                    "nutrient_impact": []
+                },
+                "meal_category": "unknown",
+                "reasoning": f"Error: {str(e)}",
+            }
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Text of a streamed message chunk (string content or a list of content blocks)."""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+    )
@@ -0,0 +1,26 @@
+"""Helpers for prompts with a static, provider-cached system prefix.
+
+Agent prompts are split into a static system prefix (role, instructions, nutrient
+list, JSON schema) that is identical for every call, and a small user message with
+the per-call values. The prefix is marked with Anthropic's ``cache_control`` so the
+provider can reuse it across calls instead of re-processing it each time.
+"""
+
+from langchain_core.messages import SystemMessage
+
+from config.settings import settings
+
+
+def cached_system_message(text: str) -> SystemMessage:
+    """Wrap a static system prompt, marked for prompt caching if enabled.
+
+    Args:
+        text: The static system prompt (must not vary between calls)
+
+    Returns:
+        SystemMessage with a single text block
+    """
+    block = {"type": "text", "text": text}
+    if settings.prompt_caching:
+        block["cache_control"] = {"type": "ephemeral"}
+    return SystemMessage(content=[block])
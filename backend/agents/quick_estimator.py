@@ -0,0 +1,106 @@
+"""Quick Estimator - Rough whole-meal macros from one small LLM call."""
+
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from pydantic import BaseModel, Field
+
+from agents.prompt_caching import cached_system_message
+from config.settings import settings
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import create_chat_model
+from utils.cancellation import OperationCancelled
+from utils.logger import get_logger
+from utils.serialization import to_json
+
+
+class QuickEstimateResult(BaseModel):
+    """Rough macronutrients of a whole meal."""
+
+    calories: float = Field(description="Total calories (kcal)")
+    protein: float = Field(description="Protein in grams")
+    carbs: float = Field(description="Carbohydrates in grams")
+    fat: float = Field(description="Total fat in grams")
+
+
+@lru_cache(maxsize=None)
+def build_system_prompt() -> str:
+    """Build the static quick-estimate instructions (once per process)."""
+    parser = JsonOutputParser(pydantic_object=QuickEstimateResult)
+    return f"""You are a nutritional expert. Give a fast, rough estimate of the calories and macronutrients of a whole meal from its description.
+
+Assume a typical single serving when no amounts are given. Do not explain.
+
+{parser.get_format_instructions()}
+
+Provide your response as valid JSON only."""
+
+
+# Per-call part of the prompt
+USER_TEMPLATE = """Meal description:
+{description}"""
+
+
+class QuickEstimator:
+    """Agent that estimates a meal's macros in one short call."""
+
+    def __init__(self, model_name: Optional[str] = None):
+        """Initialize the quick estimator.
+
+        Args:
+            model_name: LLM model to use (defaults to settings.estimator_model)
+        """
+        self.llm = create_chat_model(
+            "quick_estimator",
+            model=model_name or settings.estimator_model,
+            temperature=0.0,
+            max_tokens=100,  # Four numbers
+        )
+
+        # Create output parser for structured responses
+        self.parser = JsonOutputParser(pydantic_object=QuickEstimateResult)
+
+        # Create prompt: cached static instructions + per-meal user message
+        self.prompt = ChatPromptTemplate.from_messages([
+            cached_system_message(build_system_prompt()),
+            ("human", USER_TEMPLATE),
+        ])
+
+        # Create the chain
+        self.chain = self.prompt | self.llm | self.parser
+
+    async def estimate(self, description: str) -> Optional[Dict[str, Any]]:
+        """Estimate a meal's macros.
+
+        Args:
+            description: Natural language meal description
+
+        Returns:
+            Dict with calories, protein, carbs and fat, or None if the response was
+            unusable
+        """
+        try:
+            result = await self.chain.ainvoke({"description": description})
+
+            logger = get_logger()
+            logger.log_interaction(
+                agent_name="quick_estimator",
+                prompt=self.prompt.format(description=description),
+                response=to_json(result, pretty=True),
+                metadata={"description": description}
+            )
+
+            return {
+                "calories": round(float(result["calories"])),
+                "protein": round(float(result["protein"]), 1),
+                "carbs": round(float(result["carbs"]), 1),
+                "fat": round(float(result["fat"]), 1),
+            }
+
+        except (OperationCancelled, LLMUnavailable):
+            raise
+        except Exception as e:
+            print(f"Error during quick estimation: {e}")
+            return None
@@ -0,0 +1,312 @@
+"""Registry of the WebSocket connections held by this worker process.
+
+Every connection has a bounded outbound queue served by its own writer task, so
+sending never waits on a client: a broadcast serializes its message once per wire
+encoding in use and only enqueues the frame for each connection. A client whose queue
+overflows or whose send times out is evicted (closed and forgotten) instead of holding
+up everyone else.
+
+Progress events that only report the latest state of something (an agent working on
+an ingredient, a job's stage) are held for a short window per connection; a newer one
+for the same thing replaces the held one. Any other message, such as a job's result or
+an agent or ingredient finishing, first flushes what is held, so it goes out
+immediately and never overtakes a progress event. Clients that negotiate ``batch`` get
+each flush as a single frame.
+"""
+
+import asyncio
+from contextlib import suppress
+from typing import Callable, Dict, FrozenSet, Hashable, List, Optional
+
+from fastapi import WebSocket
+
+from api.encoding import BATCH_FEATURE, JSON, MSGPACK, MSGPACK_FEATURE, Frame, batch, encode
+from utils.metrics import get_metrics
+
+# WebSocket close code for evicted clients ("try again later")
+EVICTED_CLOSE_CODE = 1013
+
+# Progress events superseded by a newer one with the same values of these fields
+COALESCED_EVENTS = {
+    "agent_status": ("job_id", "agent_type", "ingredient"),
+    "status": ("job_id",),
+    "iteration": ("job_id",),
+    "gap_analysis_status": (),
+}
+
+# Agent statuses that end the agent's work: never held
+TERMINAL_AGENT_STATUSES = frozenset({"done", "completed"})
+
+
+def coalesce_key(message: dict) -> Optional[Hashable]:
+    """Key under which a progress event may be held, or None if it must go out now.
+
+    Events with the same key replace each other. Unfinished reasoning deltas may be
+    held (and batched) too, but each has its own key: dropping one would lose text.
+    Terminal events (an agent finishing, ``ingredient_complete``) always go out now.
+    """
+    event_type = message.get("type")
+    if event_type == "agent_status" and message.get("status") in TERMINAL_AGENT_STATUSES:
+        return None
+    fields = COALESCED_EVENTS.get(event_type)
+    if fields is not None:
+        return (event_type, *(message.get(field) for field in fields))
+    if event_type == "reasoning_delta" and not message.get("done"):
+        return (event_type, message.get("job_id"), message.get("stream"), message.get("seq"))
+    return None
+
+
+class FrameCache:
+    """Encodes one message at most once per wire encoding."""
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._frames: Dict[str, Frame] = {}
+
+    def frame(self, encoding: str) -> Frame:
+        """The message in an encoding, serialized on first use."""
+        frame = self._frames.get(encoding)
+        if frame is None:
+            frame = self._frames[encoding] = encode(self.message, encoding)
+        return frame
+
+
+class ClientConnection:
+    """One WebSocket with its outbound queue, writer task and protocol state."""
+
+    def __init__(
+        self,
+        user_id: str,
+        websocket: WebSocket,
+        features: FrozenSet[str] = frozenset(),
+        queue_size: int = 256,
+        send_timeout: float = 10.0,
+        on_evict: Optional[Callable[["ClientConnection"], None]] = None,
+        coalesce_window: float = 0.0,
+    ):
+        """Start the connection's writer task.
+
+        Args:
+            user_id: User the connection belongs to
+            websocket: Accepted connection
+            features: Protocol features negotiated by the client (e.g. ``delta``, ``msgpack``)
+            queue_size: Messages that may wait to be sent before the client is evicted
+            send_timeout: Seconds a single send may take before the client is evicted
+            on_evict: Called once when the connection is evicted
+            coalesce_window: Seconds progress events may be held to merge them (0: never)
+        """
+        self.user_id = user_id
+        self.websocket = websocket
+        self.features = features
+        self.encoding = MSGPACK if MSGPACK_FEATURE in features else JSON
+        self.send_timeout = send_timeout
+        self.meal_seq: Optional[int] = None  # Meal-list seq the client was brought up to
+        self.resumed_through: Optional[int] = None  # Bus events the client already has
+        self.closed = False
+        self._on_evict = on_evict
+        self.coalesce_window = coalesce_window
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._writer = asyncio.create_task(self._write())
+        # Held progress events, in arrival order of their keys
+        self._held: Dict[Hashable, Frame] = {}
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+
+    def has_feature(self, feature: str) -> bool:
+        """Whether the client negotiated a protocol feature."""
+        return feature in self.features
+
+    def already_has(self, message: dict) -> bool:
+        """Whether a bus message was already delivered before the client resumed."""
+        seq = message.get("event_seq")
+        return (
+            seq is not None and self.resumed_through is not None and seq <= self.resumed_through
+        )
+
+    def deliver(self, frames: FrameCache) -> bool:
+        """Queue a broadcast message; progress events may be held briefly to merge them.
+
+        Returns:
+            Whether the message was queued or held
+        """
+        key = coalesce_key(frames.message) if self.coalesce_window > 0 else None
+        if key is None or self.closed:
+            return self.send_frame(frames.frame(self.encoding))
+        if key in self._held:
+            get_metrics().increment("connections.coalesced")
+        self._held[key] = frames.frame(self.encoding)
+        if self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.coalesce_window, self.flush
+            )
+        return True
+
+    def flush(self) -> None:
+        """Queue the held progress events now."""
+        if self._held:
+            self._send_held()
+
+    def send_frame(self, frame: Frame) -> bool:
+        """Queue a message serialized in the connection's encoding, without waiting.
+
+        Held progress events are queued first (in the same frame for ``batch`` clients).
+
+        Returns:
+            Whether the message was queued (False once the connection is closed or
+            evicted for overflowing its queue)
+        """
+        if self._held:
+            return self._send_held(frame)
+        return self._enqueue(frame)
+
+    def _send_held(self, frame: Optional[Frame] = None) -> bool:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        frames = list(self._held.values())
+        self._held.clear()
+        if frame is not None:
+            frames.append(frame)
+        if len(frames) > 1 and self.has_feature(BATCH_FEATURE):
+            get_metrics().increment("connections.batches")
+            return self._enqueue(batch(frames, self.encoding))
+        queued = True
+        for held in frames:
+            queued = self._enqueue(held)
+        return queued
+
+    def _enqueue(self, frame: Frame) -> bool:
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self.evict("queue_full")
+            return False
+
+    async def send_json(self, message: dict) -> bool:
+        """Queue a message in the connection's encoding (interface of ``WebSocket.send_json``)."""
+        return self.send_frame(encode(message, self.encoding))
+
+    def evict(self, reason: str) -> None:
+        """Stop sending to a client that cannot keep up, and close its socket."""
+        if self.closed:
+            return
+        print(f"Evicting WebSocket client of user {self.user_id}: {reason}")
+        get_metrics().increment(f"connections.evicted.{reason}")
+        self.close()
+        if self._on_evict:
+            self._on_evict(self)
+        task = asyncio.get_running_loop().create_task(self._close_socket())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+    def close(self) -> None:
+        """Stop the writer task; queued messages are dropped."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        dropped = self._queue.qsize() + len(self._held)
+        self._held.clear()
+        if dropped:
+            get_metrics().increment("connections.dropped_messages", dropped)
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    async def _write(self) -> None:
+        while True:
+            frame = await self._queue.get()
+            if isinstance(frame, bytes):
+                send = self.websocket.send_bytes(frame)
+            else:
+                send = self.websocket.send_text(frame)
+            try:
+                await asyncio.wait_for(send, self.send_timeout)
+            except asyncio.TimeoutError:
+                self.evict("send_timeout")
+                return
+            except Exception as e:
+                print(f"Error sending to client: {e}")
+                self.evict("send_failed")
+                return
+
+    async def _close_socket(self) -> None:
+        with suppress(Exception):
+            await asyncio.wait_for(
+                self.websocket.close(code=EVICTED_CLOSE_CODE), self.send_timeout
+            )
+
+
+# Strong references to close handshakes of evicted clients
+_closing = set()
+
+
+class ConnectionManager:
+    """Tracks this worker's WebSocket connections, grouped by user id."""
+
+    def __init__(
+        self, queue_size: int = 256, send_timeout: float = 10.0, coalesce_window: float = 0.0
+    ):
+        """Initialize with no connections.
+
+        Args:
+            queue_size: Outbound queue size of each connection
+            send_timeout: Send timeout of each connection in seconds
+            coalesce_window: Seconds each connection may hold progress events to merge them
+        """
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.coalesce_window = coalesce_window
+        self._connections: Dict[str, List[ClientConnection]] = {}
+
+    def connect(
+        self, user_id: str, websocket: WebSocket, features: FrozenSet[str] = frozenset()
+    ) -> ClientConnection:
+        """Register an accepted connection for a user and start its writer.
+
+        Args:
+            user_id: User the connection belongs to
+            websocket: Accepted connection
+            features: Protocol features negotiated by the client
+
+        Returns:
+            The connection; send through it to keep its messages in order
+        """
+        client = ClientConnection(
+            user_id,
+            websocket,
+            features,
+            queue_size=self.queue_size,
+            send_timeout=self.send_timeout,
+            on_evict=self.disconnect,
+            coalesce_window=self.coalesce_window,
+        )
+        self._connections.setdefault(user_id, []).append(client)
+        return client
+
+    def disconnect(self, client: ClientConnection) -> None:
+        """Forget a connection and stop its writer (no-op if it was already removed)."""
+        client.close()
+        clients = self._connections.get(client.user_id, [])
+        if client in clients:
+            clients.remove(client)
+        if not clients:
+            self._connections.pop(client.user_id, None)
+
+    def count(self) -> int:
+        """Total number of connections held by this worker."""
+        return sum(len(clients) for clients in self._connections.values())
+
+    def connections(self, user_id: str) -> List[ClientConnection]:
+        """The user's connections on this worker."""
+        return list(self._connections.get(user_id, []))
+
+    async def send_to_user(self, user_id: str, message: dict) -> None:
+        """Queue a message for every connection the user has on this worker."""
+        clients = [c for c in self.connections(user_id) if not c.already_has(message)]
+        frames = FrameCache(message)
+        for client in clients:
+            client.deliver(frames)
@@ -0,0 +1,123 @@
+"""Wire encodings for messages sent over the WebSocket.
+
+JSON text frames are the default. A client that connects with ``?features=msgpack``
+gets binary MessagePack frames instead, in which every nutrient map (at least
+``MIN_NUTRIENT_ARRAY`` canonical nutrient keys with numeric values, such as a meal's
+``detailed_nutrients``) is replaced by an array of float32 aligned to ``NUTRIENT_KEYS``,
+with NaN for the nutrients the map does not have. The ``session`` message tells such
+clients the key order (``nutrient_keys``). Messages from the client stay JSON.
+
+Smaller maps are kept as maps: with their long hyphenated keys they only get bigger
+than an array of all nutrients from about five entries on.
+
+Clients that negotiate ``batch`` may receive several messages in one frame,
+``{"type": "batch", "events": [...]}``, in either encoding.
+"""
+
+from typing import Any, List, Optional, Union
+
+import numpy as np
+import ormsgpack
+from fastapi.responses import JSONResponse as BaseJSONResponse
+
+from config.nutrition_goals import NUTRIENT_KEYS
+from utils.serialization import to_json, to_json_bytes
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Feature a client negotiates (``?features=msgpack``) to get MessagePack frames
+MSGPACK_FEATURE = "msgpack"
+
+# Feature a client negotiates (``?features=batch``) to accept several messages per frame
+BATCH_FEATURE = "batch"
+
+# Nutrient maps with fewer entries stay maps
+MIN_NUTRIENT_ARRAY = 5
+
+_NUTRIENT_INDEX = {key: index for index, key in enumerate(NUTRIENT_KEYS)}
+_PACK_OPTIONS = ormsgpack.OPT_SERIALIZE_NUMPY | ormsgpack.OPT_NON_STR_KEYS
+
+# {"type": "batch", "events": ...} up to the array of events
+_MSGPACK_BATCH_PREFIX = b"\x82" + b"".join(
+    ormsgpack.packb(item) for item in ("type", "batch", "events")
+)
+
+Frame = Union[str, bytes]
+
+
+def nutrient_array(values: dict) -> Optional[np.ndarray]:
+    """A nutrient map as float32 aligned to ``NUTRIENT_KEYS`` (NaN where absent).
+
+    Returns:
+        The array, or None if the map is not a nutrient map or too small to be worth it
+    """
+    if len(values) < MIN_NUTRIENT_ARRAY or not all(key in _NUTRIENT_INDEX for key in values):
+        return None
+    array = np.full(len(NUTRIENT_KEYS), np.nan, dtype=np.float32)
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        array[_NUTRIENT_INDEX[key]] = value
+    return array
+
+
+def _compact(value: Any) -> Any:
+    if isinstance(value, dict):
+        array = nutrient_array(value)
+        if array is not None:
+            return array
+        return {key: _compact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_compact(item) for item in value]
+    return value
+
+
+def to_msgpack(message: dict) -> bytes:
+    """Serialize a message as MessagePack with nutrient maps as float arrays."""
+    return ormsgpack.packb(_compact(message), option=_PACK_OPTIONS)
+
+
+def encode(message: dict, encoding: str) -> Frame:
+    """Serialize a message for the wire.
+
+    Args:
+        message: JSON-compatible message
+        encoding: ``JSON`` (text frame) or ``MSGPACK`` (binary frame)
+
+    Returns:
+        Text for a JSON frame, bytes for a MessagePack frame
+    """
+    if encoding == MSGPACK:
+        return to_msgpack(message)
+    return to_json(message)
+
+
+class JSONResponse(BaseJSONResponse):
+    """REST response rendered through ``utils.serialization``."""
+
+    def render(self, content: Any) -> bytes:
+        return to_json_bytes(content)
+
+
+def _msgpack_array_header(length: int) -> bytes:
+    if length < 16:
+        return bytes([0x90 | length])
+    if length < 1 << 16:
+        return b"\xdc" + length.to_bytes(2, "big")
+    return b"\xdd" + length.to_bytes(4, "big")
+
+
+def batch(frames: List[Frame], encoding: str) -> Frame:
+    """Combine encoded messages into one ``batch`` message without re-encoding them.
+
+    Args:
+        frames: Messages already encoded in ``encoding``
+        encoding: ``JSON`` or ``MSGPACK``
+
+    Returns:
+        A single frame in the same encoding
+    """
+    if encoding == MSGPACK:
+        return _MSGPACK_BATCH_PREFIX + _msgpack_array_header(len(frames)) + b"".join(frames)
+    return '{"type":"batch","events":[' + ",".join(frames) + "]}"
@@ -0,0 +1,83 @@
+"""Per-user log of recent events for resuming dropped sessions.
+
+The relay task appends every bus message (which carries the bus's ``event_seq``) to
+a bounded per-user ring buffer. A client that reconnects with the last ``event_seq``
+it processed gets only the events it missed, provided the buffer still covers them:
+nothing of that user may have been evicted from the buffer after that sequence
+number, and this worker must have been listening to the bus since then.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class EventLog:
+    """Bounded per-user ring buffers of recent bus messages."""
+
+    def __init__(self, size: int = 1000, idle_seconds: float = 600.0):
+        """Initialize empty buffers.
+
+        Args:
+            size: Events kept per user
+            idle_seconds: Drop the buffer of a user without events for this long
+        """
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self._events: Dict[str, Deque[Tuple[int, dict]]] = {}
+        self._last_event_at: Dict[str, float] = {}
+        # Per user: highest sequence number no longer in the buffer
+        self._floors: Dict[str, int] = {}
+        # Events up to this sequence number were published before this log started
+        self._start: Optional[int] = None
+        self.latest = 0
+        self._appends = 0
+
+    def append(self, user_id: str, message: dict) -> None:
+        """Record a bus message for a user.
+
+        Args:
+            user_id: User the message was published for
+            message: Message carrying its ``event_seq``
+        """
+        seq = message["event_seq"]
+        if self._start is None:
+            self._start = seq - 1
+        self.latest = max(self.latest, seq)
+
+        events = self._events.setdefault(user_id, deque())
+        if self.size <= 0:
+            self._floors[user_id] = seq
+        else:
+            events.append((seq, message))
+            if len(events) > self.size:
+                self._floors[user_id] = events.popleft()[0]
+        self._last_event_at[user_id] = time.monotonic()
+
+        self._appends += 1
+        if self._appends % 1000 == 0:
+            self._drop_idle()
+
+    def since(self, user_id: str, last_seq: int) -> Optional[List[dict]]:
+        """Events of a user after a sequence number.
+
+        Args:
+            user_id: User whose events to return
+            last_seq: Last ``event_seq`` the client processed
+
+        Returns:
+            The missed events in order, or None if the buffer does not cover them
+        """
+        if self._start is None or last_seq < max(self._start, self._floors.get(user_id, 0)):
+            return None
+        return [message for seq, message in self._events.get(user_id, ()) if seq > last_seq]
+
+    def _drop_idle(self) -> None:
+        """Forget the events of users that have been idle for a while."""
+        cutoff = time.monotonic() - self.idle_seconds
+        for user_id, last_event_at in list(self._last_event_at.items()):
+            if last_event_at < cutoff:
+                events = self._events.pop(user_id, None)
+                if events:
+                    self._floors[user_id] = events[-1][0]
+                del self._last_event_at[user_id]
@@ -0,0 +1,195 @@
+"""Debounced, per-user scheduling of gap analysis.
+
+Gap analysis has two phases. The deterministic gaps (aggregation and ranking) are
+computed and published immediately on every meal change. The LLM phase
+(prioritization and meal suggestions) is debounced: each change restarts a short
+timer and cancels an LLM run that is already working on an older meal list, so a
+burst of meals costs one run. Both phases are tagged with the meal-list version, and
+an LLM result whose version was overtaken while it was computed is dropped instead
+of being stored or broadcast.
+"""
+
+import asyncio
+from contextlib import suppress
+from typing import Awaitable, Callable, Dict
+
+from api.state_store import StateStore
+from config.settings import settings
+from integrations.llm_gateway import BACKGROUND, llm_context, llm_deadline
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.metrics import get_metrics
+from workflows.gap_analysis_workflow import GapAnalysisWorkflow
+
+
+class UserProgress:
+    """WebSocket stand-in that publishes gap analysis progress to all of a user's clients."""
+
+    def __init__(self, user_id: str, publish: Callable[[str, dict], Awaitable[None]], **tags):
+        """Bind progress events to a user.
+
+        Args:
+            user_id: User the events are for
+            publish: Coroutine function publishing ``(user_id, message)`` on the bus
+            **tags: Extra fields added to every event (e.g. the meal-list version)
+        """
+        self.user_id = user_id
+        self._publish = publish
+        self._tags = tags
+
+    async def send_json(self, message: dict) -> None:
+        """Publish a progress event."""
+        await self._publish(self.user_id, {**message, **self._tags})
+
+
+class RunningAnalysis:
+    """Bookkeeping for one in-flight gap analysis."""
+
+    def __init__(self, version: int):
+        """Track an analysis of the given meal-list version."""
+        self.version = version
+        self.cancel_token = CancellationToken()
+
+
+class GapAnalysisScheduler:
+    """Runs at most one gap analysis per user, on the latest meal list."""
+
+    def __init__(
+        self,
+        state_store: StateStore,
+        publish: Callable[[str, dict], Awaitable[None]],
+        on_gaps: Callable[[str, Dict], Awaitable[None]],
+        on_suggestions: Callable[[str, Dict], Awaitable[None]],
+        debounce_seconds: float = 1.0,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            state_store: Store holding meals, versions and gap results
+            publish: Coroutine function publishing progress on the bus
+            on_gaps: Coroutine called with ``(user_id, result)`` for fresh deterministic gaps
+            on_suggestions: Coroutine called with ``(user_id, result)`` for fresh LLM results
+            debounce_seconds: Quiet period after the last meal change before the LLM phase
+        """
+        self.state_store = state_store
+        self.publish = publish
+        self.on_gaps = on_gaps
+        self.on_suggestions = on_suggestions
+        self.debounce_seconds = debounce_seconds
+        self.workflow = GapAnalysisWorkflow()
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._running: Dict[str, RunningAnalysis] = {}
+
+    async def meals_changed(self, user_id: str) -> None:
+        """Publish the new deterministic gaps and schedule the debounced LLM phase."""
+        result = await self._compute_gaps(user_id)
+        await self.on_gaps(user_id, result)
+
+        metrics = get_metrics()
+        timer = self._timers.pop(user_id, None)
+        if timer:
+            timer.cancel()
+            metrics.increment("gap_scheduler.coalesced")
+
+        running = self._running.get(user_id)
+        if running:
+            running.cancel_token.cancel("superseded by a newer meal list")
+
+        self._start_timer(user_id, self.debounce_seconds)
+
+    async def ensure_fresh(self, user_id: str) -> Dict:
+        """Get gaps for the current meals, scheduling the LLM phase if it is missing.
+
+        Returns:
+            Result for the current version; if ``suggestions_ready`` is False the
+            suggestions will be broadcast when the LLM phase finishes
+        """
+        version = await self.state_store.get_version(user_id)
+        stored = await self.state_store.get_gap_result(user_id)
+        if not (stored and stored.get("version") == version):
+            stored = await self._compute_gaps(user_id)
+
+        running = self._running.get(user_id)
+        if (
+            not stored.get("suggestions_ready")
+            and user_id not in self._timers
+            and not (running and running.version == version)
+        ):
+            self._start_timer(user_id, 0)
+        return stored
+
+    async def _compute_gaps(self, user_id: str) -> Dict:
+        """Run and store the deterministic phase for the current meal list."""
+        version = await self.state_store.get_version(user_id)
+        gaps = self.workflow.compute_gaps(await self.state_store.get_meals(user_id))
+        result = {"top_gaps": gaps["top_gaps"], "meal_suggestions": [], "suggestions_ready": False}
+        await self.state_store.set_gap_result(user_id, version, result)
+        return {**result, "version": version}
+
+    async def stop(self) -> None:
+        """Cancel pending timers and running analyses."""
+        for running in self._running.values():
+            running.cancel_token.cancel("shutting down")
+        tasks = list(self._timers.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._timers.clear()
+
+    def _start_timer(self, user_id: str, delay: float) -> None:
+        self._timers[user_id] = asyncio.create_task(self._debounced(user_id, delay))
+
+    async def _debounced(self, user_id: str, delay: float) -> None:
+        """Wait out the debounce window, then run the analysis."""
+        await asyncio.sleep(delay)
+        if self._timers.get(user_id) is asyncio.current_task():
+            del self._timers[user_id]
+        await self._run(user_id)
+
+    async def _run(self, user_id: str) -> None:
+        """Run the LLM phase on the latest meals and publish it unless it went stale."""
+        metrics = get_metrics()
+        version = await self.state_store.get_version(user_id)
+        meals = await self.state_store.get_meals(user_id)
+
+        running = RunningAnalysis(version)
+        self._running[user_id] = running
+        progress = UserProgress(user_id, self.publish, version=version)
+
+        print(f"Running gap analysis for user {user_id} (version {version})...")
+        try:
+            gaps = self.workflow.compute_gaps(meals)
+            deadline = llm_deadline(settings.gap_latency_budget_seconds)
+            with llm_context(BACKGROUND, running.cancel_token), deadline:
+                result = await self.workflow.analyze_gaps(
+                    meals, progress, cancel_token=running.cancel_token, gaps=gaps
+                )
+        except OperationCancelled:
+            metrics.increment("gap_scheduler.superseded")
+            return
+        except Exception as e:
+            print(f"Gap analysis failed for user {user_id}: {e}")
+            metrics.increment("gap_scheduler.failed")
+            return
+        finally:
+            if self._running.get(user_id) is running:
+                del self._running[user_id]
+
+        # Meals changed while we were computing: a newer run is already scheduled
+        if await self.state_store.get_version(user_id) != version:
+            metrics.increment("gap_scheduler.superseded")
+            return
+
+        metrics.increment("gap_scheduler.completed")
+        await self.state_store.set_gap_result(user_id, version, {
+            "top_gaps": result.get("top_gaps", []),
+            "meal_suggestions": result.get("meal_suggestions", []),
+            # Clients show degraded (local-only) suggestions as such
+            "gap_prioritization": {
+                **result.get("gap_prioritization", {}),
+                "degraded": result.get("degraded", False),
+            },
+            "suggestions_ready": True,
+        })
+        await self.on_suggestions(user_id, {**result, "version": version})
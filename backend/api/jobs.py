@@ -0,0 +1,255 @@
+"""Background job queue for meal estimation.
+
+``add_meal`` requests are turned into jobs and acknowledged immediately; a bounded pool
+of async workers runs them. Workflow progress is published on the pub/sub bus tagged
+with the job id, so every connection of the submitting user can follow it and a
+disconnect of the submitting socket does not lose the work.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.metrics import get_metrics
+
+
+class MealJob:
+    """A queued meal estimation with its lifecycle timestamps."""
+
+    _last_meal_id = 0
+
+    def __init__(self, user_id: str, text: str, request_id: Optional[str] = None):
+        """Create a queued job.
+
+        Args:
+            user_id: User who submitted the meal
+            text: Meal description to estimate
+            request_id: Optional client-supplied id echoed in every event of the job
+        """
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.text = text
+        self.request_id = request_id
+        self.cancel_token = CancellationToken()
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        # Meal id and time are fixed at submission so the meal list keeps submission
+        # order no matter which of several concurrent jobs finishes first
+        self.meal_id = max(int(self.enqueued_at * 1000), MealJob._last_meal_id + 1)
+        MealJob._last_meal_id = self.meal_id
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the job is still queued or running."""
+        return self.status in ("queued", "running")
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        """Seconds spent waiting for a worker."""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.enqueued_at
+
+    @property
+    def run_time(self) -> Optional[float]:
+        """Seconds spent processing."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> dict:
+        """Serialize job status and timings."""
+        return {
+            "job_id": self.job_id,
+            "request_id": self.request_id,
+            "user_id": self.user_id,
+            "text": self.text,
+            "status": self.status,
+            "error": self.error,
+            "enqueued_at": self.enqueued_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_wait": self.queue_wait,
+            "run_time": self.run_time,
+        }
+
+
+class JobProgress:
+    """WebSocket stand-in that publishes workflow progress keyed by job id.
+
+    Workflows only call ``send_json`` on the websocket they are given, so passing this
+    object routes their events to all of the user's connections.
+    """
+
+    def __init__(self, job: MealJob, publish: Callable[[str, dict], Awaitable[None]]):
+        """Bind progress events to a job.
+
+        Args:
+            job: Job the events belong to
+            publish: Coroutine function publishing ``(user_id, message)`` on the bus
+        """
+        self.job = job
+        self._publish = publish
+
+    async def send_json(self, message: dict) -> None:
+        """Publish a progress event tagged with the job id (and request id, if any)."""
+        tagged = {**message, "job_id": self.job.job_id}
+        if self.job.request_id is not None:
+            tagged["request_id"] = self.job.request_id
+        await self._publish(self.job.user_id, tagged)
+
+
+class MealJobQueue:
+    """Bounded queue of meal jobs served by a fixed pool of async workers."""
+
+    def __init__(
+        self,
+        handler: Callable[[MealJob], Awaitable[None]],
+        num_workers: int = 4,
+        max_queue_size: int = 100,
+        history_size: int = 200,
+    ):
+        """Initialize the queue (workers start with ``start``).
+
+        Args:
+            handler: Coroutine function processing one job
+            num_workers: Number of concurrent workers
+            max_queue_size: Maximum number of jobs waiting for a worker
+            history_size: Number of jobs kept for status lookups
+        """
+        self.handler = handler
+        self.num_workers = num_workers
+        self.history_size = history_size
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._jobs: "OrderedDict[str, MealJob]" = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+        self._running = 0
+
+    async def start(self) -> None:
+        """Start the worker pool."""
+        for worker_num in range(self.num_workers):
+            self._workers.append(asyncio.create_task(self._worker(worker_num)))
+
+    async def stop(self) -> None:
+        """Cancel the worker pool."""
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._workers.clear()
+
+    def submit(self, user_id: str, text: str, request_id: Optional[str] = None) -> MealJob:
+        """Enqueue a meal job.
+
+        Args:
+            user_id: User who submitted the meal
+            text: Meal description
+            request_id: Optional client-supplied request id
+
+        Returns:
+            The queued job
+
+        Raises:
+            asyncio.QueueFull: If the queue is at capacity
+        """
+        job = MealJob(user_id, text, request_id)
+        self._queue.put_nowait(job)
+        self._remember(job)
+        self._update_gauges()
+        return job
+
+    def get(self, job_id: str) -> Optional[MealJob]:
+        """Look up a job by id."""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str, reason: str = "cancelled") -> bool:
+        """Cancel a queued or running job.
+
+        Returns:
+            True if the job was active and is now cancelled
+        """
+        job = self._jobs.get(job_id)
+        if job is None or not job.is_active:
+            return False
+        job.cancel_token.cancel(reason)
+        return True
+
+    def list_jobs(self, user_id: Optional[str] = None) -> List[MealJob]:
+        """List known jobs, newest last, optionally filtered by user."""
+        return [job for job in self._jobs.values() if user_id is None or job.user_id == user_id]
+
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, int]:
+        """Current queue depth and worker utilization."""
+        return {"queue_depth": self.depth(), "running": self._running, "workers": self.num_workers}
+
+    def _remember(self, job: MealJob) -> None:
+        """Track a job, dropping the oldest finished ones beyond the history size."""
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.history_size:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.is_active:
+                break
+            del self._jobs[oldest_id]
+
+    def _update_gauges(self) -> None:
+        """Publish queue gauges."""
+        metrics = get_metrics()
+        metrics.set_gauge("meal_jobs.queue_depth", self.depth())
+        metrics.set_gauge("meal_jobs.running", self._running)
+
+    async def _worker(self, worker_num: int) -> None:
+        """Process jobs until cancelled."""
+        metrics = get_metrics()
+        while True:
+            job: MealJob = await self._queue.get()
+
+            # Cancelled while waiting: never start it
+            if job.cancel_token.cancelled:
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                metrics.increment("meal_jobs.cancelled")
+                self._queue.task_done()
+                self._update_gauges()
+                continue
+
+            job.status = "running"
+            job.started_at = time.time()
+            self._running += 1
+            self._update_gauges()
+            metrics.observe("meal_jobs.queue_wait_seconds", job.queue_wait)
+
+            try:
+                await self.handler(job)
+                job.status = "done"
+                metrics.increment("meal_jobs.completed")
+            except OperationCancelled as e:
+                print(f"Meal job {job.job_id} cancelled: {e}")
+                job.status = "cancelled"
+                metrics.increment("meal_jobs.cancelled")
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                raise
+            except Exception as e:
+                print(f"Meal job {job.job_id} failed on worker {worker_num}: {e}")
+                job.status = "failed"
+                job.error = str(e)
+                metrics.increment("meal_jobs.failed")
+            finally:
+                job.finished_at = time.time()
+                self._running -= 1
+                self._update_gauges()
+                metrics.observe("meal_jobs.run_seconds", job.run_time)
+                self._queue.task_done()
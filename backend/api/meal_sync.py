@@ -0,0 +1,168 @@
+"""Versioned meal-list deltas.
+
+Every change to a user's meal list bumps the list's version, which doubles as the
+sequence number of the change. Changes are published on the bus as small delta
+messages instead of the whole list:
+
+    {"type": "meal_added", "seq": 4, "meal": {...}}
+    {"type": "meal_updated", "seq": 5, "meal": {...}}
+    {"type": "meal_removed", "seq": 6, "meal_id": 1712345678901}
+
+Clients that connect with ``?features=delta`` receive a ``meals_snapshot`` (the full
+list and its ``seq``) on connect, then only deltas. A delta is sent to a connection
+only if it directly follows what the connection already has; an older one is dropped,
+and a newer one (some delta was missed) is replaced by a fresh snapshot. Clients
+check the sequence too and send ``{"action": "resync_meals"}`` when they detect a gap.
+
+Deltas are idempotent by meal id: ``meal_added`` and ``meal_updated`` replace any meal
+with the same id, so one applied twice (e.g. right after a snapshot) does no harm.
+
+Other clients keep receiving the full ``todaysMeals`` list, read once per change.
+
+When a session is resumed from the event log, missed deltas are replayed as they
+were; clients without the delta feature get one current full list in their place.
+"""
+
+from typing import Dict, FrozenSet, List, Optional
+
+from api.connections import ClientConnection, ConnectionManager, FrameCache
+from api.state_store import StateStore
+from utils.metrics import get_metrics
+
+DELTA_FEATURE = "delta"
+
+MEAL_ADDED = "meal_added"
+MEAL_UPDATED = "meal_updated"
+MEAL_REMOVED = "meal_removed"
+MEAL_DELTA_TYPES = (MEAL_ADDED, MEAL_UPDATED, MEAL_REMOVED)
+
+# Meal fields a client may change with update_meal
+EDITABLE_MEAL_FIELDS = ("description", "time", "calories", "protein", "carbs", "fat")
+
+
+def parse_features(value: Optional[str]) -> FrozenSet[str]:
+    """Protocol features from a comma-separated ``features`` query parameter."""
+    if not value:
+        return frozenset()
+    return frozenset(feature.strip() for feature in value.split(",") if feature.strip())
+
+
+def meal_added(seq: int, meal: dict) -> dict:
+    """Delta message for a new meal."""
+    return {"type": MEAL_ADDED, "seq": seq, "meal": meal}
+
+
+def meal_updated(seq: int, meal: dict) -> dict:
+    """Delta message for a changed meal (sent whole)."""
+    return {"type": MEAL_UPDATED, "seq": seq, "meal": meal}
+
+
+def meal_removed(seq: int, meal_id: int) -> dict:
+    """Delta message for a removed meal."""
+    return {"type": MEAL_REMOVED, "seq": seq, "meal_id": meal_id}
+
+
+class MealSync:
+    """Delivers meal-list changes to this worker's connections in their protocol."""
+
+    def __init__(self, connections: ConnectionManager, state_store: StateStore):
+        """Initialize the relay.
+
+        Args:
+            connections: This worker's connections
+            state_store: Store the meal lists and versions are read from
+        """
+        self.connections = connections
+        self.state_store = state_store
+        # Per user: seq of the last delta relayed by this worker
+        self._last_delta_seq: Dict[str, int] = {}
+
+    async def send_snapshot(self, client: ClientConnection, reason: str) -> List[dict]:
+        """Send the full meal list to one connection in its protocol.
+
+        Args:
+            client: Connection to bring up to date
+            reason: Why the snapshot is sent ("connect", "gap", "resync", "resume"), for metrics
+
+        Returns:
+            The meals sent
+        """
+        # Version first: a change landing in between is then re-sent as a delta
+        seq = await self.state_store.get_version(client.user_id)
+        meals = await self.state_store.get_meals(client.user_id)
+        if client.has_feature(DELTA_FEATURE):
+            message = {"type": "meals_snapshot", "seq": seq, "meals": meals}
+            get_metrics().increment(f"meal_sync.snapshots.{reason}")
+        else:
+            message = {"component": "todaysMeals", "data": meals, "version": seq}
+        if await client.send_json(message):
+            client.meal_seq = seq
+        return meals
+
+    async def relay(self, user_id: str, delta: dict) -> None:
+        """Deliver a delta from the bus to every connection of the user.
+
+        Args:
+            user_id: User whose meal list changed
+            delta: Delta message (``meal_added``, ``meal_updated`` or ``meal_removed``)
+        """
+        metrics = get_metrics()
+        seq = delta["seq"]
+        self._last_delta_seq[user_id] = max(seq, self._last_delta_seq.get(user_id, 0))
+        delta_frames = FrameCache(delta)
+        full_list_frames = None
+        for client in self.connections.connections(user_id):
+            if client.already_has(delta):
+                continue
+            if not client.has_feature(DELTA_FEATURE):
+                # Read once (and serialized once per encoding) for all full-list connections
+                if full_list_frames is None:
+                    version = await self.state_store.get_version(user_id)
+                    full_list_frames = FrameCache({
+                        "component": "todaysMeals",
+                        "data": await self.state_store.get_meals(user_id),
+                        "version": version,
+                    })
+                client.send_frame(full_list_frames.frame(client.encoding))
+                continue
+
+            current = client.meal_seq
+            if current is not None and seq <= current:
+                # Already part of what the connection has (e.g. its snapshot)
+                metrics.increment("meal_sync.stale_dropped")
+            elif current is None or seq > current + 1:
+                await self.send_snapshot(client, "gap")
+            else:
+                if client.send_frame(delta_frames.frame(client.encoding)):
+                    client.meal_seq = seq
+                    metrics.increment("meal_sync.deltas_sent")
+
+    async def resume(self, client: ClientConnection, missed: List[dict], last_seq: int) -> None:
+        """Replay the bus messages a reconnecting client missed.
+
+        Args:
+            client: Connection of the reconnecting client
+            missed: Messages from the event log after ``last_seq``, in order
+            last_seq: Last ``event_seq`` the client processed
+        """
+        client.resumed_through = last_seq
+        deltas = [message for message in missed if message.get("type") in MEAL_DELTA_TYPES]
+        for message in missed:
+            if message.get("type") not in MEAL_DELTA_TYPES:
+                await client.send_json(message)
+            elif client.has_feature(DELTA_FEATURE):
+                await client.send_json(message)
+            elif message is deltas[-1]:
+                # One current list replaces the missed changes
+                await client.send_json({
+                    "component": "todaysMeals",
+                    "data": await self.state_store.get_meals(client.user_id),
+                    "version": await self.state_store.get_version(client.user_id),
+                    "event_seq": message["event_seq"],
+                })
+
+        if client.has_feature(DELTA_FEATURE):
+            # The client has every delta this worker relayed; before that, it is unknown
+            client.meal_seq = self._last_delta_seq.get(client.user_id)
+            if client.meal_seq is None:
+                await self.send_snapshot(client, "resume")
@@ -0,0 +1,183 @@
+"""Pub/sub bus for relaying broadcasts between worker processes.
+
+Every worker publishes client-bound messages to the bus and runs one relay task that
+subscribes to it and forwards each message to the sockets connected to that worker.
+With a single worker the in-memory bus is enough; the SQLite bus lets several workers
+share notifications through a database file, without any external service.
+"""
+
+import asyncio
+import sqlite3
+import time
+import uuid
+from typing import AsyncIterator, List, Tuple
+
+from config.settings import settings
+from utils.serialization import from_json, to_json
+
+
+class PubSub:
+    """Interface for the broadcast bus.
+
+    Messages are addressed to a user id; subscribers receive ``(user_id, message)``
+    pairs in publish order. Every received message carries an ``event_seq`` that
+    increases across the whole bus, and ``stream_id`` names the sequence: it changes
+    when the bus starts over (e.g. the in-memory bus after a restart), so clients can
+    tell a sequence number from an earlier bus.
+    """
+
+    stream_id: str
+
+    async def publish(self, user_id: str, message: dict) -> None:
+        """Publish a message for all of a user's connections."""
+        raise NotImplementedError
+
+    def subscribe(self) -> AsyncIterator[Tuple[str, dict]]:
+        """Iterate over messages published after the subscription started."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release any resources held by the bus."""
+
+
+class InMemoryPubSub(PubSub):
+    """Bus backed by asyncio queues (single worker only)."""
+
+    def __init__(self):
+        """Initialize with no subscribers."""
+        self.stream_id = uuid.uuid4().hex
+        self._subscribers: List[asyncio.Queue] = []
+        self._seq = 0
+
+    async def publish(self, user_id: str, message: dict) -> None:
+        """Publish a message to every subscriber queue."""
+        self._seq += 1
+        message = {**message, "event_seq": self._seq}
+        for queue in self._subscribers:
+            queue.put_nowait((user_id, message))
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, dict]]:
+        """Iterate over published messages."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
+
+
+class SQLitePubSub(PubSub):
+    """Bus backed by a SQLite table that every worker polls.
+
+    Published rows are kept for ``retention_seconds`` so slow pollers do not miss
+    messages, then pruned.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        poll_interval: float = 0.05,
+        retention_seconds: float = 60.0,
+    ):
+        """Open (and create if needed) the bus table.
+
+        Args:
+            db_path: Path to the SQLite database file
+            poll_interval: Seconds between polls for new messages
+            retention_seconds: How long published messages are kept
+        """
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._last_prune = 0.0
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pubsub_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        # Message ids never repeat while the table exists, so they are the sequence
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS pubsub_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO pubsub_meta (key, value) VALUES ('stream_id', ?)",
+            (uuid.uuid4().hex,),
+        )
+        conn.commit()
+        self.stream_id = conn.execute(
+            "SELECT value FROM pubsub_meta WHERE key = 'stream_id'"
+        ).fetchone()[0]
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in WAL mode so readers never block the writer."""
+        conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _insert(self, user_id: str, payload: str) -> None:
+        """Insert one message (runs in a worker thread)."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO pubsub_messages (user_id, payload, created_at) VALUES (?, ?, ?)",
+                    (user_id, payload, now),
+                )
+                if now - self._last_prune > self.retention_seconds:
+                    conn.execute(
+                        "DELETE FROM pubsub_messages WHERE created_at < ?",
+                        (now - self.retention_seconds,),
+                    )
+                    self._last_prune = now
+        finally:
+            conn.close()
+
+    async def publish(self, user_id: str, message: dict) -> None:
+        """Insert a message into the shared table."""
+        await asyncio.to_thread(self._insert, user_id, to_json(message))
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, dict]]:
+        """Poll the shared table for messages newer than the last one seen."""
+        # Connecting sets the journal mode, which can wait on a lock as long as a query
+        conn = await asyncio.to_thread(self._connect)
+        try:
+            row = await asyncio.to_thread(
+                lambda: conn.execute("SELECT MAX(id) FROM pubsub_messages").fetchone()
+            )
+            last_id = row[0] or 0
+            while True:
+                rows = await asyncio.to_thread(
+                    lambda since=last_id: conn.execute(
+                        "SELECT id, user_id, payload FROM pubsub_messages WHERE id > ? ORDER BY id",
+                        (since,),
+                    ).fetchall()
+                )
+                for message_id, user_id, payload in rows:
+                    last_id = message_id
+                    yield user_id, {**from_json(payload), "event_seq": message_id}
+                if not rows:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            conn.close()
+
+
+def create_pubsub() -> PubSub:
+    """Create the pub/sub bus matching the configured state backend.
+
+    Returns:
+        PubSub instance for this worker process
+    """
+    if settings.state_backend == "sqlite":
+        return SQLitePubSub(settings.state_db_path, poll_interval=settings.pubsub_poll_interval)
+    if settings.state_backend == "memory":
+        return InMemoryPubSub()
+    raise ValueError(f"Unknown state backend: {settings.state_backend}")
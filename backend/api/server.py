@@ -1,16 +1,125 @@
 """Main FastAPI server with WebSocket for nutrition estimation."""
 
 import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 
+from api.connections import ClientConnection, ConnectionManager
+from api.encoding import MSGPACK, JSONResponse
+from api.event_log import EventLog
+from api.gap_scheduler import GapAnalysisScheduler
+from api.jobs import JobProgress, MealJob, MealJobQueue
+from api.meal_sync import (
+    EDITABLE_MEAL_FIELDS,
+    MEAL_DELTA_TYPES,
+    MealSync,
+    meal_added,
+    meal_removed,
+    meal_updated,
+    parse_features,
+)
+from api.pubsub import create_pubsub
+from api.state_store import DEFAULT_USER, create_state_store
+from config.nutrition_goals import NUTRIENT_KEYS
+from config.settings import settings
+from integrations.circuit_breaker import breaker_states
+from integrations.llm_gateway import INTERACTIVE, llm_context, llm_deadline
+from utils.cancellation import OperationCancelled
+from utils.metrics import get_metrics
+from utils.serialization import Prepared
+from workflows.approval_stats import get_approval_stats
 from workflows.parallel_nutrition_workflow import ParallelNutritionWorkflow
-from workflows.gap_analysis_workflow import GapAnalysisWorkflow
 
-app = FastAPI(title="GoodFood Nutrition API")
+# Meal and gap state shared by all workers (in-memory when running a single worker)
+state_store = create_state_store()
+
+# Bus carrying broadcasts to every worker's relay task
+pubsub = create_pubsub()
+
+# WebSocket connections held by this worker, each with its own send queue
+connections = ConnectionManager(
+    queue_size=settings.connection_queue_size,
+    send_timeout=settings.connection_send_timeout_seconds,
+    coalesce_window=settings.progress_coalesce_window_seconds,
+)
+
+# Meal-list changes go out as deltas or full lists, depending on each client
+meal_sync = MealSync(connections, state_store)
+
+# Recent bus messages per user, replayed to clients that resume a dropped session
+event_log = EventLog(settings.event_log_size, settings.event_log_idle_seconds)
+
+# Messages sent to every client without meals, serialized once
+NO_GAPS = Prepared({"component": "nutrientGaps", "data": []})
+FIRST_MEAL_HINT = Prepared({
+    "component": "recommendedMeal",
+    "data": {
+        "meal": "Start by adding your first meal",
+        "reasoning": "Track meals to get personalized nutrition insights"
+    }
+})
+
+# Strong references to fire-and-forget tasks
+background_tasks: Set[asyncio.Task] = set()
+
+
+async def relay_broadcasts():
+    """Forward messages from the pub/sub bus to this worker's connections."""
+    async for user_id, message in pubsub.subscribe():
+        event_log.append(user_id, message)
+        if message.get("type") in MEAL_DELTA_TYPES:
+            await meal_sync.relay(user_id, message)
+        else:
+            await connections.send_to_user(user_id, message)
+
+
+async def cancel_abandoned_jobs(user_id: str, jobs: List[MealJob]):
+    """Cancel a disconnected client's meal jobs unless the user reconnects in time.
+
+    The user may reconnect to another worker, so connections are counted in the
+    shared state store.
+    """
+    await asyncio.sleep(settings.disconnect_cancel_grace_seconds)
+    if await state_store.connection_count(user_id) > 0:
+        return
+    for job in jobs:
+        if meal_jobs.cancel(job.job_id, reason="client disconnected"):
+            print(f"Cancelled meal job {job.job_id}: client did not reconnect")
+
+
+def schedule_abandoned_job_cancellation(user_id: str, inflight: Dict[str, MealJob]):
+    """Start the grace timer for a closed connection's active jobs."""
+    jobs = [job for job in inflight.values() if job.is_active]
+    if not jobs:
+        return
+    task = asyncio.create_task(cancel_abandoned_jobs(user_id, jobs))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the broadcast relay and meal job workers for the lifetime of the worker."""
+    relay_task = asyncio.create_task(relay_broadcasts())
+    await meal_jobs.start()
+    yield
+    await meal_jobs.stop()
+    await gap_scheduler.stop()
+    relay_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await relay_task
+    await pubsub.close()
+    state_store.close()
+
+
+app = FastAPI(
+    title="GoodFood Nutrition API", lifespan=lifespan, default_response_class=JSONResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,156 +136,380 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store active WebSocket connections
-active_connections: List[WebSocket] = []
 
-# Store today's meals in memory (in production, use a database)
-todays_meals: List[Dict] = []
+async def broadcast_update(component: str, data, user_id: str = DEFAULT_USER, **extra):
+    """Broadcast update to all of a user's clients, on every worker."""
+    message = {"component": component, "data": data, **extra}
+    await pubsub.publish(user_id, message)
 
 
-async def broadcast_update(component: str, data: dict):
-    """Broadcast update to all connected clients."""
-    message = {"component": component, "data": data}
+async def get_todays_meals(user_id: str = DEFAULT_USER) -> List[dict]:
+    """Get today's meals list."""
+    return await state_store.get_meals(user_id)
+
+
+async def broadcast_gaps(user_id: str, gap_analysis_result: Dict):
+    """Broadcast the deterministic top gaps as soon as they are computed."""
+    top_gaps = gap_analysis_result.get("top_gaps", [])
+    await broadcast_update(
+        "nutrientGaps", top_gaps, user_id, version=gap_analysis_result.get("version")
+    )
+
+
+async def broadcast_suggestions(user_id: str, gap_analysis_result: Dict):
+    """Broadcast gap prioritization and the first meal suggestion of the LLM phase."""
+    version = gap_analysis_result.get("version")
+
+    await broadcast_update(
+        "gapPrioritization",
+        gap_analysis_result.get("gap_prioritization", {}),
+        user_id,
+        version=version,
+    )
+
+    # Broadcast meal suggestion (first one)
+    meal_suggestions = gap_analysis_result.get("meal_suggestions", [])
+    if meal_suggestions:
+        await broadcast_update("recommendedMeal", meal_suggestions[0], user_id, version=version)
+    else:
+        await broadcast_update("recommendedMeal", {
+            "meal": "Balanced meal with protein and vegetables",
+            "reasoning": "Helps meet daily nutritional goals"
+        }, user_id, version=version)
+
+
+# Immediate gaps plus debounced LLM suggestions, one run per user on the latest meal list
+gap_scheduler = GapAnalysisScheduler(
+    state_store,
+    pubsub.publish,
+    broadcast_gaps,
+    broadcast_suggestions,
+    debounce_seconds=settings.gap_debounce_seconds,
+)
 
-    for connection in active_connections:
-        try:
-            await connection.send_json(message)
-        except Exception as e:
-            print(f"Error sending to client: {e}")
 
+async def process_meal_job(job: MealJob):
+    """Estimate a queued meal, store it and broadcast the updated state."""
+    progress = JobProgress(job, pubsub.publish)
+    await progress.send_json({"type": "job_started", "queue_wait": job.queue_wait})
+    print(f"Estimating nutrition for: {job.text}")
 
-def get_todays_meals() -> List[dict]:
-    """Get today's meals list."""
-    return todays_meals
+    # Use parallel nutrition workflow to estimate
+    workflow = ParallelNutritionWorkflow(settings.max_rounds_per_ingredient)
+    try:
+        # The meal's latency budget is split into per-stage deadlines by the workflow
+        deadline = llm_deadline(settings.meal_latency_budget_seconds)
+        with llm_context(INTERACTIVE, job.cancel_token), deadline:
+            result = await workflow.estimate_meal(job.text, progress, cancel_token=job.cancel_token)
+    except OperationCancelled as e:
+        await progress.send_json({"type": "job_cancelled", "reason": str(e)})
+        raise
+
+    # Create new meal with estimated nutrition (id and time from submission)
+    new_meal = {
+        "id": job.meal_id,
+        "time": datetime.fromtimestamp(job.enqueued_at).strftime("%I:%M %p"),
+        "description": job.text,
+        "calories": result.get("calories", 0),
+        "protein": result.get("protein", 0),
+        "carbs": result.get("carbs", 0),
+        "fat": result.get("fat", 0),
+        "detailed_nutrients": result.get("estimates", {}),
+        "degraded": result.get("degraded", False),
+    }
+
+    # Add to today's meals (kept in submission order)
+    version = await state_store.add_meal(job.user_id, new_meal)
+
+    # Broadcast the new meal (clients without delta support get the whole list)
+    await pubsub.publish(job.user_id, meal_added(version, new_meal))
+
+    # Broadcast new gaps now; LLM suggestions for bursts of meals collapse into one run
+    await gap_scheduler.meals_changed(job.user_id)
+
+    await progress.send_json({
+        "type": "job_complete",
+        "meal_id": new_meal["id"],
+        "run_time": time.time() - job.started_at,
+    })
+    print(f"Broadcasted updates to user {job.user_id}")
+
+
+# Bounded worker pool running add_meal jobs off the WebSocket receive loop
+meal_jobs = MealJobQueue(
+    process_meal_job,
+    num_workers=settings.meal_job_workers,
+    max_queue_size=settings.meal_job_queue_size,
+)
 
 
-async def run_gap_analysis(websocket=None) -> Dict:
-    """Run gap analysis workflow on today's meals.
+async def reject_meal_action(client: ClientConnection, message: dict, reason: str):
+    """Tell the client a meal change was not applied."""
+    await client.send_json({
+        "type": "meal_action_rejected",
+        "action": message.get("action"),
+        "meal_id": message.get("meal_id"),
+        "reason": reason,
+    })
+
+
+async def handle_update_meal(user_id: str, client: ClientConnection, message: dict):
+    """Apply a client's edit of a meal and broadcast it."""
+    changes = {
+        key: value
+        for key, value in (message.get("changes") or {}).items()
+        if key in EDITABLE_MEAL_FIELDS
+    }
+    numeric = [key for key in changes if key not in ("description", "time")]
+    if not changes or any(
+        isinstance(changes[key], bool) or not isinstance(changes[key], (int, float))
+        for key in numeric
+    ):
+        await reject_meal_action(client, message, "No valid changes")
+        return
+
+    updated = await state_store.update_meal(user_id, message.get("meal_id"), changes)
+    if updated is None:
+        await reject_meal_action(client, message, "Meal not found")
+        return
+    version, meal = updated
+    await pubsub.publish(user_id, meal_updated(version, meal))
+    await gap_scheduler.meals_changed(user_id)
+
+
+async def handle_remove_meal(user_id: str, client: ClientConnection, message: dict):
+    """Remove a meal at a client's request and broadcast it."""
+    meal_id = message.get("meal_id")
+    version = await state_store.remove_meal(user_id, meal_id)
+    if version is None:
+        await reject_meal_action(client, message, "Meal not found")
+        return
+    await pubsub.publish(user_id, meal_removed(version, meal_id))
+    await gap_scheduler.meals_changed(user_id)
+
+
+async def resume_session(
+    client: ClientConnection, stream: Optional[str], last_seq: Optional[str]
+) -> bool:
+    """Tell a new connection its session position, replaying missed events if possible.
 
     Args:
-        websocket: Optional WebSocket for streaming progress
+        client: The new connection
+        stream: Bus stream id the client saw before it dropped, if any
+        last_seq: Last ``event_seq`` the client processed, if any
 
     Returns:
-        Gap analysis results
+        Whether the session was resumed; if not, the client needs the full initial state
     """
-    workflow = GapAnalysisWorkflow()
-    result = await workflow.analyze_gaps(todays_meals, websocket)
-    return result
+    metrics = get_metrics()
+    missed = None
+    if last_seq is None:
+        reason = "none"
+    elif stream != pubsub.stream_id:
+        reason = "unknown_stream"
+    else:
+        reason = "not_covered"
+        with suppress(ValueError):
+            seq = int(last_seq)
+            missed = event_log.since(client.user_id, seq)
+
+    session = {
+        "type": "session",
+        "stream": pubsub.stream_id,
+        "event_seq": event_log.latest,
+        "resumed": missed is not None,
+        "replayed": len(missed) if missed is not None else 0,
+        "encoding": client.encoding,
+    }
+    if client.encoding == MSGPACK:
+        # Order of the float arrays nutrient maps are sent as
+        session["nutrient_keys"] = NUTRIENT_KEYS
+    await client.send_json(session)
+    if missed is None:
+        metrics.increment(f"session_resume.resync.{reason}")
+        return False
+
+    # No await yields between reading the log and queueing the replay, so no
+    # relayed event can slip in between
+    await meal_sync.resume(client, missed, seq)
+    metrics.increment("session_resume.resumed")
+    metrics.observe("session_resume.replayed_events", len(missed))
+    return True
+
+
+async def send_initial_state(client: ClientConnection):
+    """Send the meal list, gaps and suggestions to a client that is not resuming."""
+    user_id = client.user_id
+    todays_meals = await meal_sync.send_snapshot(client, "connect")
+
+    # Gaps are always current; if the LLM suggestions for this meal list are not
+    # ready yet they are broadcast to this client (and the user's others) later
+    gap_analysis_result = await gap_scheduler.ensure_fresh(user_id) if todays_meals else None
+
+    if gap_analysis_result:
+        version = gap_analysis_result.get("version")
+
+        # Send gap analysis results - send the full gap objects, not just current values
+        top_gaps = gap_analysis_result.get("top_gaps", [])
+        await client.send_json({"component": "nutrientGaps", "data": top_gaps, "version": version})
+
+        # Send meal suggestions (first one for NextMealSuggestion component)
+        if gap_analysis_result.get("suggestions_ready"):
+            await client.send_json({
+                "component": "gapPrioritization",
+                "data": gap_analysis_result.get("gap_prioritization", {}),
+                "version": version,
+            })
+            meal_suggestions = gap_analysis_result.get("meal_suggestions", [])
+            await client.send_json({
+                "component": "recommendedMeal",
+                "data": meal_suggestions[0] if meal_suggestions else {
+                    "meal": "Balanced meal with protein and vegetables",
+                    "reasoning": "Helps meet daily nutritional goals"
+                },
+                "version": version,
+            })
+    elif not todays_meals:
+        # No meals yet
+        await client.send_json(NO_GAPS)
+        await client.send_json(FIRST_MEAL_HINT)
 
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """Main WebSocket endpoint for bidirectional communication."""
     await websocket.accept()
-    active_connections.append(websocket)
+    user_id = websocket.query_params.get("user_id", DEFAULT_USER)
+    features = parse_features(websocket.query_params.get("features"))
+    # Everything for this client is sent through its connection's queue, in order
+    client = connections.connect(user_id, websocket, features)
+    await state_store.connection_opened(user_id)
 
-    print(f"Client connected. Total connections: {len(active_connections)}")
+    print(f"Client connected. Total connections: {connections.count()}")
 
-    try:
-        # Send initial data to newly connected client
-        await websocket.send_json({"component": "todaysMeals", "data": get_todays_meals()})
-
-        # Only run gap analysis if there are meals
-        if todays_meals:
-            gap_analysis_result = await run_gap_analysis(websocket)
-
-            # Send gap analysis results - send the full gap objects, not just current values
-            top_gaps = gap_analysis_result.get("top_gaps", [])
-            await websocket.send_json({"component": "nutrientGaps", "data": top_gaps})
+    # Meal jobs submitted on this connection, keyed by request id (or job id)
+    inflight: Dict[str, MealJob] = {}
 
-            # Send meal suggestions (first one for NextMealSuggestion component)
-            meal_suggestions = gap_analysis_result.get("meal_suggestions", [])
-            if meal_suggestions:
-                await websocket.send_json({
-                    "component": "recommendedMeal",
-                    "data": meal_suggestions[0]
-                })
-            else:
-                await websocket.send_json({
-                    "component": "recommendedMeal",
-                    "data": {
-                        "meal": "Add your first meal to get personalized suggestions",
-                        "reasoning": "Track meals to receive nutrition guidance"
-                    }
-                })
-        else:
-            # No meals yet
-            await websocket.send_json({"component": "nutrientGaps", "data": []})
-            await websocket.send_json({
-                "component": "recommendedMeal",
-                "data": {
-                    "meal": "Start by adding your first meal",
-                    "reasoning": "Track meals to get personalized nutrition insights"
-                }
-            })
+    try:
+        # A client reconnecting with its last event_seq only gets what it missed
+        resumed = await resume_session(
+            client,
+            websocket.query_params.get("stream"),
+            websocket.query_params.get("last_seq"),
+        )
+        if not resumed:
+            await send_initial_state(client)
 
         # Listen for messages from client
         while True:
             message = await websocket.receive_json()
 
-            # Handle meal input with nutrition estimation
+            # Handle meal input: enqueue a job and acknowledge it right away
             if message.get("action") == "add_meal":
                 meal_text = message.get("text", "")
-                print(f"Estimating nutrition for: {meal_text}")
-
-                # Use parallel nutrition workflow to estimate
-                workflow = ParallelNutritionWorkflow(max_rounds_per_ingredient=3)
-                result = await workflow.estimate_meal(meal_text, websocket)
-
-                # Create new meal with estimated nutrition
-                new_meal = {
-                    "id": int(datetime.now().timestamp() * 1000),
-                    "time": datetime.now().strftime("%I:%M %p"),
-                    "description": meal_text,
-                    "calories": result.get("calories", 0),
-                    "protein": result.get("protein", 0),
-                    "carbs": result.get("carbs", 0),
-                    "fat": result.get("fat", 0),
-                    "detailed_nutrients": result.get("estimates", {}),
-                }
-
-                # Add to today's meals
-                todays_meals.append(new_meal)
-
-                # Broadcast updated meals list
-                await broadcast_update("todaysMeals", get_todays_meals())
-
-                # Run gap analysis workflow with updated meals
-                print("Running gap analysis...")
-                gap_analysis_result = await run_gap_analysis(websocket)
-
-                # Broadcast gap analysis results - send full gap objects
-                top_gaps = gap_analysis_result.get("top_gaps", [])
-                await broadcast_update("nutrientGaps", top_gaps)
-
-                # Broadcast meal suggestion (first one)
-                meal_suggestions = gap_analysis_result.get("meal_suggestions", [])
-                if meal_suggestions:
-                    await broadcast_update("recommendedMeal", meal_suggestions[0])
-                else:
-                    await broadcast_update("recommendedMeal", {
-                        "meal": "Balanced meal with protein and vegetables",
-                        "reasoning": "Helps meet daily nutritional goals"
+                request_id = message.get("request_id")
+                inflight = {key: job for key, job in inflight.items() if job.is_active}
+
+                # Resubmitting a request id that is still in flight returns the same job
+                if request_id is not None and request_id in inflight:
+                    job = inflight[request_id]
+                    await client.send_json({
+                        "type": "job_accepted",
+                        "job_id": job.job_id,
+                        "request_id": request_id,
+                        "queue_depth": meal_jobs.depth(),
+                    })
+                    continue
+
+                if len(inflight) >= settings.max_inflight_meals_per_connection:
+                    await client.send_json({
+                        "type": "job_rejected",
+                        "request_id": request_id,
+                        "reason": "Too many meals in flight on this connection",
                     })
+                    continue
+
+                try:
+                    job = meal_jobs.submit(user_id, meal_text, request_id)
+                except asyncio.QueueFull:
+                    await client.send_json({
+                        "type": "job_rejected",
+                        "request_id": request_id,
+                        "reason": "Too many meals are being processed, please retry shortly",
+                    })
+                    continue
+
+                inflight[request_id if request_id is not None else job.job_id] = job
+                await client.send_json({
+                    "type": "job_accepted",
+                    "job_id": job.job_id,
+                    "request_id": request_id,
+                    "queue_depth": meal_jobs.depth(),
+                })
+
+            elif message.get("action") == "update_meal":
+                await handle_update_meal(user_id, client, message)
 
-                print(f"Broadcasted updates to {len(active_connections)} clients")
+            elif message.get("action") == "remove_meal":
+                await handle_remove_meal(user_id, client, message)
+
+            # The client saw a gap in the meal-list sequence
+            elif message.get("action") == "resync_meals":
+                await meal_sync.send_snapshot(client, "resync")
 
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
-        print(f"Client disconnected. Total connections: {len(active_connections)}")
+        connections.disconnect(client)
+        await state_store.connection_closed(user_id)
+        schedule_abandoned_job_cancellation(user_id, inflight)
+        print(f"Client disconnected. Total connections: {connections.count()}")
     except Exception as e:
         print(f"WebSocket error: {e}")
-        if websocket in active_connections:
-            active_connections.remove(websocket)
+        connections.disconnect(client)
+        await state_store.connection_closed(user_id)
+        schedule_abandoned_job_cancellation(user_id, inflight)
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "active_connections": len(active_connections)}
+    return {
+        "status": "healthy",
+        "active_connections": connections.count(),
+        **meal_jobs.stats(),
+        "circuit_breakers": breaker_states(),
+    }
+
+
+@app.get("/jobs")
+async def list_jobs(user_id: str = DEFAULT_USER):
+    """List this worker's recent meal jobs for a user."""
+    return [job.to_dict() for job in meal_jobs.list_jobs(user_id)]
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get status and timings of a meal job."""
+    job = meal_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/approval-stats")
+async def get_approval_report():
+    """Validator approval rates, adaptive validation rules, calls saved and drift."""
+    return get_approval_stats().report()
+
+
+@app.get("/metrics")
+async def get_metrics_snapshot():
+    """Process metrics: queue depth, job timings and counters."""
+    return get_metrics().snapshot()
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        app, host="0.0.0.0", port=8000, ws_per_message_deflate=settings.ws_per_message_deflate
+    )
@@ -0,0 +1,373 @@
+"""Shared state store for meals and gap analysis results.
+
+The in-memory store keeps everything in module-level dicts and is only valid for a
+single worker process. The SQLite store keeps the same data in a database file so
+that several uvicorn workers (or replicas sharing a volume) see one consistent state.
+Its queries can wait on another process's write lock, so it runs them in worker threads
+to keep the event loop free.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+from utils.serialization import from_json, to_json
+
+DEFAULT_USER = "default"
+
+
+class StateStore:
+    """Interface for per-user meal and gap analysis state, and who is connected.
+
+    Every mutation of a user's meal list bumps that user's version number, so gap
+    analysis results can be tied to the meal list they were computed from.
+    """
+
+    async def get_meals(self, user_id: str) -> List[dict]:
+        """Get the user's meals for today."""
+        raise NotImplementedError
+
+    async def add_meal(self, user_id: str, meal: dict) -> int:
+        """Insert a meal (ordered by its ``id``) and return the new meal-list version."""
+        raise NotImplementedError
+
+    async def update_meal(
+        self, user_id: str, meal_id: int, changes: dict
+    ) -> Optional[Tuple[int, dict]]:
+        """Change fields of a meal.
+
+        Returns:
+            New meal-list version and the updated meal, or None if there is no such meal
+        """
+        raise NotImplementedError
+
+    async def remove_meal(self, user_id: str, meal_id: int) -> Optional[int]:
+        """Remove a meal and return the new meal-list version (None if there is no such meal)."""
+        raise NotImplementedError
+
+    async def get_version(self, user_id: str) -> int:
+        """Get the current meal-list version (0 when no meals were added yet)."""
+        raise NotImplementedError
+
+    async def get_gap_result(self, user_id: str) -> Optional[dict]:
+        """Get the last stored gap analysis result, including its ``version``."""
+        raise NotImplementedError
+
+    async def set_gap_result(self, user_id: str, version: int, result: dict) -> None:
+        """Store a gap analysis result computed for ``version`` of the meal list."""
+        raise NotImplementedError
+
+    async def connection_opened(self, user_id: str) -> None:
+        """Count a WebSocket connection the user opened on this worker."""
+        raise NotImplementedError
+
+    async def connection_closed(self, user_id: str) -> None:
+        """Uncount a WebSocket connection of the user on this worker."""
+        raise NotImplementedError
+
+    async def connection_count(self, user_id: str) -> int:
+        """Number of WebSocket connections the user has open on any worker."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the store."""
+
+
+class InMemoryStateStore(StateStore):
+    """State store backed by process-local dicts (single worker only)."""
+
+    def __init__(self):
+        """Initialize empty state."""
+        self._meals: Dict[str, List[dict]] = {}
+        self._versions: Dict[str, int] = {}
+        self._gap_results: Dict[str, dict] = {}
+        self._connections: Dict[str, int] = {}
+
+    async def get_meals(self, user_id: str) -> List[dict]:
+        """Get the user's meals for today."""
+        return list(self._meals.get(user_id, []))
+
+    async def add_meal(self, user_id: str, meal: dict) -> int:
+        """Insert a meal and return the new meal-list version."""
+        meals = self._meals.setdefault(user_id, [])
+        meals.append(meal)
+        meals.sort(key=lambda m: m.get("id", 0))
+        return self._bump_version(user_id)
+
+    async def update_meal(
+        self, user_id: str, meal_id: int, changes: dict
+    ) -> Optional[Tuple[int, dict]]:
+        """Change fields of a meal and return the new version and the meal."""
+        meals = self._meals.get(user_id, [])
+        for index, meal in enumerate(meals):
+            if meal.get("id") == meal_id:
+                meals[index] = {**meal, **changes, "id": meal_id}
+                return self._bump_version(user_id), meals[index]
+        return None
+
+    async def remove_meal(self, user_id: str, meal_id: int) -> Optional[int]:
+        """Remove a meal and return the new meal-list version."""
+        meals = self._meals.get(user_id, [])
+        remaining = [meal for meal in meals if meal.get("id") != meal_id]
+        if len(remaining) == len(meals):
+            return None
+        self._meals[user_id] = remaining
+        return self._bump_version(user_id)
+
+    def _bump_version(self, user_id: str) -> int:
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        return self._versions[user_id]
+
+    async def get_version(self, user_id: str) -> int:
+        """Get the current meal-list version."""
+        return self._versions.get(user_id, 0)
+
+    async def get_gap_result(self, user_id: str) -> Optional[dict]:
+        """Get the last stored gap analysis result."""
+        return self._gap_results.get(user_id)
+
+    async def set_gap_result(self, user_id: str, version: int, result: dict) -> None:
+        """Store a gap analysis result, never overwriting a newer one."""
+        stored = self._gap_results.get(user_id)
+        if stored and stored["version"] > version:
+            return
+        self._gap_results[user_id] = {**result, "version": version}
+
+    async def connection_opened(self, user_id: str) -> None:
+        """Count a WebSocket connection of the user."""
+        self._connections[user_id] = self._connections.get(user_id, 0) + 1
+
+    async def connection_closed(self, user_id: str) -> None:
+        """Uncount a WebSocket connection of the user."""
+        count = self._connections.pop(user_id, 0) - 1
+        if count > 0:
+            self._connections[user_id] = count
+
+    async def connection_count(self, user_id: str) -> int:
+        """Number of WebSocket connections the user has open."""
+        return self._connections.get(user_id, 0)
+
+
+class SQLiteStateStore(StateStore):
+    """State store backed by a SQLite database shared between worker processes.
+
+    Each worker counts its own connections under a random id and removes them when it
+    closes the store. A worker that crashes leaves its counts behind, so its users look
+    connected (and keep their meal jobs) until the database is reset.
+    """
+
+    def __init__(self, db_path: str):
+        """Open (and create if needed) the state database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self.worker_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                meal_id INTEGER NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_meals_user ON meals (user_id, meal_id);
+            CREATE TABLE IF NOT EXISTS meal_versions (
+                user_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS gap_results (
+                user_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS connections (
+                worker_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (worker_id, user_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_connections_user ON connections (user_id);
+            """
+        )
+        self._conn.commit()
+
+    async def get_meals(self, user_id: str) -> List[dict]:
+        """Get the user's meals for today."""
+        return await asyncio.to_thread(self._get_meals, user_id)
+
+    def _get_meals(self, user_id: str) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM meals WHERE user_id = ? ORDER BY meal_id, id", (user_id,)
+            ).fetchall()
+        return [from_json(row[0]) for row in rows]
+
+    async def add_meal(self, user_id: str, meal: dict) -> int:
+        """Insert a meal and return the new meal-list version."""
+        return await asyncio.to_thread(self._add_meal, user_id, meal)
+
+    def _add_meal(self, user_id: str, meal: dict) -> int:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meals (user_id, meal_id, payload) VALUES (?, ?, ?)",
+                (user_id, meal.get("id", 0), to_json(meal)),
+            )
+            return self._bump_version(user_id)
+
+    async def update_meal(
+        self, user_id: str, meal_id: int, changes: dict
+    ) -> Optional[Tuple[int, dict]]:
+        """Change fields of a meal and return the new version and the meal."""
+        return await asyncio.to_thread(self._update_meal, user_id, meal_id, changes)
+
+    def _update_meal(
+        self, user_id: str, meal_id: int, changes: dict
+    ) -> Optional[Tuple[int, dict]]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id, payload FROM meals WHERE user_id = ? AND meal_id = ?",
+                (user_id, meal_id),
+            ).fetchone()
+            if not row:
+                return None
+            meal = {**from_json(row[1]), **changes, "id": meal_id}
+            self._conn.execute(
+                "UPDATE meals SET payload = ? WHERE id = ?", (to_json(meal), row[0])
+            )
+            return self._bump_version(user_id), meal
+
+    async def remove_meal(self, user_id: str, meal_id: int) -> Optional[int]:
+        """Remove a meal and return the new meal-list version."""
+        return await asyncio.to_thread(self._remove_meal, user_id, meal_id)
+
+    def _remove_meal(self, user_id: str, meal_id: int) -> Optional[int]:
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM meals WHERE user_id = ? AND meal_id = ?", (user_id, meal_id)
+            ).rowcount
+            if not deleted:
+                return None
+            return self._bump_version(user_id)
+
+    def _bump_version(self, user_id: str) -> int:
+        """Increment the user's meal-list version inside the current transaction."""
+        self._conn.execute(
+            """
+            INSERT INTO meal_versions (user_id, version) VALUES (?, 1)
+            ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+            """,
+            (user_id,),
+        )
+        row = self._conn.execute(
+            "SELECT version FROM meal_versions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0]
+
+    async def get_version(self, user_id: str) -> int:
+        """Get the current meal-list version."""
+        return await asyncio.to_thread(self._get_version, user_id)
+
+    def _get_version(self, user_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM meal_versions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    async def get_gap_result(self, user_id: str) -> Optional[dict]:
+        """Get the last stored gap analysis result."""
+        return await asyncio.to_thread(self._get_gap_result, user_id)
+
+    def _get_gap_result(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, payload FROM gap_results WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return {**from_json(row[1]), "version": row[0]}
+
+    async def set_gap_result(self, user_id: str, version: int, result: dict) -> None:
+        """Store a gap analysis result, never overwriting a newer one."""
+        await asyncio.to_thread(self._set_gap_result, user_id, version, result)
+
+    def _set_gap_result(self, user_id: str, version: int, result: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO gap_results (user_id, version, payload) VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET version = excluded.version, payload = excluded.payload
+                WHERE excluded.version >= gap_results.version
+                """,
+                (user_id, version, to_json(result)),
+            )
+
+    async def connection_opened(self, user_id: str) -> None:
+        """Count a WebSocket connection the user opened on this worker."""
+        await asyncio.to_thread(self._connection_opened, user_id)
+
+    def _connection_opened(self, user_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO connections (worker_id, user_id, count) VALUES (?, ?, 1)
+                ON CONFLICT(worker_id, user_id) DO UPDATE SET count = count + 1
+                """,
+                (self.worker_id, user_id),
+            )
+
+    async def connection_closed(self, user_id: str) -> None:
+        """Uncount a WebSocket connection of the user on this worker."""
+        await asyncio.to_thread(self._connection_closed, user_id)
+
+    def _connection_closed(self, user_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE connections SET count = count - 1 WHERE worker_id = ? AND user_id = ?",
+                (self.worker_id, user_id),
+            )
+            self._conn.execute(
+                "DELETE FROM connections WHERE worker_id = ? AND user_id = ? AND count <= 0",
+                (self.worker_id, user_id),
+            )
+
+    async def connection_count(self, user_id: str) -> int:
+        """Number of WebSocket connections the user has open on any worker."""
+        return await asyncio.to_thread(self._connection_count, user_id)
+
+    def _connection_count(self, user_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM connections WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0]
+
+    def close(self) -> None:
+        """Forget this worker's connections and close the database connection."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM connections WHERE worker_id = ?", (self.worker_id,)
+                )
+            self._conn.close()
+
+
+def create_state_store() -> StateStore:
+    """Create the state store configured in settings.
+
+    Returns:
+        StateStore instance for this worker process
+    """
+    if settings.state_backend == "sqlite":
+        return SQLiteStateStore(settings.state_db_path)
+    if settings.state_backend == "memory":
+        return InMemoryStateStore()
+    raise ValueError(f"Unknown state backend: {settings.state_backend}")
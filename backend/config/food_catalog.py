@@ -0,0 +1,530 @@
+"""Bundled food catalog with per-serving nutrient amounts.
+
+Values are approximate per-serving amounts (USDA-style reference data) and use the
+canonical keys from nutrition_goals.NUTRIENT_KEYS. Nutrients a food has negligible
+amounts of are omitted and treated as zero.
+"""
+
+from typing import Any, Dict, List
+
+# Food categories, in the order foods are named in a combined meal title
+FOOD_CATEGORIES = [
+    "protein",
+    "legume",
+    "dairy",
+    "grain",
+    "vegetable",
+    "fruit",
+    "nuts_seeds",
+    "spice",
+    "drink",
+]
+
+FOOD_CATALOG: List[Dict[str, Any]] = [
+    # Protein
+    {
+        "name": "salmon",
+        "category": "protein",
+        "serving": "150 g fillet",
+        "serving_g": 150,
+        "nutrients": {
+            "protein": 30, "total-fats": 19, "epa-dha": 2200, "vitamin-d": 16,
+            "vitamin-b12": 4.5, "selenium": 47, "niacin": 12, "pyridoxine": 0.9,
+            "potassium": 560, "phosphorus": 380, "choline": 135, "taurine": 90,
+        },
+    },
+    {
+        "name": "sardines",
+        "category": "protein",
+        "serving": "100 g, canned",
+        "serving_g": 100,
+        "nutrients": {
+            "protein": 25, "total-fats": 11, "epa-dha": 1400, "vitamin-d": 4.8,
+            "vitamin-b12": 8.9, "calcium": 380, "selenium": 53, "phosphorus": 490,
+            "iron": 2.9, "sodium": 310, "niacin": 5.2,
+        },
+    },
+    {
+        "name": "chicken breast",
+        "category": "protein",
+        "serving": "150 g, grilled",
+        "serving_g": 150,
+        "nutrients": {
+            "protein": 46, "total-fats": 5, "niacin": 20, "pyridoxine": 1.4,
+            "selenium": 41, "phosphorus": 340, "potassium": 380, "choline": 128,
+            "sodium": 110, "pantothenic-acid": 1.5,
+        },
+    },
+    {
+        "name": "eggs",
+        "category": "protein",
+        "serving": "2 large",
+        "serving_g": 100,
+        "nutrients": {
+            "protein": 12.6, "total-fats": 9.5, "vitamin-b12": 1.1, "riboflavin": 0.5,
+            "vitamin-d": 2, "selenium": 31, "choline": 294, "biotin": 20, "vitamin-a": 160,
+            "lutein": 0.3, "zeaxanthin": 0.2, "pantothenic-acid": 1.5, "iodine": 50,
+        },
+    },
+    {
+        "name": "lean beef",
+        "category": "protein",
+        "serving": "120 g",
+        "serving_g": 120,
+        "nutrients": {
+            "protein": 31, "total-fats": 10, "iron": 3.1, "zinc": 7.5, "vitamin-b12": 3,
+            "niacin": 7, "selenium": 25, "phosphorus": 250, "potassium": 380,
+            "taurine": 50, "coenzyme-q10": 3.6,
+        },
+    },
+    {
+        "name": "oysters",
+        "category": "protein",
+        "serving": "6 medium",
+        "serving_g": 84,
+        "nutrients": {
+            "protein": 8, "zinc": 33, "vitamin-b12": 14.7, "copper": 3700,
+            "selenium": 54, "iron": 4.9, "taurine": 330, "iodine": 60,
+        },
+    },
+    {
+        "name": "shrimp",
+        "category": "protein",
+        "serving": "100 g",
+        "serving_g": 100,
+        "nutrients": {
+            "protein": 24, "total-fats": 1.7, "selenium": 40, "iodine": 35,
+            "vitamin-b12": 1.5, "choline": 135, "phosphorus": 237, "sodium": 110,
+        },
+    },
+    {
+        "name": "tofu",
+        "category": "protein",
+        "serving": "150 g, firm",
+        "serving_g": 150,
+        "nutrients": {
+            "protein": 21, "total-fats": 13, "carbohydrates": 4, "fiber": 3,
+            "calcium": 530, "iron": 4, "magnesium": 90, "manganese": 1.5,
+            "phosphorus": 290, "alpha-linolenic-acid": 0.9, "linoleic-acid": 6.5,
+            "selenium": 15, "copper": 300,
+        },
+    },
+
+    # Legumes
+    {
+        "name": "lentils",
+        "category": "legume",
+        "serving": "1 cup, cooked",
+        "serving_g": 198,
+        "nutrients": {
+            "protein": 18, "carbohydrates": 40, "fiber": 15.6, "folate": 358, "iron": 6.6,
+            "manganese": 1, "phosphorus": 356, "potassium": 731, "thiamine": 0.33,
+            "copper": 500, "zinc": 2.5, "resistant-starch": 3,
+        },
+    },
+    {
+        "name": "black beans",
+        "category": "legume",
+        "serving": "1 cup, cooked",
+        "serving_g": 172,
+        "nutrients": {
+            "protein": 15, "carbohydrates": 41, "fiber": 15, "folate": 256,
+            "magnesium": 120, "iron": 3.6, "manganese": 0.8, "thiamine": 0.4,
+            "potassium": 611, "polyphenols": 200, "resistant-starch": 4,
+        },
+    },
+    {
+        "name": "chickpeas",
+        "category": "legume",
+        "serving": "1 cup, cooked",
+        "serving_g": 164,
+        "nutrients": {
+            "protein": 14.5, "carbohydrates": 45, "fiber": 12.5, "folate": 282,
+            "manganese": 1.7, "copper": 580, "iron": 4.7, "zinc": 2.5,
+            "phosphorus": 276, "magnesium": 79, "resistant-starch": 3,
+        },
+    },
+
+    # Dairy
+    {
+        "name": "greek yogurt",
+        "category": "dairy",
+        "serving": "200 g",
+        "serving_g": 200,
+        "nutrients": {
+            "protein": 20, "carbohydrates": 8, "total-fats": 8, "calcium": 230,
+            "vitamin-b12": 1.5, "riboflavin": 0.5, "iodine": 70, "phosphorus": 270,
+            "potassium": 280,
+        },
+    },
+    {
+        "name": "milk",
+        "category": "dairy",
+        "serving": "250 ml",
+        "serving_g": 250,
+        "nutrients": {
+            "protein": 8, "carbohydrates": 12, "total-fats": 8, "calcium": 300,
+            "vitamin-d": 3, "vitamin-b12": 1.2, "riboflavin": 0.45, "iodine": 85,
+            "potassium": 380, "phosphorus": 250, "water": 220,
+        },
+    },
+    {
+        "name": "cheddar",
+        "category": "dairy",
+        "serving": "30 g",
+        "serving_g": 30,
+        "nutrients": {
+            "protein": 7, "total-fats": 9.5, "calcium": 200, "phosphorus": 145,
+            "sodium": 185, "vitamin-a": 80, "zinc": 1,
+        },
+    },
+
+    # Grains and starches
+    {
+        "name": "quinoa",
+        "category": "grain",
+        "serving": "1 cup, cooked",
+        "serving_g": 185,
+        "nutrients": {
+            "carbohydrates": 39, "protein": 8, "fiber": 5.2, "magnesium": 118,
+            "manganese": 1.2, "phosphorus": 280, "folate": 78, "iron": 2.8, "zinc": 2,
+            "copper": 355, "thiamine": 0.2,
+        },
+    },
+    {
+        "name": "oatmeal",
+        "category": "grain",
+        "serving": "40 g dry oats",
+        "serving_g": 40,
+        "nutrients": {
+            "carbohydrates": 27, "fiber": 4, "beta-glucan": 2, "protein": 5,
+            "total-fats": 2.8, "manganese": 1.9, "magnesium": 55, "phosphorus": 165,
+            "iron": 1.9, "zinc": 1.5, "thiamine": 0.3,
+        },
+    },
+    {
+        "name": "barley",
+        "category": "grain",
+        "serving": "1 cup, cooked",
+        "serving_g": 157,
+        "nutrients": {
+            "carbohydrates": 44, "fiber": 6, "beta-glucan": 2.5, "protein": 3.5,
+            "selenium": 13, "manganese": 0.4, "niacin": 3.2,
+        },
+    },
+    {
+        "name": "brown rice",
+        "category": "grain",
+        "serving": "1 cup, cooked",
+        "serving_g": 195,
+        "nutrients": {
+            "carbohydrates": 45, "fiber": 3.5, "protein": 5, "manganese": 1.8,
+            "magnesium": 84, "selenium": 19, "phosphorus": 160, "niacin": 5,
+            "thiamine": 0.2,
+        },
+    },
+    {
+        "name": "whole wheat bread",
+        "category": "grain",
+        "serving": "2 slices",
+        "serving_g": 64,
+        "nutrients": {
+            "carbohydrates": 28, "fiber": 4, "protein": 8, "manganese": 1.4,
+            "selenium": 25, "thiamine": 0.25, "niacin": 3, "sodium": 300, "iron": 1.6,
+        },
+    },
+    {
+        "name": "sweet potato",
+        "category": "grain",
+        "serving": "1 medium, baked",
+        "serving_g": 150,
+        "nutrients": {
+            "carbohydrates": 31, "fiber": 5, "beta-carotene": 17, "vitamin-a": 1400,
+            "potassium": 710, "manganese": 0.75, "vitamin-c": 29, "pyridoxine": 0.4,
+        },
+    },
+    {
+        "name": "chilled potato salad",
+        "category": "grain",
+        "serving": "150 g",
+        "serving_g": 150,
+        "nutrients": {
+            "carbohydrates": 25, "fiber": 2.5, "resistant-starch": 5, "potassium": 560,
+            "vitamin-c": 12, "pyridoxine": 0.4,
+        },
+    },
+
+    # Vegetables
+    {
+        "name": "spinach",
+        "category": "vegetable",
+        "serving": "1/2 cup, cooked",
+        "serving_g": 90,
+        "nutrients": {
+            "vitamin-k": 440, "folate": 145, "vitamin-a": 470, "magnesium": 78,
+            "iron": 3.2, "potassium": 470, "lutein": 11, "beta-carotene": 5.5,
+            "vitamin-c": 9, "manganese": 0.9, "calcium": 135, "fiber": 2.4,
+            "carbohydrates": 3.8, "protein": 3,
+        },
+    },
+    {
+        "name": "kale",
+        "category": "vegetable",
+        "serving": "100 g",
+        "serving_g": 100,
+        "nutrients": {
+            "vitamin-k": 390, "vitamin-c": 93, "vitamin-a": 240, "lutein": 6.3,
+            "beta-carotene": 2.9, "calcium": 150, "potassium": 350, "manganese": 0.9,
+            "fiber": 4, "quercetin": 23, "carbohydrates": 9,
+        },
+    },
+    {
+        "name": "broccoli",
+        "category": "vegetable",
+        "serving": "150 g",
+        "serving_g": 150,
+        "nutrients": {
+            "vitamin-c": 135, "vitamin-k": 150, "folate": 95, "fiber": 3.9,
+            "potassium": 470, "sulforaphane": 6, "carbohydrates": 10, "protein": 4,
+            "manganese": 0.3, "lutein": 1,
+        },
+    },
+    {
+        "name": "broccoli sprouts",
+        "category": "vegetable",
+        "serving": "30 g",
+        "serving_g": 30,
+        "nutrients": {"sulforaphane": 10, "vitamin-c": 20, "fiber": 1},
+    },
+    {
+        "name": "carrots",
+        "category": "vegetable",
+        "serving": "100 g",
+        "serving_g": 100,
+        "nutrients": {
+            "beta-carotene": 8.3, "vitamin-a": 835, "fiber": 2.8, "vitamin-k": 13,
+            "potassium": 320, "carbohydrates": 10,
+        },
+    },
+    {
+        "name": "tomato sauce",
+        "category": "vegetable",
+        "serving": "125 g",
+        "serving_g": 125,
+        "nutrients": {
+            "lycopene": 17, "vitamin-c": 9, "potassium": 410, "vitamin-a": 30,
+            "vitamin-e": 2.5, "carbohydrates": 9, "fiber": 2,
+        },
+    },
+    {
+        "name": "red bell pepper",
+        "category": "vegetable",
+        "serving": "1 medium",
+        "serving_g": 120,
+        "nutrients": {
+            "vitamin-c": 152, "vitamin-a": 190, "beta-carotene": 1.9, "pyridoxine": 0.35,
+            "vitamin-e": 1.9, "folate": 55, "carbohydrates": 7, "fiber": 2.5,
+        },
+    },
+    {
+        "name": "mushrooms",
+        "category": "vegetable",
+        "serving": "100 g, UV-exposed",
+        "serving_g": 100,
+        "nutrients": {
+            "vitamin-d": 10, "riboflavin": 0.4, "niacin": 3.6, "selenium": 9,
+            "copper": 320, "potassium": 320, "pantothenic-acid": 1.5, "beta-glucan": 0.4,
+        },
+    },
+    {
+        "name": "avocado",
+        "category": "vegetable",
+        "serving": "1/2 fruit",
+        "serving_g": 100,
+        "nutrients": {
+            "total-fats": 15, "fiber": 6.7, "potassium": 485, "vitamin-k": 21,
+            "folate": 81, "vitamin-e": 2.1, "pantothenic-acid": 1.4, "lutein": 0.27,
+            "carbohydrates": 8.5, "linoleic-acid": 1.7,
+        },
+    },
+    {
+        "name": "red onion",
+        "category": "vegetable",
+        "serving": "1 medium",
+        "serving_g": 110,
+        "nutrients": {
+            "quercetin": 22, "polyphenols": 50, "fiber": 1.9, "vitamin-c": 8,
+            "carbohydrates": 10,
+        },
+    },
+    {
+        "name": "garlic",
+        "category": "vegetable",
+        "serving": "2 cloves, crushed",
+        "serving_g": 6,
+        "nutrients": {"allicin": 3.5, "manganese": 0.1, "vitamin-c": 2},
+    },
+    {
+        "name": "nori",
+        "category": "vegetable",
+        "serving": "2 sheets",
+        "serving_g": 5,
+        "nutrients": {"iodine": 90, "vitamin-a": 25, "vitamin-b12": 0.5},
+    },
+
+    # Fruit
+    {
+        "name": "orange",
+        "category": "fruit",
+        "serving": "1 medium",
+        "serving_g": 150,
+        "nutrients": {
+            "vitamin-c": 80, "folate": 45, "potassium": 270, "fiber": 3.6,
+            "carbohydrates": 18, "thiamine": 0.13, "polyphenols": 120, "water": 130,
+        },
+    },
+    {
+        "name": "blueberries",
+        "category": "fruit",
+        "serving": "1 cup",
+        "serving_g": 150,
+        "nutrients": {
+            "vitamin-k": 29, "vitamin-c": 14.5, "manganese": 0.5, "fiber": 3.6,
+            "polyphenols": 330, "quercetin": 3, "carbohydrates": 21,
+        },
+    },
+    {
+        "name": "apple",
+        "category": "fruit",
+        "serving": "1 medium, with skin",
+        "serving_g": 180,
+        "nutrients": {
+            "fiber": 4.4, "vitamin-c": 8, "quercetin": 7, "polyphenols": 200,
+            "carbohydrates": 25, "potassium": 195, "water": 155,
+        },
+    },
+    {
+        "name": "strawberries",
+        "category": "fruit",
+        "serving": "1 cup",
+        "serving_g": 150,
+        "nutrients": {
+            "vitamin-c": 88, "folate": 36, "manganese": 0.6, "polyphenols": 350,
+            "fiber": 3, "carbohydrates": 11.5,
+        },
+    },
+    {
+        "name": "kiwi",
+        "category": "fruit",
+        "serving": "2 fruits",
+        "serving_g": 150,
+        "nutrients": {
+            "vitamin-c": 140, "vitamin-k": 60, "vitamin-e": 2.2, "fiber": 4.5,
+            "potassium": 470, "carbohydrates": 22,
+        },
+    },
+    {
+        "name": "green banana",
+        "category": "fruit",
+        "serving": "1 medium",
+        "serving_g": 118,
+        "nutrients": {
+            "carbohydrates": 27, "resistant-starch": 6, "potassium": 420, "fiber": 3,
+            "pyridoxine": 0.4, "vitamin-c": 10,
+        },
+    },
+
+    # Nuts and seeds
+    {
+        "name": "almonds",
+        "category": "nuts_seeds",
+        "serving": "28 g",
+        "serving_g": 28,
+        "nutrients": {
+            "vitamin-e": 7.3, "magnesium": 76, "total-fats": 14, "protein": 6,
+            "fiber": 3.5, "riboflavin": 0.3, "manganese": 0.6, "copper": 290,
+            "linoleic-acid": 3.5, "carbohydrates": 6, "calcium": 76,
+        },
+    },
+    {
+        "name": "walnuts",
+        "category": "nuts_seeds",
+        "serving": "28 g",
+        "serving_g": 28,
+        "nutrients": {
+            "alpha-linolenic-acid": 2.5, "linoleic-acid": 10.8, "total-fats": 18.5,
+            "protein": 4.3, "manganese": 1, "copper": 450, "magnesium": 45,
+            "polyphenols": 450, "fiber": 1.9, "carbohydrates": 3.9,
+        },
+    },
+    {
+        "name": "chia seeds",
+        "category": "nuts_seeds",
+        "serving": "28 g",
+        "serving_g": 28,
+        "nutrients": {
+            "alpha-linolenic-acid": 5, "fiber": 9.8, "calcium": 180, "magnesium": 95,
+            "phosphorus": 244, "manganese": 0.8, "protein": 4.7, "total-fats": 8.7,
+            "carbohydrates": 12,
+        },
+    },
+    {
+        "name": "ground flaxseed",
+        "category": "nuts_seeds",
+        "serving": "1 tbsp",
+        "serving_g": 14,
+        "nutrients": {
+            "alpha-linolenic-acid": 3.2, "fiber": 3.8, "thiamine": 0.23, "magnesium": 55,
+            "manganese": 0.35, "total-fats": 6, "linoleic-acid": 0.8,
+        },
+    },
+    {
+        "name": "pumpkin seeds",
+        "category": "nuts_seeds",
+        "serving": "28 g",
+        "serving_g": 28,
+        "nutrients": {
+            "magnesium": 156, "zinc": 2.2, "iron": 2.3, "manganese": 1.3, "copper": 380,
+            "phosphorus": 330, "protein": 8.5, "total-fats": 13.9, "linoleic-acid": 5.9,
+        },
+    },
+    {
+        "name": "brazil nuts",
+        "category": "nuts_seeds",
+        "serving": "2 nuts",
+        "serving_g": 10,
+        "nutrients": {"selenium": 190, "magnesium": 38, "total-fats": 6.7, "copper": 175},
+    },
+
+    # Spices and drinks
+    {
+        "name": "turmeric",
+        "category": "spice",
+        "serving": "1 tsp",
+        "serving_g": 3,
+        "nutrients": {"curcumin": 90, "manganese": 0.2, "iron": 1.6},
+    },
+    {
+        "name": "green tea",
+        "category": "drink",
+        "serving": "1 cup",
+        "serving_g": 240,
+        "nutrients": {"polyphenols": 250, "quercetin": 2, "manganese": 0.4, "water": 240},
+    },
+]
+
+
+def get_food(name: str) -> Dict[str, Any]:
+    """Get a catalog food by name (case-insensitive).
+
+    Args:
+        name: Food name
+
+    Returns:
+        Catalog entry, or an empty dict if the food is not in the catalog
+    """
+    name = name.strip().lower()
+    for food in FOOD_CATALOG:
+        if food["name"] == name:
+            return food
+    return {}
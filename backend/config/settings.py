@@ -47,6 +47,266 @@ class Settings(BaseSettings):
         description="Model for critic agent verification",
     )
 
+    # Deployment
+    workers: int = Field(
+        default=1,
+        description="Number of uvicorn worker processes (>1 requires a shared state backend)",
+    )
+    state_backend: str = Field(
+        default="memory",
+        description="Meal/gap state and pub/sub backend: 'memory' (single worker) or 'sqlite'",
+    )
+    state_db_path: str = Field(
+        default="goodfood_state.db",
+        description="SQLite database file shared by all workers when state_backend='sqlite'",
+    )
+    pubsub_poll_interval: float = Field(
+        default=0.05,
+        description="Seconds between polls of the SQLite pub/sub table",
+    )
+
+    # Connection send queues
+    connection_queue_size: int = Field(
+        default=256,
+        description="Outbound messages queued per WebSocket before the client is evicted",
+    )
+    connection_send_timeout_seconds: float = Field(
+        default=10.0,
+        description="Evict a WebSocket client whose single send takes longer than this",
+    )
+    progress_coalesce_window_seconds: float = Field(
+        default=0.05,
+        description="Hold progress events this long per connection to merge them (0 disables)",
+    )
+    ws_per_message_deflate: bool = Field(
+        default=True,
+        description="Offer permessage-deflate compression to WebSocket clients",
+    )
+
+    # Session resume
+    event_log_size: int = Field(
+        default=1000,
+        description="Recent events kept per user for replay to reconnecting clients",
+    )
+    event_log_idle_seconds: float = Field(
+        default=600.0,
+        description="Forget the event log of a user without events for this long",
+    )
+
+    # Meal jobs
+    meal_job_workers: int = Field(
+        default=4,
+        description="Number of async workers processing add_meal jobs per process",
+    )
+    meal_job_queue_size: int = Field(
+        default=100,
+        description="Maximum number of add_meal jobs waiting for a worker",
+    )
+    max_inflight_meals_per_connection: int = Field(
+        default=5,
+        description="Maximum concurrent add_meal requests a single connection may have",
+    )
+    disconnect_cancel_grace_seconds: float = Field(
+        default=15.0,
+        description="Cancel a disconnected client's meal jobs if the user has not reconnected by then",
+    )
+
+    # Prompt caching
+    prompt_caching: bool = Field(
+        default=True,
+        description="Mark static agent system prompts for Anthropic prompt caching",
+    )
+
+    # LLM governor (0 disables a limit)
+    llm_max_concurrency: int = Field(
+        default=8,
+        description="Maximum LLM requests in flight across the process",
+    )
+    llm_requests_per_minute: float = Field(
+        default=50.0,
+        description="LLM requests per minute across the process",
+    )
+    llm_tokens_per_minute: float = Field(
+        default=80000.0,
+        description="LLM input plus output tokens per minute across the process",
+    )
+
+    # LLM retries
+    llm_max_retries: int = Field(
+        default=3,
+        description="Retries of a transient LLM failure (429, 529, 5xx, connection)",
+    )
+    llm_retry_base_delay: float = Field(
+        default=1.0,
+        description="Backoff before the first retry in seconds, doubled per retry",
+    )
+    llm_retry_max_delay: float = Field(
+        default=30.0,
+        description="Longest backoff in seconds; a longer Retry-After gives up",
+    )
+    llm_retry_budget_ratio: float = Field(
+        default=0.2,
+        description="Retries earned per original LLM request across the process",
+    )
+    llm_retry_budget_min_per_minute: float = Field(
+        default=10.0,
+        description="Retries per minute allowed regardless of request volume",
+    )
+    llm_request_timeout: float = Field(
+        default=60.0,
+        description="Timeout of a single LLM request in seconds",
+    )
+
+    # Deadlines and hedging
+    meal_latency_budget_seconds: float = Field(
+        default=120.0,
+        description="Latency budget of one meal estimate, split into stage deadlines (0 disables)",
+    )
+    gap_latency_budget_seconds: float = Field(
+        default=90.0,
+        description="Latency budget of one gap analysis LLM phase (0 disables)",
+    )
+    llm_hedge_percentile: float = Field(
+        default=95.0,
+        description="Recent latency percentile after which a call is hedged (0 disables)",
+    )
+    llm_hedge_min_samples: int = Field(
+        default=20,
+        description="Calls an agent needs before its calls are hedged",
+    )
+    llm_hedge_budget_ratio: float = Field(
+        default=0.05,
+        description="Hedged requests earned per original LLM request across the process",
+    )
+    llm_hedge_budget_min_per_minute: float = Field(
+        default=2.0,
+        description="Hedged requests per minute allowed regardless of request volume",
+    )
+
+    # Circuit breakers
+    circuit_failure_threshold: int = Field(
+        default=5,
+        description="Consecutive provider failures that open an agent's circuit (0 disables)",
+    )
+    circuit_recovery_seconds: float = Field(
+        default=30.0,
+        description="Seconds an open circuit waits before a half-open probe",
+    )
+    ingredient_cache_size: int = Field(
+        default=1024,
+        description="Approved ingredient estimates kept for degraded mode (0 disables)",
+    )
+    ingredient_cache_ttl_seconds: float = Field(
+        default=86400.0,
+        description="Lifetime of a cached ingredient estimate in seconds",
+    )
+
+    # Adaptive validation
+    max_rounds_per_ingredient: int = Field(
+        default=3,
+        description="Estimator-validator rounds per ingredient for classes without a cheaper rule",
+    )
+    adaptive_validation: bool = Field(
+        default=True,
+        description="Skip or shorten validation for classes that are almost always approved",
+    )
+    approval_stats_db_path: str = Field(
+        default="approval_stats.db",
+        description="SQLite database of validator approval statistics",
+    )
+    adaptive_min_samples: int = Field(
+        default=30,
+        description="First-round validations a class and confidence need before a rule applies",
+    )
+    adaptive_skip_rate: float = Field(
+        default=0.97,
+        description="Approval rate (95% lower bound) above which validation is skipped",
+    )
+    adaptive_single_round_rate: float = Field(
+        default=0.85,
+        description="Approval rate (95% lower bound) above which one validation round is used",
+    )
+    adaptive_audit_rate: float = Field(
+        default=0.1,
+        description="Fraction of skipped ingredients validated anyway to track drift",
+    )
+    adaptive_window_days: int = Field(
+        default=30,
+        description="Days of approval statistics the rules are computed from",
+    )
+    adaptive_drift_days: int = Field(
+        default=7,
+        description="Recent days compared against the rest of the window in the drift report",
+    )
+
+    # Pipelined estimation
+    pipelined_estimation: bool = Field(
+        default=True,
+        description="Start estimating each ingredient while the preprocessing response streams",
+    )
+
+    # Reasoning streaming
+    stream_reasoning: bool = Field(
+        default=True,
+        description="Stream interaction analysis and gap reasoning text to clients",
+    )
+    reasoning_stream_interval_seconds: float = Field(
+        default=0.05,
+        description="Minimum seconds between streamed reasoning events",
+    )
+
+    # Progressive refinement
+    provisional_estimates: bool = Field(
+        default=True,
+        description="Send rough provisional macros while the full meal estimate runs",
+    )
+    provisional_llm: bool = Field(
+        default=True,
+        description="Allow one small LLM call when the meal cache and food catalog fall short",
+    )
+    provisional_timeout_seconds: float = Field(
+        default=3.0,
+        description="Longest wait for the provisional LLM estimate in seconds",
+    )
+    meal_cache_size: int = Field(
+        default=512,
+        description="Finished meal estimates reused as provisional macros (0 disables)",
+    )
+    meal_cache_ttl_seconds: float = Field(
+        default=86400.0,
+        description="Lifetime of a cached meal estimate in seconds",
+    )
+
+    # Gap analysis
+    gap_debounce_seconds: float = Field(
+        default=1.0,
+        description="Quiet period after the last meal change before gap analysis runs",
+    )
+    gap_single_call: bool = Field(
+        default=False,
+        description="Prioritize gaps and suggest meals in one LLM call instead of two",
+    )
+    meal_suggestion_mode: str = Field(
+        default="llm",
+        description="Meal suggestions: llm, seeded (local food ranking in the LLM prompt) or local (no LLM)",
+    )
+    gap_cache_size: int = Field(
+        default=256,
+        description="Gap signatures whose LLM prioritization/suggestions are cached (0 disables)",
+    )
+    gap_cache_ttl_seconds: float = Field(
+        default=3600.0,
+        description="Lifetime of a cached gap analysis LLM result",
+    )
+    gap_cache_top_n: int = Field(
+        default=5,
+        description="Number of leading gaps in a gap signature",
+    )
+    gap_cache_bucket_percent: float = Field(
+        default=10.0,
+        description="Width of the percentage-of-target buckets in a gap signature",
+    )
+
     # Logging
     log_level: str = Field(
         default="INFO",
@@ -0,0 +1,132 @@
+"""Per-agent circuit breakers for LLM calls.
+
+Each agent (estimator, validator, preprocessing, interaction analysis, gap steps) has
+its own breaker. After ``failure_threshold`` consecutive provider failures (errors
+the retry layer gave up on, or timeouts) the breaker opens and calls fail at once
+with ``LLMUnavailable`` instead of waiting out retries and timeouts; the workflows
+catch that and switch to their degraded, local-data paths. After
+``recovery_seconds`` one call is let through as a half-open probe: success closes
+the breaker, failure opens it for another period.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from config.settings import settings
+from utils.metrics import get_metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Gauge values for the breaker state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class LLMUnavailable(Exception):
+    """Raised when an agent's circuit is open or the provider kept failing."""
+
+    def __init__(self, agent: str, reason: str):
+        super().__init__(f"{agent}: {reason}")
+        self.agent = agent
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        """Initialize a closed breaker.
+
+        Args:
+            name: Agent name (used in metrics)
+            failure_threshold: Consecutive failures that open the breaker (0 disables it)
+            recovery_seconds: Time the breaker stays open before a probe is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Check whether a call may go to the provider.
+
+        An open breaker past its recovery period lets exactly one call through as a
+        probe; if that probe never reports back (e.g. it was cancelled), another one
+        is allowed after a further recovery period.
+        """
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.recovery_seconds:
+                self._set_state(HALF_OPEN)
+                self._probe_started = now
+                return True
+            if self.state == HALF_OPEN and now - self._probe_started >= self.recovery_seconds:
+                self._probe_started = now
+                return True
+        get_metrics().increment(f"circuit_breaker.{self.name}.rejected")
+        return False
+
+    def record_success(self) -> None:
+        """Reset the failure count, closing the breaker after a successful probe."""
+        with self._lock:
+            self._failures = 0
+            if self.state != CLOSED:
+                print(f"Circuit breaker {self.name} closed")
+                self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        """Count a provider failure, opening the breaker at the threshold."""
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                print(f"Circuit breaker {self.name} opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+                get_metrics().increment(f"circuit_breaker.{self.name}.opened")
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected (without taking a probe)."""
+        with self._lock:
+            return self.state != CLOSED
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        get_metrics().set_gauge(f"circuit_breaker.{self.name}.state", STATE_VALUES[state])
+
+
+# Breakers by agent name
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(agent: str) -> CircuitBreaker:
+    """Get (creating on first use) the circuit breaker for an agent."""
+    with _breakers_lock:
+        breaker = _breakers.get(agent)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                agent,
+                failure_threshold=settings.circuit_failure_threshold,
+                recovery_seconds=settings.circuit_recovery_seconds,
+            )
+            _breakers[agent] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    """Current state of every breaker created so far."""
+    with _breakers_lock:
+        return {name: breaker.state for name, breaker in _breakers.items()}
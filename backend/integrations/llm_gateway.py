@@ -0,0 +1,588 @@
+"""Process-wide gateway for all LLM calls.
+
+Every agent builds its model through ``create_chat_model``, which wraps the chat
+model so each call first takes a slot from the global ``LLMGovernor``. The governor
+bounds concurrency, enforces token buckets for requests and tokens per minute, and
+queues calls instead of failing them. Waiting calls are served strictly by priority
+class: interactive meal estimation, then background gap refreshes, then batch work.
+
+Callers choose their class (and optionally a cancellation token that aborts queued
+calls) with ``llm_context``; the context is inherited by the worker threads and
+tasks the workflows spawn.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+
+from langchain_anthropic import ChatAnthropic
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda, ensure_config
+
+from config.settings import settings
+from integrations.circuit_breaker import LLMUnavailable, get_breaker
+from integrations.llm_hedging import get_hedge_policy, latency_metric
+from integrations.llm_retry import error_kind, get_retry_policy
+from utils.cancellation import CancellationToken, OperationCancelled
+from utils.metrics import get_metrics
+
+# Priority classes, most urgent first
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, BACKGROUND: 1, BATCH: 2}
+
+_priority: ContextVar[str] = ContextVar("llm_priority", default=BATCH)
+_cancel_token: ContextVar[Optional[CancellationToken]] = ContextVar("llm_cancel_token", default=None)
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def llm_context(priority: str, cancel_token: Optional[CancellationToken] = None) -> Iterator[None]:
+    """Set the priority class (and cancellation token) for LLM calls made inside.
+
+    Args:
+        priority: One of INTERACTIVE, BACKGROUND or BATCH
+        cancel_token: Token that aborts calls still waiting for the governor
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    priority_reset = _priority.set(priority)
+    token_reset = _cancel_token.set(cancel_token)
+    try:
+        yield
+    finally:
+        _cancel_token.reset(token_reset)
+        _priority.reset(priority_reset)
+
+
+@contextmanager
+def llm_deadline(seconds: float) -> Iterator[None]:
+    """Bound the LLM calls made inside to finish within ``seconds``.
+
+    Nested deadlines never extend an enclosing one. Calls that would run past the
+    deadline are cut short and raise ``LLMUnavailable``, so callers fall back to
+    their degraded path instead of waiting.
+
+    Args:
+        seconds: Time budget from now (0 or less for no deadline)
+    """
+    deadline = time.monotonic() + seconds if seconds > 0 else None
+    current = _deadline.get()
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    reset = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(reset)
+
+
+def deadline_remaining() -> Optional[float]:
+    """Seconds left before the current ``llm_deadline`` (None if there is none)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` tokens per minute.
+
+    A rate of 0 or less means unlimited. The level may go negative when actual usage
+    exceeds what was reserved; later requests then wait for the debt to refill.
+    """
+
+    def __init__(self, per_minute: float):
+        """Create a full bucket."""
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        """Whether the bucket never limits."""
+        return self.capacity <= 0
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if they are now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take tokens (call after ``wait_time`` returned 0)."""
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Return (positive) or charge (negative) tokens after the fact."""
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + delta)
+
+
+class _Waiter:
+    """A call waiting for a governor slot."""
+
+    def __init__(self, priority: str, tokens: float, wake: Callable[[], None]):
+        self.priority = priority
+        self.tokens = tokens
+        self.wake = wake
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.abandoned = False
+
+
+class LLMGovernor:
+    """Priority scheduler bounding LLM concurrency, requests and tokens per minute."""
+
+    def __init__(self, max_concurrency: int = 8, requests_per_minute: float = 50, tokens_per_minute: float = 0):
+        """Initialize the governor.
+
+        Args:
+            max_concurrency: Maximum calls in flight (0 for unlimited)
+            requests_per_minute: Request rate limit (0 for unlimited)
+            tokens_per_minute: Input plus output token rate limit (0 for unlimited)
+        """
+        self.max_concurrency = max_concurrency
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._timer: Optional[threading.Timer] = None
+
+    def acquire(self, priority: str, tokens: float, cancel_token: Optional[CancellationToken] = None) -> float:
+        """Block the calling thread until the call may start.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            OperationCancelled: If the token is cancelled while waiting
+        """
+        granted = threading.Event()
+        waiter = _Waiter(priority, tokens, granted.set)
+        self._enqueue(waiter)
+
+        abort = granted.set
+        if cancel_token is not None:
+            cancel_token.add_callback(abort)
+        try:
+            granted.wait()
+        finally:
+            if cancel_token is not None:
+                cancel_token.remove_callback(abort)
+
+        # Woken by the cancel token, unless the grant landed first (then the caller
+        # owns the slot and releases it once, after the call)
+        if self._withdraw(waiter) and cancel_token is not None:
+            cancel_token.check()
+        return self._record_wait(waiter)
+
+    async def aacquire(
+        self, priority: str, tokens: float, cancel_token: Optional[CancellationToken] = None
+    ) -> float:
+        """Wait (without blocking the event loop) until the call may start.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            OperationCancelled: If the token is cancelled while waiting
+        """
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = _Waiter(priority, tokens, wake)
+        self._enqueue(waiter)
+
+        if cancel_token is not None:
+            cancel_token.add_callback(wake)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        finally:
+            if cancel_token is not None:
+                cancel_token.remove_callback(wake)
+
+        # Woken by the cancel token, unless the grant landed first (then the caller
+        # owns the slot and releases it once, after the call)
+        if self._withdraw(waiter) and cancel_token is not None:
+            cancel_token.check()
+        return self._record_wait(waiter)
+
+    def release(self, reserved_tokens: float, used_tokens: Optional[float] = None) -> None:
+        """Free a slot, settling the token reservation against actual usage."""
+        with self._lock:
+            self._in_flight -= 1
+            if used_tokens is not None:
+                self._tokens.adjust(reserved_tokens - used_tokens)
+            self._dispatch()
+
+    def stats(self) -> dict:
+        """Current queue length and calls in flight."""
+        with self._lock:
+            return {"queued": len(self._queue), "in_flight": self._in_flight}
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        with self._lock:
+            heapq.heappush(self._queue, (PRIORITIES[waiter.priority], next(self._sequence), waiter))
+            self._dispatch()
+
+    def _withdraw(self, waiter: _Waiter) -> bool:
+        """Withdraw a waiter unless it was granted a slot; returns True if withdrawn."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            waiter.abandoned = True
+            self._dispatch()
+            return True
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Withdraw a waiter that will not make its call, handing back a granted slot."""
+        with self._lock:
+            if waiter.granted:
+                # Granted just as it was abandoned: hand the slot back
+                self._in_flight -= 1
+                self._tokens.adjust(waiter.tokens)
+            else:
+                waiter.abandoned = True
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters in priority order (call with the lock held)."""
+        while self._queue:
+            waiter = self._queue[0][2]
+            if waiter.abandoned:
+                heapq.heappop(self._queue)
+                continue
+            if self.max_concurrency > 0 and self._in_flight >= self.max_concurrency:
+                break
+
+            now = time.monotonic()
+            delay = max(self._requests.wait_time(1, now), self._tokens.wait_time(waiter.tokens, now))
+            if delay > 0:
+                self._schedule(delay)
+                break
+
+            heapq.heappop(self._queue)
+            self._requests.consume(1)
+            self._tokens.consume(waiter.tokens)
+            self._in_flight += 1
+            waiter.granted = True
+            waiter.wake()
+
+        self._update_gauges()
+
+    def _schedule(self, delay: float) -> None:
+        """Re-run dispatch once the buckets have refilled."""
+        if self._timer is not None and self._timer.is_alive():
+            return
+
+        def fire() -> None:
+            with self._lock:
+                self._timer = None
+                self._dispatch()
+
+        self._timer = threading.Timer(delay, fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _record_wait(self, waiter: _Waiter) -> float:
+        wait = time.monotonic() - waiter.enqueued_at
+        metrics = get_metrics()
+        metrics.observe(f"llm_gateway.queue_wait_seconds.{waiter.priority}", wait)
+        metrics.increment(f"llm_gateway.requests.{waiter.priority}")
+        return wait
+
+    def _update_gauges(self) -> None:
+        metrics = get_metrics()
+        metrics.set_gauge("llm_gateway.queued", len(self._queue))
+        metrics.set_gauge("llm_gateway.in_flight", self._in_flight)
+
+
+# Global governor instance
+_governor = None
+
+
+def get_governor() -> LLMGovernor:
+    """Get the global LLM governor."""
+    global _governor
+    if _governor is None:
+        _governor = LLMGovernor(
+            max_concurrency=settings.llm_max_concurrency,
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+        )
+    return _governor
+
+
+def _estimate_tokens(prompt: Any, max_tokens: int) -> float:
+    """Rough token reservation: ~4 characters per input token plus the output limit."""
+    text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    return len(text) / 4 + max_tokens
+
+
+def _used_tokens(message: Any) -> Optional[float]:
+    """Actual input plus output tokens of a response, if reported."""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return None
+    return usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+
+
+class GatewayModel(RunnableLambda):
+    """Gateway-wrapped chat model that can also stream.
+
+    A plain ``RunnableLambda`` buffers its whole output, so ``astream`` on a chain
+    would only see the complete response. Here ``atransform`` (which ``astream`` and
+    chains use) streams the chat model's chunks through the gateway instead.
+    """
+
+    def __init__(
+        self,
+        invoke: Callable[[Any, RunnableConfig], Any],
+        ainvoke: Callable[[Any, RunnableConfig], Any],
+        astream: Callable[[Any, RunnableConfig], AsyncIterator[Any]],
+        name: str,
+    ):
+        """Wrap the gateway call functions.
+
+        Args:
+            invoke: Blocking call
+            ainvoke: Async call
+            astream: Async generator of response chunks
+            name: Runnable name
+        """
+        super().__init__(invoke, afunc=ainvoke, name=name)
+        self._astream_chunks = astream
+
+    async def atransform(
+        self,
+        input: AsyncIterator[Any],
+        config: Optional[RunnableConfig] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """Stream the response to the (single) prompt the input yields."""
+        prompt = None
+        async for item in input:
+            prompt = item if prompt is None else prompt + item
+        async for chunk in self._astream_chunks(prompt, ensure_config(config)):
+            yield chunk
+
+
+def create_chat_model(agent: str, model: str, temperature: float, max_tokens: int) -> Runnable:
+    """Create a chat model whose calls go through the global LLM governor.
+
+    Transient failures are retried by the shared retry policy (each attempt queues
+    with the governor again); the client's own retries are disabled so they cannot
+    bypass the governor or the retry budget. Calls are rejected at once with
+    ``LLMUnavailable`` while the agent's circuit breaker is open, and a provider
+    failure the retries could not fix is raised as ``LLMUnavailable`` too, as is
+    running out of the ``llm_deadline`` the call was made under. Slow attempts are
+    hedged by the shared hedge policy. Streamed calls (``astream``) are retried only
+    until their first chunk arrives, are never hedged, and are cut off at the
+    deadline even while chunks keep arriving.
+
+    Args:
+        agent: Name of the calling agent (used for its circuit breaker and metrics)
+        model: Anthropic model name
+        temperature: Sampling temperature
+        max_tokens: Output token limit
+
+    Returns:
+        Runnable usable in place of the chat model in a chain
+    """
+    llm = ChatAnthropic(
+        model=model,
+        anthropic_api_key=settings.anthropic_api_key,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        max_retries=0,
+        default_request_timeout=settings.llm_request_timeout,
+    )
+    metrics = get_metrics()
+    breaker = get_breaker(agent)
+
+    def start(prompt: Any) -> float:
+        if not breaker.allow():
+            raise LLMUnavailable(agent, "circuit open")
+        get_retry_policy().budget.record_request()
+        get_hedge_policy().budget.record_request()
+        return _estimate_tokens(prompt, max_tokens)
+
+    def time_left() -> float:
+        """Timeout for the next request: the client timeout cut to the deadline."""
+        remaining = deadline_remaining()
+        if remaining is None:
+            return settings.llm_request_timeout
+        if remaining <= 0:
+            metrics.increment(f"llm_gateway.deadline_exceeded.{agent}")
+            raise LLMUnavailable(agent, "deadline exceeded")
+        return min(settings.llm_request_timeout, remaining)
+
+    async def until_deadline(chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """Pass a stream's chunks on until the deadline.
+
+        The client applies its timeout to each read, so a stream that keeps sending
+        chunks would otherwise run past the deadline.
+        """
+        while True:
+            remaining = deadline_remaining()
+            try:
+                if remaining is None:
+                    chunk = await chunks.__anext__()
+                else:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(remaining, 0))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                metrics.increment(f"llm_gateway.deadline_exceeded.{agent}")
+                raise LLMUnavailable(agent, "deadline exceeded") from None
+            yield chunk
+
+    def settle(governor: LLMGovernor, reserved: float, response: Any, started: float) -> None:
+        used = _used_tokens(response)
+        governor.release(reserved, used)
+        metrics.increment(f"llm_gateway.calls.{agent}")
+        if response is not None:
+            metrics.observe(latency_metric(agent), time.monotonic() - started)
+        if used is not None:
+            metrics.increment("llm_gateway.tokens", used)
+
+    def retry_delay(error: Exception, attempt: int) -> float:
+        """Get the backoff before the next attempt, or raise if there is none."""
+        delay = get_retry_policy().next_delay(error, attempt, agent)
+        remaining = deadline_remaining()
+        if delay is not None and remaining is not None and delay >= remaining:
+            metrics.increment(f"llm_gateway.deadline_exceeded.{agent}")
+            raise LLMUnavailable(agent, f"deadline exceeded ({error})") from error
+        if delay is not None and not breaker.is_open:
+            print(f"{agent}: retrying LLM call in {delay:.1f}s ({error})")
+            return delay
+        if error_kind(error) is None:
+            raise error
+        breaker.record_failure()
+        raise LLMUnavailable(agent, str(error)) from error
+
+    def call_once(prompt: Any, config: RunnableConfig, reserved: float) -> Any:
+        governor = get_governor()
+        governor.acquire(_priority.get(), reserved, _cancel_token.get())
+        response = None
+        started = time.monotonic()
+        try:
+            response = llm.invoke(prompt, config, timeout=time_left())
+            return response
+        finally:
+            settle(governor, reserved, response, started)
+
+    async def acall_once(prompt: Any, config: RunnableConfig, reserved: float) -> Any:
+        governor = get_governor()
+        await governor.aacquire(_priority.get(), reserved, _cancel_token.get())
+        response = None
+        started = time.monotonic()
+        try:
+            response = await llm.ainvoke(prompt, config, timeout=time_left())
+            return response
+        finally:
+            settle(governor, reserved, response, started)
+
+    def invoke(prompt: Any, config: RunnableConfig) -> Any:
+        cancel_token = _cancel_token.get()
+        reserved = start(prompt)
+
+        attempt = 0
+        while True:
+            try:
+                response = get_hedge_policy().call(
+                    agent, lambda: call_once(prompt, config, reserved), time_left()
+                )
+                breaker.record_success()
+                return response
+            except (OperationCancelled, LLMUnavailable):
+                raise
+            except Exception as e:
+                delay = retry_delay(e, attempt)
+
+            attempt += 1
+            if cancel_token is not None:
+                cancel_token.wait(delay)
+                cancel_token.check()
+            else:
+                time.sleep(delay)
+
+    async def ainvoke(prompt: Any, config: RunnableConfig) -> Any:
+        cancel_token = _cancel_token.get()
+        reserved = start(prompt)
+
+        attempt = 0
+        while True:
+            try:
+                response = await get_hedge_policy().acall(
+                    agent, lambda: acall_once(prompt, config, reserved), time_left()
+                )
+                breaker.record_success()
+                return response
+            except (OperationCancelled, LLMUnavailable):
+                raise
+            except Exception as e:
+                delay = retry_delay(e, attempt)
+
+            attempt += 1
+            await asyncio.sleep(delay)
+            if cancel_token is not None:
+                cancel_token.check()
+
+    async def astream(prompt: Any, config: RunnableConfig) -> AsyncIterator[Any]:
+        cancel_token = _cancel_token.get()
+        reserved = start(prompt)
+
+        attempt = 0
+        while True:
+            governor = get_governor()
+            await governor.aacquire(_priority.get(), reserved, cancel_token)
+            response = None
+            started = time.monotonic()
+            try:
+                chunks = llm.astream(prompt, config, timeout=time_left())
+                async for chunk in until_deadline(chunks):
+                    response = chunk if response is None else response + chunk
+                    yield chunk
+                breaker.record_success()
+                return
+            except (OperationCancelled, LLMUnavailable):
+                raise
+            except Exception as e:
+                # Chunks already handed to the caller cannot be taken back by a retry
+                if response is not None:
+                    raise
+                delay = retry_delay(e, attempt)
+            finally:
+                settle(governor, reserved, response, started)
+
+            attempt += 1
+            await asyncio.sleep(delay)
+            if cancel_token is not None:
+                cancel_token.check()
+
+    return GatewayModel(invoke, ainvoke, astream, name=f"{agent}_llm")
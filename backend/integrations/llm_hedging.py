@@ -0,0 +1,158 @@
+"""Hedged LLM requests for tail latency.
+
+A call still running after the agent's recent ``LLM_HEDGE_PERCENTILE`` latency gets a
+duplicate request; whichever answers first wins and the other is abandoned. Hedges
+draw from a process-wide budget earned per request (``LLM_HEDGE_BUDGET_RATIO``), so
+hedging cannot more than marginally add to the request rate even when the provider is
+slow across the board.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Optional
+
+from config.settings import settings
+from integrations.llm_retry import RetryBudget
+from utils.metrics import get_metrics
+
+# Threads running hedged synchronous calls (the caller waits on them)
+_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-hedge")
+
+
+def latency_metric(agent: str) -> str:
+    """Name of the summary holding an agent's recent successful call latencies."""
+    return f"llm_gateway.latency_seconds.{agent}"
+
+
+class HedgePolicy:
+    """Decides when a slow call gets a duplicate request."""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        budget: Optional[RetryBudget] = None,
+    ):
+        """Initialize the policy.
+
+        Args:
+            percentile: Latency percentile after which a call is hedged (0 disables)
+            min_samples: Recent calls an agent needs before its calls are hedged
+            budget: Process-wide hedge allowance (defaults to a private one)
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget or RetryBudget(ratio=0.05, min_per_minute=2.0)
+
+    def hedge_after(self, agent: str) -> Optional[float]:
+        """Seconds after which a call of this agent should be hedged, or None."""
+        if self.percentile <= 0:
+            return None
+        metrics = get_metrics()
+        name = latency_metric(agent)
+        if metrics.observation_count(name) < self.min_samples:
+            return None
+        return metrics.percentile(name, self.percentile)
+
+    def call(self, agent: str, call: Callable[[], Any], timeout: float) -> Any:
+        """Run a blocking call, hedging it if it runs past the agent's percentile.
+
+        Args:
+            agent: Calling agent (its latency history sets the hedge delay)
+            call: The request; must be safe to run twice concurrently
+            timeout: Time the call may take at most (hedges are not fired after it)
+
+        Returns:
+            Result of whichever request finished first without error
+        """
+        delay = self.hedge_after(agent)
+        if delay is None or delay >= timeout:
+            return call()
+
+        primary = _executor.submit(contextvars.copy_context().run, call)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._start(agent):
+            return primary.result()
+
+        hedge = _executor.submit(contextvars.copy_context().run, call)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._finish(future is hedge)
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    async def acall(self, agent: str, call: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        """Await a call, hedging it if it runs past the agent's percentile.
+
+        Args:
+            agent: Calling agent (its latency history sets the hedge delay)
+            call: Factory for the request coroutine; must be safe to run twice
+            timeout: Time the call may take at most (hedges are not fired after it)
+
+        Returns:
+            Result of whichever request finished first without error
+        """
+        delay = self.hedge_after(agent)
+        if delay is None or delay >= timeout:
+            return await call()
+
+        primary = asyncio.ensure_future(call())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self._start(agent):
+                return await primary
+
+            hedge = asyncio.ensure_future(call())
+            pending.add(hedge)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._finish(task is hedge)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            # The losing request (or both, if we were cancelled) is abandoned
+            for task in pending:
+                task.cancel()
+
+    def _start(self, agent: str) -> bool:
+        metrics = get_metrics()
+        if not self.budget.try_withdraw():
+            metrics.increment("llm_hedge.budget_exhausted")
+            return False
+        metrics.increment("llm_hedge.fired")
+        metrics.increment(f"llm_hedge.fired.{agent}")
+        return True
+
+    def _finish(self, hedge_won: bool) -> None:
+        if hedge_won:
+            get_metrics().increment("llm_hedge.won")
+
+
+# Global hedge policy instance
+_policy = None
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """Get the global hedge policy."""
+    global _policy
+    if _policy is None:
+        _policy = HedgePolicy(
+            percentile=settings.llm_hedge_percentile,
+            min_samples=settings.llm_hedge_min_samples,
+            budget=RetryBudget(
+                ratio=settings.llm_hedge_budget_ratio,
+                min_per_minute=settings.llm_hedge_budget_min_per_minute,
+            ),
+        )
+    return _policy
@@ -0,0 +1,195 @@
+"""Retry policy shared by all LLM calls.
+
+Transient failures (rate limits, overload, server errors, dropped connections) are
+retried with jittered exponential backoff, waiting at least as long as the API's
+``Retry-After`` header asks. Retries draw from a process-wide budget that grows with
+the number of original requests, so during an outage the retry traffic stays a small
+fraction of normal traffic instead of multiplying it. Everything else (bad requests,
+authentication, cancellation) is fatal and raised right away.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import anthropic
+
+from config.settings import settings
+from utils.metrics import get_metrics
+
+# Status codes worth retrying besides 5xx (same set the Anthropic SDK retries)
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+def error_kind(error: BaseException) -> Optional[str]:
+    """Classify an LLM error.
+
+    Args:
+        error: Exception raised by a model call
+
+    Returns:
+        Short name of a retryable error (e.g. "429", "529", "connection"), or None
+        if the error is fatal
+    """
+    if isinstance(error, anthropic.APITimeoutError):
+        return "timeout"
+    if isinstance(error, anthropic.APIConnectionError):
+        return "connection"
+    if isinstance(error, anthropic.APIStatusError):
+        status = error.status_code
+        if status in RETRYABLE_STATUS_CODES or status >= 500:
+            return str(status)
+    return None
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Get the delay requested by the API's ``retry-after`` headers, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    """Process-wide allowance of extra requests (retries, and hedges in llm_hedging).
+
+    Every original request deposits ``ratio`` extra requests (up to ``max_balance``)
+    and a small floor of ``min_per_minute`` refills over time, so rarely used
+    processes can still retry. Each extra request withdraws one.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_minute: float = 10.0, max_balance: float = 50.0):
+        """Create a budget with a full floor and nothing earned yet."""
+        self.ratio = ratio
+        self.min_per_minute = min_per_minute
+        self.max_balance = max_balance
+        self._earned = 0.0
+        self._floor = min_per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Deposit the share earned by one original request."""
+        with self._lock:
+            self._earned = min(self.max_balance, self._earned + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """Take one retry from the budget; returns False if it is exhausted."""
+        with self._lock:
+            now = time.monotonic()
+            refill = (now - self._updated) * self.min_per_minute / 60.0
+            self._floor = min(self.min_per_minute, self._floor + refill)
+            self._updated = now
+            if self._earned >= 1.0:
+                self._earned -= 1.0
+                return True
+            if self._floor >= 1.0:
+                self._floor -= 1.0
+                return True
+            return False
+
+
+class RetryPolicy:
+    """Decides whether and when a failed LLM call is retried."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        budget: Optional[RetryBudget] = None,
+    ):
+        """Initialize the policy.
+
+        Args:
+            max_retries: Retries per call after the first attempt
+            base_delay: Backoff before the first retry (doubled on each further retry)
+            max_delay: Longest wait; a larger ``Retry-After`` gives up instead
+            budget: Shared retry budget (defaults to a private one)
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+
+    def next_delay(self, error: BaseException, attempt: int, agent: str) -> Optional[float]:
+        """Get the wait before retrying a failed call.
+
+        Args:
+            error: Exception raised by the call
+            attempt: Number of retries already made for this call
+            agent: Calling agent (used in metrics)
+
+        Returns:
+            Seconds to wait before the retry, or None to raise the error
+        """
+        metrics = get_metrics()
+        kind = error_kind(error)
+        if kind is None:
+            metrics.increment("llm_retry.fatal_errors")
+            return None
+
+        metrics.increment(f"llm_retry.errors.{kind}")
+        if attempt >= self.max_retries:
+            metrics.increment("llm_retry.gave_up")
+            return None
+
+        # Full jitter, but never earlier than the server asked for
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        requested = retry_after_seconds(error)
+        delay = max(backoff, requested or 0.0)
+        if delay > self.max_delay:
+            metrics.increment("llm_retry.gave_up")
+            return None
+
+        if not self.budget.try_withdraw():
+            metrics.increment("llm_retry.budget_exhausted")
+            return None
+
+        metrics.increment("llm_retry.retries")
+        metrics.increment(f"llm_retry.retries.{agent}")
+        metrics.observe("llm_retry.backoff_seconds", delay)
+        return delay
+
+
+# Global retry policy instance
+_policy = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Get the global retry policy."""
+    global _policy
+    if _policy is None:
+        _policy = RetryPolicy(
+            max_retries=settings.llm_max_retries,
+            base_delay=settings.llm_retry_base_delay,
+            max_delay=settings.llm_retry_max_delay,
+            budget=RetryBudget(
+                ratio=settings.llm_retry_budget_ratio,
+                min_per_minute=settings.llm_retry_budget_min_per_minute,
+            ),
+        )
+    return _policy
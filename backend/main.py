@@ -3,12 +3,22 @@
 import uvicorn
 
 from api.server import app
+from config.settings import settings
 
 if __name__ == "__main__":
+    if settings.workers > 1 and settings.state_backend == "memory":
+        raise SystemExit(
+            "WORKERS > 1 needs shared state: set STATE_BACKEND=sqlite "
+            "(and STATE_DB_PATH to a file every worker can reach)"
+        )
+
     uvicorn.run(
         "api.server:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        # Auto-reload only supports a single process
+        reload=settings.workers == 1,
+        workers=settings.workers,
         log_level="info",
+        ws_per_message_deflate=settings.ws_per_message_deflate,
     )
@@ -0,0 +1,220 @@
+"""Benchmark broadcasting to many WebSocket clients.
+
+Broadcasts a meal list (10 meals with ~60 nutrients each) to ``--clients`` simulated
+sockets of one user, the old way (awaiting each socket's ``send_json`` in turn) and
+through ``ConnectionManager`` (one serialization per broadcast, per-connection queues
+and writer tasks, eviction of clients that cannot keep up). Most simulated clients
+are healthy; ``--slow`` of them take ``--slow-delay`` seconds per message and
+``--stalled`` of them hang for ``--stall-delay`` seconds and then fail, like a
+half-dead TCP connection.
+
+Reports how long the broadcaster was blocked, how quickly healthy clients got each
+message, how many times messages were serialized and how many clients were removed
+(after a failed send, or evicted).
+No server or network is needed.
+
+Usage (from the backend directory):
+    python scripts/benchmark_broadcast.py
+    python scripts/benchmark_broadcast.py --clients 1000 --broadcasts 20 --skip-sequential
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import api.encoding as encoding_module
+from api.connections import ConnectionManager
+
+USER_ID = "benchmark"
+
+
+def meal_list(meals: int = 10, nutrients: int = 60) -> dict:
+    """A ``todaysMeals`` broadcast of realistic size."""
+    return {
+        "component": "todaysMeals",
+        "version": 1,
+        "data": [
+            {
+                "id": 1718000000000 + i,
+                "time": "12:30 PM",
+                "description": f"Meal {i} with rice, vegetables and grilled chicken",
+                "calories": 650,
+                "protein": 42.5,
+                "carbs": 70.1,
+                "fat": 18.3,
+                "detailed_nutrients": {f"nutrient-{n}": n * 1.25 for n in range(nutrients)},
+                "degraded": False,
+            }
+            for i in range(meals)
+        ],
+    }
+
+
+class SimulatedSocket:
+    """Stand-in for a WebSocket with a configurable per-message send time."""
+
+    serializations = 0
+
+    def __init__(self, kind: str, delay: float, sent_at: list):
+        self.kind = kind
+        self.delay = delay
+        self.sent_at = sent_at  # Broadcast times, shared by all sockets
+        self.latencies = []  # Seconds from broadcast to receipt, per message
+        self.closed = False
+
+    async def send_json(self, message: dict) -> None:
+        SimulatedSocket.serializations += 1
+        await self.send_text(json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+
+    async def send_text(self, text: str) -> None:
+        if self.kind == "stalled":
+            await asyncio.sleep(self.delay)
+            raise ConnectionResetError("connection reset by peer")
+        await asyncio.sleep(self.delay)
+        # Messages arrive in broadcast order
+        self.latencies.append(time.monotonic() - self.sent_at[len(self.latencies)])
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+
+def make_sockets(args, sent_at: list) -> list:
+    kinds = ["slow"] * int(args.clients * args.slow)
+    kinds += ["stalled"] * int(args.clients * args.stalled)
+    kinds += ["healthy"] * (args.clients - len(kinds))
+    random.Random(42).shuffle(kinds)
+    delays = {"healthy": 0.0005, "slow": args.slow_delay, "stalled": args.stall_delay}
+    return [SimulatedSocket(kind, delays[kind], sent_at) for kind in kinds]
+
+
+async def run_sequential(args, message: dict) -> dict:
+    """The old broadcast: await every socket's send in turn, drop sockets that fail."""
+    sent_at = []
+    sockets = make_sockets(args, sent_at)
+    active = list(sockets)
+    blocked = 0.0
+    started = time.monotonic()
+    for _ in range(args.broadcasts):
+        call_started = time.monotonic()
+        sent_at.append(call_started)
+        for socket in list(active):
+            try:
+                await socket.send_json(message)
+            except Exception:
+                active.remove(socket)
+        blocked += time.monotonic() - call_started
+        await asyncio.sleep(args.interval)
+    elapsed = time.monotonic() - started
+    return summarize(sockets, blocked, elapsed, removed=len(sockets) - len(active))
+
+
+async def run_queued(args, message: dict) -> dict:
+    """The new broadcast through ConnectionManager."""
+    manager = ConnectionManager(queue_size=args.queue_size, send_timeout=args.send_timeout)
+    sent_at = []
+    sockets = make_sockets(args, sent_at)
+    for socket in sockets:
+        manager.connect(USER_ID, socket)
+
+    blocked = 0.0
+    started = time.monotonic()
+    for _ in range(args.broadcasts):
+        call_started = time.monotonic()
+        sent_at.append(call_started)
+        await manager.send_to_user(USER_ID, message)
+        blocked += time.monotonic() - call_started
+        await asyncio.sleep(args.interval)
+
+    # Let the writers drain their queues and evict the stalled clients
+    def busy() -> bool:
+        return any(
+            client.websocket.kind == "stalled"
+            or len(client.websocket.latencies) < args.broadcasts
+            for client in manager.connections(USER_ID)
+        )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline and busy():
+        await asyncio.sleep(0.01)
+    elapsed = time.monotonic() - started
+
+    removed = len(sockets) - manager.count()
+    for client in manager.connections(USER_ID):
+        manager.disconnect(client)
+    return summarize(sockets, blocked, elapsed, removed)
+
+
+def summarize(sockets: list, blocked: float, elapsed: float, removed: int) -> dict:
+    healthy = sorted(
+        latency for s in sockets if s.kind == "healthy" for latency in s.latencies
+    )
+    return {
+        "blocked": blocked,
+        "elapsed": elapsed,
+        "p50": statistics.median(healthy) if healthy else None,
+        "p99": healthy[int(len(healthy) * 0.99) - 1] if healthy else None,
+        "max": healthy[-1] if healthy else None,
+        "removed": removed,
+    }
+
+
+def count_serializations(func):
+    def counted(message):
+        SimulatedSocket.serializations += 1
+        return func(message)
+    return counted
+
+
+def report(name: str, result: dict, serializations: int) -> None:
+    print(name)
+    print(f"  broadcaster blocked: {result['blocked']:.2f}s (run took {result['elapsed']:.2f}s)")
+    print(
+        f"  healthy client latency: p50 {result['p50'] * 1000:.1f}ms, "
+        f"p99 {result['p99'] * 1000:.1f}ms, max {result['max'] * 1000:.1f}ms"
+    )
+    print(f"  serializations: {serializations}, clients removed: {result['removed']}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1000, help="Simulated sockets")
+    parser.add_argument("--broadcasts", type=int, default=10, help="Messages to broadcast")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between broadcasts")
+    parser.add_argument("--slow", type=float, default=0.01, help="Fraction of slow clients")
+    parser.add_argument("--slow-delay", type=float, default=0.2, help="Slow send time (s)")
+    parser.add_argument("--stalled", type=float, default=0.005, help="Fraction of stalled clients")
+    parser.add_argument("--stall-delay", type=float, default=5.0, help="Stall before failing (s)")
+    parser.add_argument("--queue-size", type=int, default=256, help="Per-connection queue size")
+    parser.add_argument("--send-timeout", type=float, default=1.0, help="Send timeout (s)")
+    parser.add_argument(
+        "--skip-sequential", action="store_true", help="Only run the queued broadcast"
+    )
+    args = parser.parse_args()
+
+    message = meal_list()
+    size = len(json.dumps(message))
+    print(
+        f"{args.clients} clients ({args.slow:.1%} slow, {args.stalled:.1%} stalled), "
+        f"{args.broadcasts} broadcasts of {size} bytes"
+    )
+
+    if not args.skip_sequential:
+        SimulatedSocket.serializations = 0
+        result = await run_sequential(args, message)
+        report("sequential send_json", result, SimulatedSocket.serializations)
+
+    SimulatedSocket.serializations = 0
+    encoding_module.to_json = count_serializations(encoding_module.to_json)
+    result = await run_queued(args, message)
+    report("per-connection queues", result, SimulatedSocket.serializations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
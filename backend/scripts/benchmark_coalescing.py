@@ -0,0 +1,144 @@
+"""Benchmark coalescing of progress events per connection.
+
+Replays the progress of a meal with ``--ingredients`` ingredients (estimator and
+validator status for every ingredient and round, run concurrently with simulated LLM
+latencies, plus stage, ``ingredient_complete`` and result events) through
+``ConnectionManager`` to one simulated socket, without coalescing, with coalescing,
+and with coalescing and ``batch`` frames.
+
+Reports the frames (one socket write each) and bytes the client received, and checks
+that the client ends up with the same final status for every agent and ingredient.
+No server or network is needed.
+
+Usage (from the backend directory):
+    python scripts/benchmark_coalescing.py
+    python scripts/benchmark_coalescing.py --ingredients 15 --window 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.connections import ConnectionManager
+
+USER_ID = "benchmark"
+JOB_ID = "3f2c9a1e"
+
+
+class CountingSocket:
+    """Stand-in for a WebSocket that records what it is sent."""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.messages = []
+
+    async def send_text(self, text: str) -> None:
+        self.frames += 1
+        self.bytes += len(text.encode())
+        message = json.loads(text)
+        if message.get("type") == "batch":
+            self.messages.extend(message["events"])
+        else:
+            self.messages.append(message)
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+async def ingredient(send, rng: random.Random, name: str, args) -> None:
+    """Estimator/validator rounds of one ingredient, as the subgraph reports them."""
+    rounds = 2 if rng.random() < args.retry else 1
+    for round_num in range(rounds):
+        for agent_type in ("estimator", "validator"):
+            for status in ("running", "done"):
+                await send({
+                    "type": "agent_status",
+                    "agent_type": agent_type,
+                    "status": status,
+                    "message": f"{agent_type} {status} ({name}: 100g)",
+                    "ingredient": name,
+                    "round": round_num,
+                    "job_id": JOB_ID,
+                })
+                if status == "running":
+                    await asyncio.sleep(rng.uniform(*args.latency))
+    await send({"type": "ingredient_complete", "ingredient": name, "job_id": JOB_ID})
+
+
+async def meal(send, args) -> None:
+    """The progress events of one meal job."""
+    rng = random.Random(42)
+    await send({"type": "job_started", "job_id": JOB_ID})
+    await send({"type": "status", "status": "parsing", "message": "Parsing", "job_id": JOB_ID})
+    await send({"type": "iteration", "iteration": 1, "max": 4, "job_id": JOB_ID})
+    names = [f"ingredient-{i}" for i in range(args.ingredients)]
+    await asyncio.gather(*(ingredient(send, rng, name, args) for name in names))
+    for stage, status in enumerate(("estimating", "verifying", "finalizing"), start=2):
+        await send({"type": "iteration", "iteration": stage, "max": 4, "job_id": JOB_ID})
+        await send({"type": "status", "status": status, "message": status, "job_id": JOB_ID})
+    await send({"type": "job_complete", "job_id": JOB_ID, "meal": {"id": 1}})
+
+
+def final_states(messages: list) -> dict:
+    """Last agent status per agent and ingredient."""
+    states = {}
+    for message in messages:
+        if message.get("type") == "agent_status":
+            key = (message["agent_type"], message["ingredient"])
+            states[key] = (message["status"], message["round"])
+    return states
+
+
+async def run(args, window: float, features: frozenset) -> CountingSocket:
+    manager = ConnectionManager(coalesce_window=window)
+    socket = CountingSocket()
+    client = manager.connect(USER_ID, socket, features)
+
+    sent = []
+
+    async def send(message: dict) -> None:
+        sent.append(message)
+        await manager.send_to_user(USER_ID, message)
+
+    await meal(send, args)
+    while len(socket.messages) < 1 or socket.messages[-1].get("type") != "job_complete":
+        await asyncio.sleep(0.01)
+    manager.disconnect(client)
+    socket.sent = len(sent)
+    socket.expected = final_states(sent)
+    return socket
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ingredients", type=int, default=15, help="Ingredients in the meal")
+    parser.add_argument("--window", type=float, default=0.05, help="Coalescing window (s)")
+    parser.add_argument("--retry", type=float, default=0.3, help="Share needing a second round")
+    parser.add_argument(
+        "--latency", type=float, nargs=2, default=(0.02, 0.3), help="LLM call time range (s)"
+    )
+    args = parser.parse_args()
+
+    modes = {
+        "no coalescing": (0.0, frozenset()),
+        f"coalescing ({args.window * 1000:.0f}ms)": (args.window, frozenset()),
+        "coalescing + batch frames": (args.window, frozenset({"batch"})),
+    }
+    print(f"{'':<28}{'events':>7}{'delivered':>10}{'frames':>8}{'bytes':>8}  final state")
+    for name, (window, features) in modes.items():
+        socket = await run(args, window, features)
+        same = final_states(socket.messages) == socket.expected
+        print(
+            f"{name:<28}{socket.sent:>7}{len(socket.messages):>10}{socket.frames:>8}"
+            f"{socket.bytes:>8}  {'same' if same else 'DIFFERENT'}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
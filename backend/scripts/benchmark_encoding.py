@@ -0,0 +1,149 @@
+"""Benchmark the WebSocket wire encodings.
+
+Encodes typical server messages (meal list, meal snapshot and delta, an ``estimates``
+event, a status event, nutrient gaps) as JSON and as MessagePack with nutrient maps
+sent as float arrays, and compresses them the way permessage-deflate does (raw
+deflate, flushed at the end of each message).
+
+Reports bytes per event for each encoding, uncompressed and compressed, and the
+server CPU time of one broadcast to ``--clients`` connections: one encoding per
+broadcast plus one compression per connection (permessage-deflate compresses each
+connection's stream separately).
+No server or network is needed.
+
+Usage (from the backend directory):
+    python scripts/benchmark_encoding.py
+    python scripts/benchmark_encoding.py --clients 1000 --rounds 200
+"""
+
+import argparse
+import random
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.encoding import JSON, MSGPACK, encode
+from config.nutrition_goals import NUTRIENT_KEYS
+
+ENCODINGS = (JSON, MSGPACK)
+
+
+def meal(rng: random.Random, meal_id: int) -> dict:
+    """A stored meal; most canonical nutrients have a value."""
+    nutrients = {
+        key: round(rng.uniform(0.01, 80), 2) for key in NUTRIENT_KEYS if rng.random() < 0.85
+    }
+    return {
+        "id": meal_id,
+        "time": "12:30 PM",
+        "description": "Grilled chicken with rice, broccoli and a glass of orange juice",
+        "calories": 650,
+        "protein": 42.5,
+        "carbs": 70.1,
+        "fat": 18.3,
+        "detailed_nutrients": nutrients,
+        "degraded": False,
+    }
+
+
+def messages() -> dict:
+    """Representative messages by name."""
+    rng = random.Random(7)
+    meals = [meal(rng, 1718000000000 + i) for i in range(5)]
+    gaps = [
+        {
+            "id": key,
+            "name": key,
+            "current": round(rng.uniform(0, 50), 2),
+            "target": 90,
+            "deficit": round(rng.uniform(10, 80), 2),
+            "percentage": round(rng.uniform(5, 60), 1),
+            "unit": "mg",
+        }
+        for key in NUTRIENT_KEYS[:10]
+    ]
+    return {
+        "todaysMeals (5 meals)": {"component": "todaysMeals", "data": meals, "version": 5},
+        "meals_snapshot (5 meals)": {"type": "meals_snapshot", "seq": 5, "meals": meals},
+        "meal_added": {"type": "meal_added", "seq": 6, "meal": meals[0], "event_seq": 42},
+        "estimates": {
+            "type": "estimates",
+            "provisional": False,
+            "source": "final",
+            "macros": {"calories": 650, "protein": 42.5, "carbs": 70.1, "fat": 18.3},
+            "confidence": "high",
+            "reasoning": "Vitamin C from the juice improves iron absorption from the broccoli",
+            "full_count": 50,
+            "job_id": "3f2c9a1e",
+            "event_seq": 41,
+        },
+        "status": {
+            "type": "status",
+            "status": "verifying",
+            "message": "Combining ingredient estimates...",
+            "job_id": "3f2c9a1e",
+            "event_seq": 40,
+        },
+        "nutrientGaps": {"component": "nutrientGaps", "data": gaps, "version": 5},
+    }
+
+
+def payload(frame) -> bytes:
+    return frame if isinstance(frame, bytes) else frame.encode()
+
+
+def deflated_size(frame) -> int:
+    """Size of a frame compressed as the first message of a connection."""
+    compressor = zlib.compressobj(wbits=-15)
+    data = compressor.compress(payload(frame)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return len(data) - 4  # permessage-deflate drops the trailing 00 00 ff ff
+
+
+def timed(func, rounds: int) -> float:
+    """Mean seconds per call."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - started) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1000, help="Connections per broadcast")
+    parser.add_argument("--rounds", type=int, default=200, help="Timing repetitions")
+    args = parser.parse_args()
+
+    samples = messages()
+    print(f"{'bytes per event':<26}{'json':>7}{'+deflate':>10}{'msgpack':>9}{'+deflate':>10}")
+    for name, message in samples.items():
+        sizes = []
+        for encoding in ENCODINGS:
+            frame = encode(message, encoding)
+            sizes += [len(payload(frame)), deflated_size(frame)]
+        print(f"{name:<26}{sizes[0]:>7}{sizes[1]:>10}{sizes[2]:>9}{sizes[3]:>10}")
+
+    print(f"\nserver CPU per broadcast to {args.clients} clients (ms)")
+    print(f"{'':<26}{'encoding':<10}{'encode':>8}{'deflate':>9}{'total':>8}")
+    for name, message in samples.items():
+        for encoding in ENCODINGS:
+            encode_seconds = timed(lambda m=message, e=encoding: encode(m, e), args.rounds)
+            data = payload(encode(message, encoding))
+            compressor = zlib.compressobj(wbits=-15)
+
+            def compress(c=compressor, d=data):
+                c.compress(d)
+                c.flush(zlib.Z_SYNC_FLUSH)
+
+            deflate_seconds = timed(compress, args.rounds) * args.clients
+            total = encode_seconds + deflate_seconds
+            print(
+                f"{name if encoding == JSON else '':<26}{encoding:<10}"
+                f"{encode_seconds * 1000:>8.3f}{deflate_seconds * 1000:>9.1f}{total * 1000:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
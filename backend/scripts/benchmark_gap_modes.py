@@ -0,0 +1,110 @@
+"""Benchmark two-step vs single-call gap analysis.
+
+Runs the LLM phase of gap analysis (prioritization and meal suggestions) on the
+same meals in both modes and reports latency and token use per run.
+
+Usage (from the backend directory, with ANTHROPIC_API_KEY set):
+    python scripts/benchmark_gap_modes.py --runs 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from workflows.gap_analysis_workflow import GapAnalysisWorkflow
+
+SAMPLE_MEALS = [
+    {
+        "description": "Oatmeal with berries",
+        "detailed_nutrients": {
+            "Protein": 12,
+            "Carbohydrates": 68,
+            "Total Fats": 14,
+            "Fiber": 8,
+            "Vitamin C": 15,
+            "Iron": 2,
+        },
+    },
+    {
+        "description": "Chicken salad",
+        "detailed_nutrients": {
+            "Protein": 42,
+            "Carbohydrates": 45,
+            "Total Fats": 22,
+            "Fiber": 6,
+            "Vitamin A": 500,
+            "Calcium": 150,
+        },
+    },
+]
+
+
+async def run_mode(single_call: bool, runs: int) -> dict:
+    """Run the LLM phase ``runs`` times in one mode.
+
+    Args:
+        single_call: Whether to use the single-call mode
+        runs: Number of runs
+
+    Returns:
+        Dict with latencies, token counts and suggestion counts per run
+    """
+    workflow = GapAnalysisWorkflow(single_call=single_call)
+    gaps = workflow.compute_gaps(SAMPLE_MEALS)
+
+    latencies, input_tokens, output_tokens, suggestion_counts = [], [], [], []
+    for _ in range(runs):
+        with get_usage_metadata_callback() as usage:
+            start = time.perf_counter()
+            result = await workflow.analyze_gaps(SAMPLE_MEALS, gaps=gaps)
+            latencies.append(time.perf_counter() - start)
+
+        input_tokens.append(sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values()))
+        output_tokens.append(sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values()))
+        suggestion_counts.append(len(result.get("meal_suggestions", [])))
+
+    return {
+        "latencies": latencies,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "suggestions": suggestion_counts,
+    }
+
+
+def print_summary(name: str, stats: dict) -> None:
+    """Print one mode's summary line."""
+    print(
+        f"{name:<12} "
+        f"latency mean {statistics.mean(stats['latencies']):6.2f}s "
+        f"median {statistics.median(stats['latencies']):6.2f}s | "
+        f"tokens in {statistics.mean(stats['input_tokens']):7.0f} "
+        f"out {statistics.mean(stats['output_tokens']):6.0f} | "
+        f"suggestions {statistics.mean(stats['suggestions']):.1f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode")
+    args = parser.parse_args()
+
+    print(f"Benchmarking gap analysis LLM phase ({args.runs} runs per mode)...\n")
+    two_step = await run_mode(single_call=False, runs=args.runs)
+    single = await run_mode(single_call=True, runs=args.runs)
+
+    print_summary("two-step", two_step)
+    print_summary("single-call", single)
+
+    speedup = statistics.mean(two_step["latencies"]) / statistics.mean(single["latencies"])
+    print(f"\nSingle-call mode is {speedup:.2f}x faster on average")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,213 @@
+"""Benchmark pipelined vs sequential meal estimation.
+
+Estimates the same meals with preprocessing streamed into the ingredient loops
+(pipelined) and with the sequential graph, and reports the time to the first
+completed ingredient estimate and the total meal latency of each mode.
+
+By default the real API is used (ANTHROPIC_API_KEY must be set). With ``--fake`` a
+local endpoint simulates the Messages API, generating output at ``--tokens-per-second``
+(about four characters a token) after ``--first-token`` seconds, for streamed and
+non-streamed requests alike; no key or network is needed.
+
+Usage (from the backend directory):
+    python scripts/benchmark_pipelined_estimation.py --runs 3
+    python scripts/benchmark_pipelined_estimation.py --fake --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+MEALS = [
+    "Grilled salmon with quinoa, steamed broccoli and a lemon butter sauce",
+    "Chicken burrito bowl with rice, black beans, corn, salsa, cheese and guacamole",
+    "Oatmeal with blueberries, walnuts, honey and a glass of milk",
+]
+
+# Fake endpoint: ingredients the simulated preprocessing agent returns
+FAKE_INGREDIENTS = [
+    {"name": name, "amount": amount, "notes": "typical serving size for this dish"}
+    for name, amount in [
+        ("salmon", "150g"), ("quinoa", "185g"), ("broccoli", "90g"), ("butter", "10g"),
+        ("lemon juice", "15ml"), ("garlic", "5g"), ("olive oil", "5ml"),
+    ]
+]
+
+FAKE_REPLIES = {
+    "culinary expert": {
+        "ingredients": FAKE_INGREDIENTS,
+        "cooking_process": {
+            "method": "grilled",
+            "temperature": "200C",
+            "duration": "12 minutes",
+            "nutrient_impact": ["reduces vitamin C in the broccoli", "little change in protein"],
+        },
+        "meal_category": "main dish",
+        "reasoning": "Standard recipe proportions for one plate " * 8,
+    },
+    "nutritional expert": {
+        "ingredient_name": "x",
+        "amount": "x",
+        "estimates": {"protein": 10.0, "carbohydrates": 5.0, "total-fats": 3.0},
+        "reasoning": "Reference values scaled to the amount",
+        "confidence_level": "high",
+    },
+    "fact-checker": {"approved": True, "feedback": None, "issues_found": 0},
+    "nutritional calculation expert": {
+        "final_estimates": {"protein": 68.0, "carbohydrates": 33.0, "total-fats": 20.0},
+        "summary": "Minor vitamin losses from grilling",
+    },
+    # Free-text analysis (answered as a JSON string, which is fine for a benchmark)
+    "nutritional biochemist": "Protein - Does not change during cooking. " * 40,
+}
+
+
+class FakeMessagesHandler(BaseHTTPRequestHandler):
+    """Answers Messages API requests with canned JSON at a simulated token rate."""
+
+    first_token = 0.5
+    chars_per_second = 200.0
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.loads(raw)
+        prompt = raw.decode()
+        reply = next(
+            (reply for phrase, reply in FAKE_REPLIES.items() if phrase in prompt), {}
+        )
+        text = json.dumps(reply)
+        time.sleep(self.first_token)
+        if body.get("stream"):
+            self._stream(text, body)
+        else:
+            time.sleep(len(text) / self.chars_per_second)
+            self._send(200, "application/json", json.dumps(self._message(text, body)).encode())
+
+    def _message(self, text: str, body: dict) -> dict:
+        return {
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 100, "output_tokens": len(text) // 4},
+        }
+
+    def _stream(self, text: str, body: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        message = {**self._message("", body), "content": []}
+        self._event("message_start", {"type": "message_start", "message": message})
+        self._event("content_block_start", {
+            "type": "content_block_start",
+            "index": 0,
+            "content_block": {"type": "text", "text": ""},
+        })
+        for start in range(0, len(text), 20):
+            time.sleep(20 / self.chars_per_second)
+            self._event("content_block_delta", {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": {"type": "text_delta", "text": text[start:start + 20]},
+            })
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(text) // 4},
+        })
+        self._event("message_stop", {"type": "message_stop"})
+
+    def _event(self, name: str, data: dict) -> None:
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+        self.wfile.flush()
+
+    def _send(self, status: int, content_type: str, payload: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FirstEstimateTimer:
+    """Progress sink recording when the first ingredient estimate completes."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_estimate = None
+
+    async def send_json(self, message: dict) -> None:
+        if message.get("type") == "ingredient_complete" and self.first_estimate is None:
+            self.first_estimate = time.monotonic() - self.started
+
+
+async def run_mode(pipelined: bool, meals: list, runs: int) -> dict:
+    """Estimate every meal ``runs`` times in one mode.
+
+    Returns:
+        Dict with time-to-first-estimate and total latencies per meal estimate
+    """
+    from workflows.parallel_nutrition_workflow import ParallelNutritionWorkflow
+
+    workflow = ParallelNutritionWorkflow(pipelined=pipelined)
+    first, total = [], []
+    for _ in range(runs):
+        for meal in meals:
+            timer = FirstEstimateTimer()
+            await workflow.estimate_meal(meal, timer)
+            total.append(time.monotonic() - timer.started)
+            if timer.first_estimate is not None:
+                first.append(timer.first_estimate)
+    return {"first": first, "total": total}
+
+
+def summarize(name: str, values: list) -> str:
+    if not values:
+        return f"{name}: n/a"
+    return f"{name}: mean {statistics.mean(values):.2f}s, max {max(values):.2f}s"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Runs per meal and mode")
+    parser.add_argument("--fake", action="store_true", help="Use a simulated local endpoint")
+    parser.add_argument("--first-token", type=float, default=0.5, help="Fake latency (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Fake output rate")
+    args = parser.parse_args()
+
+    meals = MEALS
+    if args.fake:
+        FakeMessagesHandler.first_token = args.first_token
+        FakeMessagesHandler.chars_per_second = args.tokens_per_second * 4
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeMessagesHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ["ANTHROPIC_API_URL"] = f"http://127.0.0.1:{server.server_port}"
+        os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+        os.environ["APPROVAL_STATS_DB_PATH"] = ":memory:"
+        meals = MEALS[:1]
+
+    for pipelined in (False, True):
+        results = await run_mode(pipelined, meals, args.runs)
+        print(f"{'pipelined' if pipelined else 'sequential'} ({len(results['total'])} meals)")
+        print(f"  {summarize('time to first estimate', results['first'])}")
+        print(f"  {summarize('total latency', results['total'])}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
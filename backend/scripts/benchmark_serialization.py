@@ -0,0 +1,133 @@
+"""Benchmark JSON serialization CPU per meal.
+
+Replays the serialization work one meal with ``--ingredients`` ingredients causes:
+indented JSON of estimates for estimator, validator and interaction prompts and for
+every LLM log entry, progress events written to and read back from the SQLite bus,
+one WebSocket frame per event, and the stored meal and the meal list broadcast
+afterwards.
+
+Compares the previous calls (the standard library, as each call site used it) with
+``utils.serialization`` backed by orjson, and with its standard library fallback.
+No server or network is needed.
+
+Usage (from the backend directory):
+    python scripts/benchmark_serialization.py
+    python scripts/benchmark_serialization.py --ingredients 15 --meals 200
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils.serialization as serialization
+from config.nutrition_goals import NUTRIENT_KEYS
+
+
+def estimates(rng: random.Random) -> dict:
+    """Nutrient estimates of one ingredient."""
+    return {key: round(rng.uniform(0.01, 80), 3) for key in NUTRIENT_KEYS if rng.random() < 0.8}
+
+
+def meal_workload(ingredients: int) -> dict:
+    """Values serialized for one meal, by kind of call."""
+    rng = random.Random(3)
+    results = [
+        {"estimates": estimates(rng), "confidence": 0.8, "reasoning": "USDA reference values"}
+        for _ in range(ingredients)
+    ]
+    total = estimates(rng)
+    meal = {
+        "id": 1718000000000,
+        "time": "12:30 PM",
+        "description": "Grilled chicken with rice, broccoli and a glass of orange juice",
+        "calories": 650,
+        "protein": 42.5,
+        "carbs": 70.1,
+        "fat": 18.3,
+        "detailed_nutrients": total,
+        "degraded": False,
+    }
+    events = []
+    for index in range(ingredients):
+        for agent_type in ("estimator", "validator"):
+            for status in ("running", "done"):
+                events.append({
+                    "type": "agent_status",
+                    "agent_type": agent_type,
+                    "status": status,
+                    "message": f"{agent_type} {status} (ingredient {index}: 100g)",
+                    "ingredient": f"ingredient {index}",
+                    "round": 0,
+                    "job_id": "3f2c9a1e",
+                })
+        events.append({"type": "ingredient_complete", "ingredient": f"ingredient {index}"})
+    events.append({"type": "job_complete", "job_id": "3f2c9a1e", "meal": meal})
+
+    # Estimator log; validator prompt and log; interaction prompt and log
+    pretty = [result for result in results for _ in range(3)] + [total, total]
+    return {
+        "pretty": pretty,
+        "bus": events,
+        "frames": events + [{"component": "todaysMeals", "data": [meal] * 5, "version": 5}],
+        "store": [meal],
+    }
+
+
+def run_previous(work: dict) -> None:
+    for value in work["pretty"]:
+        json.dumps(value, indent=2)
+    for value in work["bus"] + work["store"]:
+        json.loads(json.dumps(value))
+    for value in work["frames"]:
+        json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def run_current(work: dict) -> None:
+    to_json, from_json = serialization.to_json, serialization.from_json
+    for value in work["pretty"]:
+        to_json(value, pretty=True)
+    for value in work["bus"] + work["store"]:
+        from_json(to_json(value))
+    for value in work["frames"]:
+        to_json(value)
+
+
+def timed(func, work: dict, meals: int) -> float:
+    """Mean milliseconds per meal."""
+    started = time.perf_counter()
+    for _ in range(meals):
+        func(work)
+    return (time.perf_counter() - started) / meals * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ingredients", type=int, default=15, help="Ingredients per meal")
+    parser.add_argument("--meals", type=int, default=200, help="Meals to replay")
+    args = parser.parse_args()
+
+    work = meal_workload(args.ingredients)
+    calls = len(work["pretty"]) + 2 * len(work["bus"] + work["store"]) + len(work["frames"])
+    print(f"{args.ingredients} ingredients: {calls} serialization calls per meal")
+
+    baseline = timed(run_previous, work, args.meals)
+    print(f"  previous (json):              {baseline:.2f}ms per meal")
+    if serialization.orjson is not None:
+        current = timed(run_current, work, args.meals)
+        print(f"  utils.serialization (orjson): {current:.2f}ms per meal "
+              f"({baseline / current:.1f}x faster)")
+    else:
+        print("  orjson is not installed")
+    orjson, serialization.orjson = serialization.orjson, None
+    fallback = timed(run_current, work, args.meals)
+    serialization.orjson = orjson
+    print(f"  utils.serialization (json):   {fallback:.2f}ms per meal")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Report adaptive validation: calls saved against approval-rate drift.
+
+Reads the approval statistics database (APPROVAL_STATS_DB_PATH) and prints, per
+ingredient class and estimator confidence, the current rule, the approval rate over
+the window, the recent rate against the earlier baseline, and the LLM calls the
+rules saved. A skipped class whose recent (audit) rate drifts down is about to lose
+its rule; a negative drift on a single-round class is worth a look at its prompts.
+
+Usage (from the backend directory, with ANTHROPIC_API_KEY set):
+    python scripts/report_approval_stats.py
+    python scripts/report_approval_stats.py --json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from workflows.approval_stats import get_approval_stats
+
+
+def format_rate(rate) -> str:
+    """Format a rate as a percentage, or "-" without samples."""
+    return "-" if rate is None else f"{rate * 100:.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = get_approval_stats().report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(
+        f"Adaptive validation {'enabled' if report['enabled'] else 'disabled'}; "
+        f"window {report['window_days']} days, drift over the last {report['drift_days']}"
+    )
+    header = (
+        f"{'class':<12} {'confidence':<10} {'rule':<7} {'n':>6} {'rate':>7} "
+        f"{'baseline':>9} {'recent':>7} {'drift':>7} {'audits':>7} {'saved':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in report["classes"]:
+        drift = "-" if row["drift"] is None else f"{row['drift'] * 100:+.1f}"
+        print(
+            f"{row['ingredient_class']:<12} {row['confidence']:<10} {row['rule']:<7} "
+            f"{row['validations']:>6} {format_rate(row['approval_rate']):>7} "
+            f"{format_rate(row['baseline_rate']):>9} {format_rate(row['recent_rate']):>7} "
+            f"{drift:>7} {row['audits']:>7} {row['calls_saved']:>6}"
+        )
+    print("-" * len(header))
+    print(
+        f"{report['validations']} first-round validations, "
+        f"{report['calls_saved']} LLM calls saved"
+    )
+
+
+if __name__ == "__main__":
+    main()
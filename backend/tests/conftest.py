@@ -0,0 +1,118 @@
+"""Shared fixtures: a fake Anthropic endpoint that streams slowly."""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+
+# Settings need a key before the app modules are imported
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class SlowStreamHandler(BaseHTTPRequestHandler):
+    """Answers Messages API requests with a stream, one text chunk per ``delay``.
+
+    Requests that do not ask for a stream get the whole text as one message.
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        if not body.get("stream"):
+            self._send_message(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        events = [_sse("message_start", {
+            "type": "message_start",
+            "message": {
+                "id": "msg_slow",
+                "type": "message",
+                "role": "assistant",
+                "model": body.get("model", "fake"),
+                "content": [],
+                "stop_reason": None,
+                "stop_sequence": None,
+                "usage": {"input_tokens": 10, "output_tokens": 1},
+            },
+        }), _sse("content_block_start", {
+            "type": "content_block_start",
+            "index": 0,
+            "content_block": {"type": "text", "text": ""},
+        })]
+        for text in self.server.chunks:
+            events.append(_sse("content_block_delta", {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": {"type": "text_delta", "text": text},
+            }))
+        events += [
+            _sse("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            _sse("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": len(self.server.chunks)},
+            }),
+            _sse("message_stop", {"type": "message_stop"}),
+        ]
+
+        try:
+            for event in events:
+                self.wfile.write(event)
+                self.wfile.flush()
+                if b"content_block_delta" in event:
+                    time.sleep(self.server.delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up on the stream
+
+    def _send_message(self, body: dict) -> None:
+        payload = json.dumps({
+            "id": "msg_whole",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": "".join(self.server.chunks)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": len(self.server.chunks)},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def slow_anthropic(monkeypatch) -> Iterator[ThreadingHTTPServer]:
+    """Fake ``POST /v1/messages`` endpoint that streams its reply slowly.
+
+    Set ``chunks`` (the text deltas) and ``delay`` (seconds after each streamed
+    one) on the server; ``requests`` holds the request bodies it received. Chat
+    models created inside the test point at it.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowStreamHandler)
+    server.block_on_close = False
+    server.requests = []
+    server.chunks = ["word "] * 15
+    server.delay = 0.3
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("ANTHROPIC_API_URL", f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
@@ -0,0 +1,66 @@
+"""Coalescing of progress events per connection."""
+
+import asyncio
+import json
+
+import pytest
+
+from api.connections import ConnectionManager
+
+USER_ID = "user"
+JOB_ID = "job"
+
+
+class RecordingSocket:
+    """Stand-in for a WebSocket that records the messages it is sent."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send_text(self, text: str) -> None:
+        self.messages.append(json.loads(text))
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+def agent_status(status: str) -> dict:
+    return {
+        "type": "agent_status",
+        "agent_type": "estimator",
+        "status": status,
+        "ingredient": "egg",
+        "round": 0,
+        "job_id": JOB_ID,
+    }
+
+
+@pytest.fixture
+async def connection():
+    """A connection that holds progress events far longer than any test waits."""
+    manager = ConnectionManager(coalesce_window=10.0)
+    socket = RecordingSocket()
+    client = manager.connect(USER_ID, socket)
+    yield manager, socket
+    manager.disconnect(client)
+
+
+async def test_progress_events_are_held(connection):
+    manager, socket = connection
+    await manager.send_to_user(USER_ID, agent_status("running"))
+    await asyncio.sleep(0.05)
+    assert socket.messages == []
+
+
+@pytest.mark.parametrize("message", [
+    agent_status("done"),
+    agent_status("completed"),
+    {"type": "ingredient_complete", "ingredient": "egg", "job_id": JOB_ID},
+], ids=["done", "completed", "ingredient_complete"])
+async def test_terminal_events_are_sent_without_waiting(connection, message):
+    manager, socket = connection
+    await manager.send_to_user(USER_ID, agent_status("running"))
+    await manager.send_to_user(USER_ID, message)
+    await asyncio.sleep(0.05)
+    # The held progress event goes first, so the terminal one is never overtaken
+    assert socket.messages == [agent_status("running"), message]
@@ -0,0 +1,33 @@
+"""Deadlines on streamed calls through the LLM gateway."""
+
+import time
+
+import pytest
+from langchain_core.output_parsers import StrOutputParser
+
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import create_chat_model, llm_deadline
+
+
+async def test_stream_stops_at_the_deadline(slow_anthropic):
+    # 15 chunks 0.3s apart: every read is fast, the whole stream is not
+    model = create_chat_model("test_stream_deadline", "claude-test", 0.0, 100)
+    received = []
+    started = time.monotonic()
+    with pytest.raises(LLMUnavailable, match="deadline exceeded"), llm_deadline(1.0):
+        async for chunk in (model | StrOutputParser()).astream("hello"):
+            received.append(chunk)
+
+    assert time.monotonic() - started < 2.0
+    assert received
+    assert len(received) < len(slow_anthropic.chunks)
+
+
+async def test_stream_within_the_deadline_completes(slow_anthropic):
+    slow_anthropic.chunks = ["one ", "two ", "three"]
+    slow_anthropic.delay = 0.01
+    model = create_chat_model("test_stream_deadline", "claude-test", 0.0, 100)
+    with llm_deadline(5.0):
+        text = "".join([chunk async for chunk in (model | StrOutputParser()).astream("hello")])
+
+    assert text == "one two three"
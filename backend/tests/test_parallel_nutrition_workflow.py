@@ -0,0 +1,22 @@
+"""Fallbacks of the parallel nutrition workflow's interaction analysis."""
+
+from workflows.parallel_nutrition_workflow import ParallelNutritionWorkflow
+
+ESTIMATES_SUM = {"protein": 12.0, "carbohydrates": 40.0, "total-fats": 5.0}
+
+
+async def test_failed_interaction_analysis_is_degraded(slow_anthropic):
+    # The analysis succeeds, but the final estimates are not valid JSON
+    slow_anthropic.chunks = ["Nothing changes when cooked."]
+    state = {
+        "description": "porridge",
+        "ingredients": [{"name": "rolled oats", "amount": "40g", "notes": None}],
+        "cooking_process": {"method": "boiled", "nutrient_impact": []},
+        "estimates_sum": ESTIMATES_SUM,
+    }
+
+    state = await ParallelNutritionWorkflow()._analyze_interactions(state)
+
+    assert state["final_estimates"] == ESTIMATES_SUM
+    # Degraded results are never cached or reported as a finished estimate
+    assert state["degraded_stages"] == ["interaction_analysis"]
@@ -0,0 +1,51 @@
+"""Streamed preprocessing under the preprocessing stage deadline."""
+
+import time
+
+import pytest
+
+from agents.preprocessing_agent import PreprocessingAgent
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import llm_deadline
+from workflows.parallel_nutrition_workflow import STAGE_BUDGET_SHARES, stage_deadline
+
+MEAL_BUDGET = 5.0
+
+RESPONSE = [
+    '{"ingredients": [',
+    '{"name": "rolled oats", "amount": "40g", "notes": null}',
+    ', {"name": "milk", "amount": "200ml", "notes": null}',
+    ', {"name": "blueberries", "amount": "75g", "notes": null}',
+    '], "cooking_process": {"method": "boiled", "nutrient_impact": []},',
+    ' "meal_category": "breakfast", "reasoning": "fake"}',
+]
+
+
+async def test_slow_stream_stops_at_the_stage_deadline(slow_anthropic):
+    # Each chunk arrives well within the client timeout; the whole stream does not
+    slow_anthropic.chunks = RESPONSE
+    slow_anthropic.delay = 0.6
+    streamed = []
+    started = time.monotonic()
+    with pytest.raises(LLMUnavailable), llm_deadline(MEAL_BUDGET), stage_deadline("preprocessing"):
+        await PreprocessingAgent().preprocess_streaming("porridge with berries", streamed.append)
+
+    budget = MEAL_BUDGET * STAGE_BUDGET_SHARES["preprocessing"]
+    assert time.monotonic() - started < budget + 0.5
+    # Ingredients complete before the deadline were still handed on
+    assert [ingredient["name"] for ingredient in streamed] == ["rolled oats"]
+
+
+async def test_stream_within_the_stage_deadline_is_parsed(slow_anthropic):
+    slow_anthropic.chunks = RESPONSE
+    slow_anthropic.delay = 0.01
+    streamed = []
+    with llm_deadline(MEAL_BUDGET), stage_deadline("preprocessing"):
+        result = await PreprocessingAgent().preprocess_streaming(
+            "porridge with berries", streamed.append
+        )
+
+    assert [ingredient["name"] for ingredient in result["ingredients"]] == [
+        "rolled oats", "milk", "blueberries"
+    ]
+    assert streamed == result["ingredients"]
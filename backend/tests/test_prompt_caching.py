@@ -0,0 +1,152 @@
+"""Prompt-caching request shape, checked against a local fake Anthropic endpoint.
+
+Each agent is called twice, from two instances, with different inputs. The system
+prompt must be sent as a single text block marked with
+``cache_control: {"type": "ephemeral"}``, the system prefix must be byte-identical
+across calls and instances, and the per-call values must only appear in the user
+message. No API key or network is needed.
+"""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List
+
+import pytest
+
+# Settings need a key before the agents are imported
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+from agents.ingredient_estimator import IngredientEstimator
+from agents.ingredient_validator import IngredientValidator
+from agents.preprocessing_agent import PreprocessingAgent
+from config.settings import settings
+
+# Canned replies, chosen by a phrase from each agent's system prompt
+CANNED_REPLIES = {
+    "nutritional expert": {
+        "ingredient_name": "test",
+        "amount": "1 unit",
+        "estimates": {"protein": 1.0},
+        "reasoning": "fake",
+        "confidence_level": "high",
+    },
+    "fact-checker": {"approved": True, "feedback": None, "issues_found": 0},
+    "culinary expert": {
+        "ingredients": [{"name": "egg", "amount": "50g", "notes": None}],
+        "cooking_process": {"method": "boiled", "nutrient_impact": []},
+        "meal_category": "breakfast",
+        "reasoning": "fake",
+    },
+}
+
+# Two calls per agent, each from a new instance, and the per-call values they send
+AGENT_CALLS = {
+    "IngredientEstimator": (
+        lambda: [
+            IngredientEstimator().estimate_sync("rolled oats", "40g", "dry"),
+            IngredientEstimator().estimate_sync("blueberries", "75g", "fresh"),
+        ],
+        ["rolled oats", "blueberries", "75g"],
+    ),
+    "IngredientValidator": (
+        lambda: [
+            IngredientValidator().validate_sync("rolled oats", "40g", {"protein": 5.0}),
+            IngredientValidator().validate_sync("blueberries", "75g", {"vitamin-c": 7.3}),
+        ],
+        ["rolled oats", "blueberries", "7.3"],
+    ),
+    "PreprocessingAgent": (
+        lambda: [
+            PreprocessingAgent()({"description": "porridge with berries"}),
+            PreprocessingAgent()({"description": "grilled salmon salad"}),
+        ],
+        ["porridge with berries", "grilled salmon salad"],
+    ),
+}
+
+
+class FakeAnthropicHandler(BaseHTTPRequestHandler):
+    """Records Messages API requests and answers with canned JSON."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+
+        system = body.get("system", "")
+        if isinstance(system, list):
+            system = "".join(block.get("text", "") for block in system if isinstance(block, dict))
+        reply = next((reply for phrase, reply in CANNED_REPLIES.items() if phrase in system), {})
+
+        payload = json.dumps({
+            "id": f"msg_{len(self.server.requests)}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": json.dumps(reply)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": 10},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_anthropic(monkeypatch) -> Iterator[List[Dict]]:
+    """Fake ``POST /v1/messages`` endpoint the agents' clients point at.
+
+    Yields:
+        The request bodies it receives, in order
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAnthropicHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("ANTHROPIC_API_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(settings, "prompt_caching", True)
+    yield server.requests
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture(params=list(AGENT_CALLS))
+def agent_requests(request, fake_anthropic):
+    """Requests one agent sent for its two calls, and the per-call values."""
+    calls, dynamic_values = AGENT_CALLS[request.param]
+    calls()
+    assert len(fake_anthropic) == 2
+    return fake_anthropic, dynamic_values
+
+
+def test_system_prompt_is_one_cached_text_block(agent_requests):
+    requests, _ = agent_requests
+    for body in requests:
+        system = body["system"]
+        assert isinstance(system, list)
+        assert len(system) == 1
+        assert system[0]["type"] == "text"
+        assert system[0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_system_prefix_is_byte_identical(agent_requests):
+    requests, _ = agent_requests
+    first, second = (body["system"][0]["text"].encode("utf-8") for body in requests)
+    assert first == second
+
+
+def test_per_call_values_only_in_user_message(agent_requests):
+    requests, dynamic_values = agent_requests
+    user_text = json.dumps([body["messages"] for body in requests])
+    for value in dynamic_values:
+        assert value in user_text
+        for body in requests:
+            assert value not in body["system"][0]["text"]
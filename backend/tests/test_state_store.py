@@ -0,0 +1,55 @@
+"""SQLite state store shared by worker processes."""
+
+import asyncio
+import sqlite3
+
+from api.state_store import SQLiteStateStore
+
+
+async def test_write_waiting_on_a_lock_does_not_block_the_loop(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / "state.db"))
+    # Another worker process holding the write lock
+    other = sqlite3.connect(str(tmp_path / "state.db"), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    add = asyncio.create_task(store.add_meal("user", {"id": 1, "description": "oats"}))
+    ticks = 0
+    for _ in range(10):
+        await asyncio.sleep(0.02)
+        ticks += 1
+    assert ticks == 10
+    assert not add.done()
+
+    other.execute("COMMIT")
+    other.close()
+    assert await add == 1
+    assert await store.get_meals("user") == [{"id": 1, "description": "oats"}]
+    assert await store.get_version("user") == 1
+    store.close()
+
+
+async def test_connections_are_counted_across_workers(tmp_path):
+    first = SQLiteStateStore(str(tmp_path / "state.db"))
+    second = SQLiteStateStore(str(tmp_path / "state.db"))
+
+    # The user drops from the first worker and reconnects to the second
+    await first.connection_opened("user")
+    await second.connection_opened("user")
+    await first.connection_closed("user")
+    assert await first.connection_count("user") == 1
+
+    await second.connection_closed("user")
+    assert await first.connection_count("user") == 0
+    first.close()
+    second.close()
+
+
+async def test_closing_forgets_the_workers_connections(tmp_path):
+    first = SQLiteStateStore(str(tmp_path / "state.db"))
+    second = SQLiteStateStore(str(tmp_path / "state.db"))
+    await first.connection_opened("user")
+    await second.connection_opened("user")
+
+    first.close()
+    assert await second.connection_count("user") == 1
+    second.close()
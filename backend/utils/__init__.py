@@ -1,5 +1,6 @@
 """Utility modules."""
 
 from .logger import LLMLogger, get_logger
+from .metrics import Metrics, get_metrics
 
-__all__ = ["LLMLogger", "get_logger"]
+__all__ = ["LLMLogger", "Metrics", "get_logger", "get_metrics"]
@@ -0,0 +1,132 @@
+"""Cooperative cancellation for abandoned LLM work.
+
+A ``CancellationToken`` is created per unit of work (a meal job, a gap analysis) and
+threaded through the workflows. Agents check it before every LLM call, so abandoned
+work stops issuing requests right away; in-flight async calls wrapped with
+``cancellable`` are aborted as soon as the token is cancelled.
+"""
+
+import asyncio
+import threading
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+from utils.metrics import get_metrics
+
+T = TypeVar("T")
+
+
+class OperationCancelled(Exception):
+    """Raised when work is abandoned through its cancellation token."""
+
+
+class CancellationToken:
+    """Thread-safe cancellation flag shared by a unit of work.
+
+    Estimators and validators run in worker threads, so the flag is a
+    ``threading.Event`` rather than an asyncio primitive.
+    """
+
+    def __init__(self):
+        """Create an uncancelled token."""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the work was cancelled."""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Cancel the work and abort any wrapped in-flight calls."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        get_metrics().increment("cancellation.operations_cancelled")
+        for callback in callbacks:
+            callback()
+
+    def check(self, llm_calls: int = 1) -> None:
+        """Raise if cancelled, counting the LLM calls that will not be made.
+
+        Args:
+            llm_calls: Number of LLM calls the caller was about to make
+
+        Raises:
+            OperationCancelled: If the token was cancelled
+        """
+        if self._event.is_set():
+            get_metrics().increment("cancellation.llm_calls_saved", llm_calls)
+            raise OperationCancelled(self.reason)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds, waking early on cancellation.
+
+        Returns:
+            True if the token was cancelled
+        """
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Register a callback run (from the cancelling thread) on cancellation."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """Unregister a callback added with ``add_callback``."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+async def cancellable(
+    awaitable: Awaitable[T],
+    token: Optional[CancellationToken],
+    llm_calls: int = 1,
+) -> T:
+    """Await an LLM call, aborting it if the token is cancelled meanwhile.
+
+    Args:
+        awaitable: The call to run (e.g. ``chain.ainvoke(...)``)
+        token: Cancellation token, or None for plain awaiting
+        llm_calls: Number of LLM calls the awaitable makes
+
+    Returns:
+        The awaitable's result
+
+    Raises:
+        OperationCancelled: If the token is cancelled before or during the call
+    """
+    if token is None:
+        return await awaitable
+
+    try:
+        token.check(llm_calls)
+    except OperationCancelled:
+        # Close the never-started coroutine so it does not warn
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+
+    task = asyncio.ensure_future(awaitable)
+    loop = asyncio.get_running_loop()
+
+    def abort() -> None:
+        loop.call_soon_threadsafe(task.cancel)
+
+    token.add_callback(abort)
+    if token.cancelled:
+        task.cancel()
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if token.cancelled:
+            get_metrics().increment("cancellation.llm_calls_aborted", llm_calls)
+            raise OperationCancelled(token.reason) from None
+        raise
+    finally:
+        token.remove_callback(abort)
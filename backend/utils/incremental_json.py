@@ -0,0 +1,198 @@
+"""Incremental parsing of streamed JSON.
+
+LLM output arrives in arbitrary text chunks. ``JsonArrayStream`` scans the chunks as
+they come and returns each element of one top-level array (e.g. ``"ingredients"``)
+as soon as the element is complete, long before the whole document is, and
+``JsonStringStream`` returns the text of one top-level string field (e.g.
+``"reasoning"``) as it is generated. Both scans are linear in the total text: every
+character is looked at once.
+"""
+
+import json
+from typing import Any, List, Optional
+
+from utils.serialization import from_json
+
+
+class JsonArrayStream:
+    """Yields the completed object (or array) elements of a top-level array field.
+
+    Text before the root object, such as a Markdown code fence, is ignored. Only the
+    array directly under the root object is followed; a nested field with the same
+    name is not.
+    """
+
+    def __init__(self, key: str):
+        """Start scanning for an array field.
+
+        Args:
+            key: Name of the top-level field holding the array
+        """
+        self.key = key
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Scan the next chunk of text.
+
+        Args:
+            chunk: Text continuing what was fed so far
+
+        Returns:
+            Elements of the array completed within this chunk, in order
+
+        Raises:
+            json.JSONDecodeError: If a completed element is not valid JSON
+        """
+        self.text += chunk
+        items = []
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:self._pos]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char == ":" and len(self._stack) == 1:
+                self._current_key = self._last_string
+            elif char in "{[":
+                depth = len(self._stack)
+                if depth == self._array_depth and self._item_start is None:
+                    self._item_start = self._pos
+                elif (
+                    char == "[" and depth == 1 and self._array_depth is None
+                    and not self.done and self._current_key == self.key
+                ):
+                    self._array_depth = depth + 1
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == self._array_depth and self._item_start is not None:
+                    items.append(from_json(text[self._item_start:self._pos + 1]))
+                    self._item_start = None
+                elif self._array_depth is not None and depth == self._array_depth - 1:
+                    self._array_depth = None
+                    self.done = True
+            self._pos += 1
+        return items
+
+
+class JsonStringStream:
+    """Yields the decoded text of a top-level string field as it is generated.
+
+    Used to show a field such as ``"reasoning"`` while the rest of a JSON response is
+    still being produced. Text is returned up to the last complete escape sequence (a
+    surrogate pair counts as one), so the returned pieces add up to the decoded string.
+    """
+
+    def __init__(self, key: str):
+        """Start scanning for a string field.
+
+        Args:
+            key: Name of the top-level field holding the string
+        """
+        self.key = key
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._hex_left = 0
+        self._escape_start: Optional[int] = None
+        self._high_surrogate: Optional[int] = None
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._emitted = 0
+
+    def feed(self, chunk: str) -> str:
+        """Scan the next chunk of text.
+
+        Args:
+            chunk: Text continuing what was fed so far
+
+        Returns:
+            Decoded text of the field completed within this chunk (may be empty)
+        """
+        self.text += chunk
+        text = self.text
+        while self._pos < len(text) and not self.done:
+            char = text[self._pos]
+            if self._in_string:
+                self._scan_string_char(char)
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+                if self._depth == 1 and self._current_key == self.key:
+                    self._value_start = self._pos + 1
+            elif char == ":" and self._depth == 1:
+                self._current_key = self._last_string
+            elif char == "," and self._depth == 1:
+                self._current_key = None
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]" and self._depth:
+                self._depth -= 1
+            if not self.done:
+                self._pos += 1
+
+        if self._value_start is None:
+            return ""
+        # Hold back an escape sequence (or half a surrogate pair) still being generated
+        end = self._pos
+        for held in (self._escape_start, self._high_surrogate):
+            if held is not None and not self.done:
+                end = min(end, held)
+        start = self._value_start + self._emitted
+        if end <= start:
+            return ""
+        self._emitted = end - self._value_start
+        # The standard library also accepts lone surrogate escapes, which LLM output can have
+        return json.loads(f'"{text[start:end]}"')
+
+    def _scan_string_char(self, char: str) -> None:
+        if self._hex_left:
+            self._hex_left -= 1
+            if not self._hex_left:
+                code = self.text[self._pos - 3:self._pos + 1].lower()
+                is_high = "d800" <= code <= "dbff"
+                self._high_surrogate = self._escape_start if is_high else None
+                self._escape_start = None
+        elif self._escape:
+            self._escape = False
+            if char == "u":
+                self._hex_left = 4
+            else:
+                self._escape_start = None
+                self._high_surrogate = None
+        elif char == "\\":
+            self._escape = True
+            self._escape_start = self._pos
+        elif char == '"':
+            self._in_string = False
+            self._high_surrogate = None
+            if self._value_start is not None:
+                self.done = True
+            else:
+                self._last_string = self.text[self._string_start + 1:self._pos]
+        else:
+            self._high_surrogate = None
@@ -0,0 +1,102 @@
+"""Process-wide metrics: counters, gauges and latency summaries."""
+
+import threading
+from collections import deque
+from typing import Deque, Dict
+
+
+class Metrics:
+    """Thread-safe in-process metrics registry.
+
+    Observations keep a bounded window of recent values per name, which is enough
+    for the percentile summaries exposed by the ``/metrics`` endpoint.
+    """
+
+    def __init__(self, window: int = 1000):
+        """Initialize an empty registry.
+
+        Args:
+            window: Number of recent observations kept per summary
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._observations: Dict[str, Deque[float]] = {}
+        self._observation_counts: Dict[str, int] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add ``value`` to a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one observation (e.g. a duration in seconds)."""
+        with self._lock:
+            if name not in self._observations:
+                self._observations[name] = deque(maxlen=self.window)
+            self._observations[name].append(value)
+            self._observation_counts[name] = self._observation_counts.get(name, 0) + 1
+
+    def counter(self, name: str) -> float:
+        """Get a counter's current value."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def observation_count(self, name: str) -> int:
+        """Get the total number of observations recorded under a name."""
+        with self._lock:
+            return self._observation_counts.get(name, 0)
+
+    def percentile(self, name: str, pct: float) -> float:
+        """Get a percentile (0-100) of the recent observations, 0.0 if there are none."""
+        with self._lock:
+            values = sorted(self._observations.get(name, ()))
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Get all metrics as plain dicts.
+
+        Returns:
+            Dict with counters, gauges and per-name observation summaries
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            observations = {name: sorted(values) for name, values in self._observations.items()}
+            counts = dict(self._observation_counts)
+
+        summaries = {}
+        for name, values in observations.items():
+            if not values:
+                continue
+            summaries[name] = {
+                "count": counts.get(name, len(values)),
+                "mean": round(sum(values) / len(values), 4),
+                "p50": round(values[int(0.50 * (len(values) - 1))], 4),
+                "p95": round(values[int(0.95 * (len(values) - 1))], 4),
+                "p99": round(values[int(0.99 * (len(values) - 1))], 4),
+                "max": round(values[-1], 4),
+            }
+
+        return {"counters": counters, "gauges": gauges, "summaries": summaries}
+
+
+# Global metrics instance
+_metrics = None
+
+
+def get_metrics() -> Metrics:
+    """Get the global metrics instance."""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
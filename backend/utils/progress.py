@@ -0,0 +1,142 @@
+"""Thread-safe channel for progress events from workflow threads to a WebSocket.
+
+Ingredient estimators and validators run in worker threads, but progress has to be
+sent from the event loop. ``ProgressChannel.emit`` can be called from any thread;
+events are sent in the order they were emitted, without blocking the emitter.
+
+Long LLM outputs are streamed to the client as ``reasoning_delta`` events: a
+``TokenBatcher`` collects the streamed text and emits it at most once per interval
+instead of one frame per token.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.incremental_json import JsonStringStream
+from utils.metrics import get_metrics
+
+
+class ProgressChannel:
+    """Forwards events emitted from any thread to an async ``send_json`` target."""
+
+    def __init__(self, websocket):
+        """Bind the channel to the running event loop.
+
+        Args:
+            websocket: Object with an async ``send_json`` (WebSocket or JobProgress)
+        """
+        self.websocket = websocket
+        self._loop = asyncio.get_running_loop()
+        self._last: Optional[asyncio.Task] = None
+
+    def emit(self, message: dict) -> None:
+        """Queue an event for sending (callable from any thread)."""
+        self._loop.call_soon_threadsafe(self._enqueue, message)
+
+    def _enqueue(self, message: dict) -> None:
+        # Each send waits for the previous one, which keeps events in order
+        self._last = self._loop.create_task(self._send(message, self._last))
+
+    async def _send(self, message: dict, previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await self.websocket.send_json(message)
+        except Exception as e:
+            print(f"Progress event not sent: {e}")
+
+    async def flush(self) -> None:
+        """Wait until every event emitted so far has been sent."""
+        # Events emitted from other threads are queued with call_soon_threadsafe
+        await asyncio.sleep(0)
+        if self._last is not None:
+            await asyncio.wait([self._last])
+
+
+class TokenBatcher:
+    """Batches streamed LLM text into ``reasoning_delta`` events.
+
+    The first text is emitted at once; after that, text is emitted when at least
+    ``interval`` seconds have passed since the previous event, and the rest on
+    ``close``, which also marks the stream as done.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[dict], None],
+        stream: str,
+        interval: float = 0.05,
+        field: Optional[str] = None,
+    ):
+        """Start a text stream.
+
+        Args:
+            emit: Callable sending an event (e.g. ``ProgressChannel.emit``)
+            stream: Name of the stream, sent with every event
+            interval: Minimum seconds between events
+            field: For JSON output, the top-level string field to stream (the rest
+                of the response is not sent)
+        """
+        self.emit = emit
+        self.stream = stream
+        self.interval = interval
+        self._field = JsonStringStream(field) if field else None
+        self._buffer: List[str] = []
+        self._seq = 0
+        self._started = time.monotonic()
+        self._sent_at: Optional[float] = None
+        self._closed = False
+
+    def add(self, chunk: str) -> None:
+        """Add the next chunk of streamed output."""
+        text = self._field.feed(chunk) if self._field else chunk
+        if not text or self._closed:
+            return
+        self._buffer.append(text)
+        now = time.monotonic()
+        if self._sent_at is None:
+            get_metrics().observe(
+                f"reasoning_stream.first_chunk_seconds.{self.stream}", now - self._started
+            )
+        if self._sent_at is None or now - self._sent_at >= self.interval:
+            self._send(done=False)
+
+    def close(self) -> None:
+        """Send the remaining text and mark the stream as done."""
+        if not self._closed:
+            self._send(done=True)
+            self._closed = True
+
+    def _send(self, done: bool) -> None:
+        self.emit({
+            "type": "reasoning_delta",
+            "stream": self.stream,
+            "seq": self._seq,
+            "text": "".join(self._buffer),
+            "done": done,
+        })
+        self._seq += 1
+        self._buffer = []
+        self._sent_at = time.monotonic()
+
+
+async def stream_text(chain: Any, inputs: Dict[str, Any], batcher: TokenBatcher) -> str:
+    """Run a chain producing text with streaming, passing every chunk to a batcher.
+
+    Args:
+        chain: Runnable whose stream yields strings (e.g. ending in StrOutputParser)
+        inputs: Chain inputs
+        batcher: Batcher receiving the chunks; closed when the stream ends or fails
+
+    Returns:
+        Complete output text
+    """
+    parts = []
+    try:
+        async for chunk in chain.astream(inputs):
+            parts.append(chunk)
+            batcher.add(chunk)
+    finally:
+        batcher.close()
+    return "".join(parts)
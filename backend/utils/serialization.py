@@ -0,0 +1,115 @@
+"""JSON serialization for WebSocket messages, REST responses, stored state, prompts and logs.
+
+Backed by ``orjson`` when it is installed and by the standard library otherwise. Both
+produce the same text: compact separators (or two-space indentation with
+``pretty=True``), non-ASCII characters kept, numpy arrays and scalars as plain lists
+and numbers, non-string keys as strings, and NaN and infinity as ``null`` (the
+standard library would write ``NaN``/``Infinity``, which is not valid JSON).
+
+``Prepared`` messages are serialized once, when they are created, and reuse that
+text every time they are sent.
+"""
+
+import json
+import math
+from typing import Any, Union
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Standard library fallback
+    orjson = None
+
+_ORJSON_OPTIONS = 0
+_ORJSON_PRETTY_OPTIONS = 0
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    _ORJSON_PRETTY_OPTIONS = _ORJSON_OPTIONS | orjson.OPT_INDENT_2
+
+
+class Prepared(dict):
+    """A message whose JSON is computed once, for messages sent over and over.
+
+    Treat it as read-only: changing it does not change the prepared text.
+    """
+
+    def __init__(self, message: dict):
+        super().__init__(message)
+        self.json = to_json(message)
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types neither backend serializes natively."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _finite(value: Any) -> Any:
+    """Copy of a value with NaN and infinity replaced by None, as orjson writes them."""
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _stdlib_dumps(value: Any, pretty: bool) -> str:
+    options = {"indent": 2} if pretty else {"separators": (",", ":")}
+    try:
+        return json.dumps(
+            value, ensure_ascii=False, allow_nan=False, default=_default, **options
+        )
+    except ValueError:
+        # Some float is NaN or infinite: rare, so only then copy the value
+        return json.dumps(
+            _finite(value), ensure_ascii=False, allow_nan=False, default=_default, **options
+        )
+
+
+def backend() -> str:
+    """Name of the library doing the work (``orjson`` or ``json``)."""
+    return "orjson" if orjson is not None else "json"
+
+
+def to_json(value: Any, pretty: bool = False) -> str:
+    """Serialize a value as JSON text.
+
+    Args:
+        value: JSON-compatible value (numpy arrays and scalars allowed)
+        pretty: Indent with two spaces, for prompts and logs
+
+    Returns:
+        The JSON text
+    """
+    if isinstance(value, Prepared) and not pretty:
+        return value.json
+    if orjson is not None:
+        options = _ORJSON_PRETTY_OPTIONS if pretty else _ORJSON_OPTIONS
+        return orjson.dumps(value, default=_default, option=options).decode()
+    return _stdlib_dumps(value, pretty)
+
+
+def to_json_bytes(value: Any) -> bytes:
+    """Serialize a value as UTF-8 encoded JSON (compact)."""
+    if isinstance(value, Prepared):
+        return value.json.encode()
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+    return to_json(value).encode()
+
+
+def from_json(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or UTF-8 encoded bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
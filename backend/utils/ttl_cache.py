@@ -0,0 +1,97 @@
+"""Thread-safe in-process cache with a TTL and an LRU size bound."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from utils.metrics import get_metrics
+
+
+class TTLCache:
+    """LRU cache whose entries also expire ``ttl_seconds`` after they were stored.
+
+    Hits, misses and evictions are counted in the global metrics under ``name``
+    (e.g. ``gap_cache.hits``) when a name is given.
+    """
+
+    def __init__(self, max_size: int = 256, ttl_seconds: float = 3600.0, name: Optional[str] = None):
+        """Initialize an empty cache.
+
+        Args:
+            max_size: Maximum number of entries; the least recently used are evicted
+            ttl_seconds: Lifetime of an entry
+            name: Metrics prefix, or None to skip metrics
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a fresh entry, marking it as recently used.
+
+        Returns:
+            The cached value, or ``default`` if missing or expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+        self._count("hits" if entry is not None else "misses")
+        return entry[1] if entry is not None else default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store an entry, evicting the least recently used beyond ``max_size``."""
+        if self.max_size <= 0:
+            return
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Number of stored entries (including not yet purged expired ones)."""
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Size and hit rate since the cache was created."""
+        with self._lock:
+            hits, misses, size = self._hits, self._misses, len(self._entries)
+        lookups = hits + misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _count(self, event: str, value: int = 1) -> None:
+        if not self.name:
+            return
+        metrics = get_metrics()
+        metrics.increment(f"{self.name}.{event}", value)
+        if event in ("hits", "misses"):
+            metrics.set_gauge(f"{self.name}.hit_rate", self.stats()["hit_rate"])
@@ -0,0 +1,370 @@
+"""Approval statistics of the ingredient validator and the validation rules they imply.
+
+Every first-round validation is recorded by ingredient class (catalog category or
+keyword match) and the estimator's ``confidence_level``, in daily rows of a small
+SQLite database. From the last ``ADAPTIVE_WINDOW_DAYS`` of data each class and
+confidence gets a rule:
+
+- ``skip``: the first estimate is accepted without validation
+- ``single``: one validation round; a rejection is kept rather than re-estimated
+- ``full``: the full estimator-validator round budget
+
+Rules compare the lower bound of a 95% Wilson interval of the approval rate against
+``ADAPTIVE_SKIP_RATE`` and ``ADAPTIVE_SINGLE_ROUND_RATE``, so a class needs both a
+high rate and enough samples before it loses validation. A sample of skipped
+ingredients (``ADAPTIVE_AUDIT_RATE``) is still validated, which keeps the rates of
+skipped classes current: if they drift down, the rule reverts on its own.
+"""
+
+import math
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from utils.metrics import get_metrics
+from workflows.degraded_mode import match_catalog_food
+
+SKIP = "skip"
+AUDIT = "audit"
+SINGLE = "single"
+FULL = "full"
+
+# Seconds the rules computed from the database are reused
+RULES_REFRESH_SECONDS = 60.0
+
+# LLM calls avoided by each decision: a skipped validation, and the re-estimate plus
+# re-validation a rejected single-round ingredient would have had with the full budget
+CALLS_SAVED = {"skipped": 1, "capped": 2}
+
+# Word starts that classify ingredients missing from the food catalog
+CLASS_KEYWORDS: List[Tuple[str, str]] = [
+    ("oil", "fat"),
+    ("butter", "fat"),
+    ("ghee", "fat"),
+    ("lard", "fat"),
+    ("mayo", "fat"),
+    ("sugar", "sweetener"),
+    ("honey", "sweetener"),
+    ("syrup", "sweetener"),
+    ("jam", "sweetener"),
+    ("chocolate", "sweetener"),
+    ("salt", "spice"),
+    ("pepper", "spice"),
+    ("herb", "spice"),
+    ("sauce", "condiment"),
+    ("dressing", "condiment"),
+    ("ketchup", "condiment"),
+    ("mustard", "condiment"),
+    ("vinegar", "condiment"),
+    ("chicken", "protein"),
+    ("beef", "protein"),
+    ("pork", "protein"),
+    ("turkey", "protein"),
+    ("lamb", "protein"),
+    ("bacon", "protein"),
+    ("ham", "protein"),
+    ("fish", "protein"),
+    ("tuna", "protein"),
+    ("shrimp", "protein"),
+    ("tofu", "protein"),
+    ("bread", "grain"),
+    ("pasta", "grain"),
+    ("noodle", "grain"),
+    ("flour", "grain"),
+    ("tortilla", "grain"),
+    ("cereal", "grain"),
+    ("milk", "dairy"),
+    ("cheese", "dairy"),
+    ("cream", "dairy"),
+    ("coffee", "drink"),
+    ("tea", "drink"),
+    ("juice", "drink"),
+    ("wine", "drink"),
+    ("beer", "drink"),
+    ("lettuce", "vegetable"),
+    ("onion", "vegetable"),
+    ("potato", "vegetable"),
+    ("carrot", "vegetable"),
+    ("apple", "fruit"),
+    ("banana", "fruit"),
+    ("berr", "fruit"),
+]
+
+COUNT_COLUMNS = ["validations", "approvals", "audits", "audit_approvals", "skipped", "capped"]
+
+
+def ingredient_class(name: str) -> str:
+    """Classify an ingredient for approval statistics.
+
+    Args:
+        name: Ingredient name (e.g. "olive oil", "grilled salmon")
+
+    Returns:
+        Catalog category of the matching food, else a keyword class, else "other"
+    """
+    food = match_catalog_food(name)
+    if food:
+        return food["category"]
+    name = name.lower()
+    for word, cls in CLASS_KEYWORDS:
+        if re.search(rf"\b{word}", name):
+            return cls
+    return "other"
+
+
+def confidence_key(confidence: Optional[str]) -> str:
+    """Normalize an estimator confidence level to high, medium, low or unknown."""
+    confidence = (confidence or "").strip().lower()
+    return confidence if confidence in ("high", "medium", "low") else "unknown"
+
+
+def wilson_lower_bound(successes: int, total: int, z: float = 1.96) -> float:
+    """Lower bound of the Wilson score interval of a rate (0.0 without samples)."""
+    if total <= 0:
+        return 0.0
+    rate = successes / total
+    denominator = 1 + z * z / total
+    centre = rate + z * z / (2 * total)
+    margin = z * math.sqrt(rate * (1 - rate) / total + z * z / (4 * total * total))
+    return (centre - margin) / denominator
+
+
+def _rate(successes: int, total: int) -> Optional[float]:
+    return round(successes / total, 4) if total else None
+
+
+class ApprovalStats:
+    """SQLite-backed approval statistics and the validation rules derived from them."""
+
+    def __init__(
+        self,
+        db_path: str,
+        enabled: bool = True,
+        min_samples: int = 30,
+        skip_rate: float = 0.97,
+        single_round_rate: float = 0.85,
+        audit_rate: float = 0.1,
+        window_days: int = 30,
+        drift_days: int = 7,
+    ):
+        """Open (or create) the statistics database.
+
+        Args:
+            db_path: SQLite database file (":memory:" keeps statistics per process)
+            enabled: Apply the rules; when False every ingredient gets the full budget
+                and statistics are still recorded
+            min_samples: First-round validations a class needs before it gets a rule
+            skip_rate: Approval rate lower bound above which validation is skipped
+            single_round_rate: Approval rate lower bound above which one round is used
+            audit_rate: Fraction of skipped ingredients validated anyway
+            window_days: Days of statistics the rules are computed from
+            drift_days: Most recent days compared against the rest of the window
+        """
+        self.enabled = enabled
+        self.min_samples = min_samples
+        self.skip_rate = skip_rate
+        self.single_round_rate = single_round_rate
+        self.audit_rate = audit_rate
+        self.window_days = window_days
+        self.drift_days = drift_days
+        self._lock = threading.Lock()
+        self._rules: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._rules_at = 0.0
+        self._conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS approval_stats (
+                day TEXT NOT NULL,
+                ingredient_class TEXT NOT NULL,
+                confidence TEXT NOT NULL,
+                validations INTEGER NOT NULL DEFAULT 0,
+                approvals INTEGER NOT NULL DEFAULT 0,
+                audits INTEGER NOT NULL DEFAULT 0,
+                audit_approvals INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                capped INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, ingredient_class, confidence)
+            )
+            """
+        )
+
+    def plan(self, cls: str, confidence: str) -> str:
+        """Pick the validation rule for an ingredient after its first estimate.
+
+        Args:
+            cls: Ingredient class (see ``ingredient_class``)
+            confidence: Estimator confidence level of the first estimate
+
+        Returns:
+            SKIP, AUDIT (a sampled skip that is validated with the full budget),
+            SINGLE or FULL
+        """
+        rule = self.rules().get((cls, confidence_key(confidence)), {}).get("rule", FULL)
+        if rule == SKIP and random.random() < self.audit_rate:
+            rule = AUDIT
+        get_metrics().increment(f"adaptive_validation.{rule}")
+        return rule
+
+    def record_validation(self, cls: str, confidence: str, approved: bool, rule: str) -> None:
+        """Record the outcome of an ingredient's first validation."""
+        counts = {"validations": 1, "approvals": int(approved)}
+        if rule == AUDIT:
+            counts.update(audits=1, audit_approvals=int(approved))
+        self._add(cls, confidence, counts)
+
+    def record_skipped(self, cls: str, confidence: str) -> None:
+        """Record an ingredient accepted without validation."""
+        self._add(cls, confidence, {"skipped": 1})
+        get_metrics().increment("adaptive_validation.calls_saved", CALLS_SAVED["skipped"])
+
+    def record_capped(self, cls: str, confidence: str) -> None:
+        """Record a rejected single-round ingredient kept without another round."""
+        self._add(cls, confidence, {"capped": 1})
+        get_metrics().increment("adaptive_validation.calls_saved", CALLS_SAVED["capped"])
+
+    def _add(self, cls: str, confidence: str, counts: Dict[str, int]) -> None:
+        columns = ", ".join(counts)
+        updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in counts)
+        placeholders = ", ".join("?" for _ in counts)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO approval_stats (day, ingredient_class, confidence, {columns}) "
+                f"VALUES (?, ?, ?, {placeholders}) "
+                f"ON CONFLICT (day, ingredient_class, confidence) DO UPDATE SET {updates}",
+                (date.today().isoformat(), cls, confidence_key(confidence), *counts.values()),
+            )
+
+    def _totals(self, since: date, until: Optional[date] = None) -> Dict[Tuple[str, str], Dict]:
+        """Sum the daily rows of each class and confidence from ``since`` (to ``until``)."""
+        query = (
+            "SELECT ingredient_class, confidence, "
+            + ", ".join(f"SUM({column})" for column in COUNT_COLUMNS)
+            + " FROM approval_stats WHERE day >= ?"
+        )
+        params = [since.isoformat()]
+        if until is not None:
+            query += " AND day < ?"
+            params.append(until.isoformat())
+        query += " GROUP BY ingredient_class, confidence"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return {(row[0], row[1]): dict(zip(COUNT_COLUMNS, row[2:], strict=True)) for row in rows}
+
+    def rules(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Get the current rule of every class and confidence with statistics.
+
+        Returns:
+            Dict keyed by (class, confidence) with rule, samples, approval_rate and
+            lower_bound; refreshed from the database at most every minute
+        """
+        with self._lock:
+            if time.monotonic() - self._rules_at < RULES_REFRESH_SECONDS:
+                return self._rules
+
+        rules = {}
+        since = date.today() - timedelta(days=self.window_days - 1)
+        for key, totals in self._totals(since).items():
+            samples, approvals = totals["validations"], totals["approvals"]
+            lower_bound = wilson_lower_bound(approvals, samples)
+            rule = FULL
+            if self.enabled and samples >= self.min_samples:
+                if lower_bound >= self.skip_rate:
+                    rule = SKIP
+                elif lower_bound >= self.single_round_rate:
+                    rule = SINGLE
+            rules[key] = {
+                "rule": rule,
+                "samples": samples,
+                "approval_rate": _rate(approvals, samples),
+                "lower_bound": round(lower_bound, 4),
+            }
+
+        with self._lock:
+            self._rules, self._rules_at = rules, time.monotonic()
+        return rules
+
+    def report(self) -> Dict[str, Any]:
+        """Report calls saved by the rules against drift in the approval rates.
+
+        Drift is the approval rate of the last ``drift_days`` minus the rate over
+        the rest of the window; for skipped classes the recent rate comes from
+        audits only.
+
+        Returns:
+            Dict with the window, per-class rows and totals of saved calls
+        """
+        today = date.today()
+        window_start = today - timedelta(days=self.window_days - 1)
+        recent_start = today - timedelta(days=self.drift_days - 1)
+        window = self._totals(window_start)
+        baseline = self._totals(window_start, until=recent_start)
+        recent = self._totals(recent_start)
+        rules = self.rules()
+
+        rows = []
+        for key in sorted(window):
+            totals = window[key]
+            before = baseline.get(key, {"validations": 0, "approvals": 0})
+            after = recent.get(key, {"validations": 0, "approvals": 0})
+            baseline_rate = _rate(before["approvals"], before["validations"])
+            recent_rate = _rate(after["approvals"], after["validations"])
+            drift = None
+            if baseline_rate is not None and recent_rate is not None:
+                drift = round(recent_rate - baseline_rate, 4)
+            rows.append({
+                "ingredient_class": key[0],
+                "confidence": key[1],
+                "rule": rules.get(key, {}).get("rule", FULL),
+                "validations": totals["validations"],
+                "approval_rate": _rate(totals["approvals"], totals["validations"]),
+                "baseline_rate": baseline_rate,
+                "recent_rate": recent_rate,
+                "drift": drift,
+                "audits": totals["audits"],
+                "audit_approval_rate": _rate(totals["audit_approvals"], totals["audits"]),
+                "skipped": totals["skipped"],
+                "capped": totals["capped"],
+                "calls_saved": sum(totals[name] * calls for name, calls in CALLS_SAVED.items()),
+            })
+
+        return {
+            "enabled": self.enabled,
+            "window_days": self.window_days,
+            "drift_days": self.drift_days,
+            "calls_saved": sum(row["calls_saved"] for row in rows),
+            "validations": sum(row["validations"] for row in rows),
+            "classes": rows,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+# Global approval statistics instance
+_approval_stats = None
+
+
+def get_approval_stats() -> ApprovalStats:
+    """Get the process-wide approval statistics."""
+    global _approval_stats
+    if _approval_stats is None:
+        _approval_stats = ApprovalStats(
+            settings.approval_stats_db_path,
+            enabled=settings.adaptive_validation,
+            min_samples=settings.adaptive_min_samples,
+            skip_rate=settings.adaptive_skip_rate,
+            single_round_rate=settings.adaptive_single_round_rate,
+            audit_rate=settings.adaptive_audit_rate,
+            window_days=settings.adaptive_window_days,
+            drift_days=settings.adaptive_drift_days,
+        )
+    return _approval_stats
@@ -0,0 +1,197 @@
+"""Local fallbacks used when the LLM agents are unavailable.
+
+When an agent's circuit breaker is open the nutrition workflow does not wait for the
+provider: meal descriptions are split into ingredients against the bundled food
+catalog, ingredients are estimated from previously approved LLM estimates (cached
+per process) or scaled catalog data, and cooking is accounted for with fixed
+retention factors. Results built this way are marked as degraded.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.cooking_retention import get_retention_factors
+from config.food_catalog import FOOD_CATALOG
+from config.nutrients import NUTRIENTS
+from config.settings import settings
+from utils.ttl_cache import TTLCache
+
+# Grams per unit for amounts given by weight or volume (1 ml taken as 1 g)
+UNIT_GRAMS = {
+    "g": 1.0, "gram": 1.0, "grams": 1.0, "kg": 1000.0,
+    "ml": 1.0, "l": 1000.0, "oz": 28.35, "lb": 453.6,
+}
+
+AMOUNT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(kg|grams?|g|ml|l|oz|lb)\b", re.IGNORECASE)
+SEPARATOR_PATTERN = re.compile(r",|;|\+|&|\band\b|\bwith\b", re.IGNORECASE)
+
+# Catalog foods, longest names first so "broccoli sprouts" wins over "broccoli"
+_CATALOG_BY_LENGTH = sorted(FOOD_CATALOG, key=lambda food: -len(food["name"]))
+
+# Global cache of approved ingredient estimates
+_ingredient_cache = None
+
+
+def get_ingredient_cache() -> TTLCache:
+    """Get the process-wide cache of approved ingredient estimates."""
+    global _ingredient_cache
+    if _ingredient_cache is None:
+        _ingredient_cache = TTLCache(
+            settings.ingredient_cache_size,
+            settings.ingredient_cache_ttl_seconds,
+            name="ingredient_cache",
+        )
+    return _ingredient_cache
+
+
+def ingredient_key(name: str, amount: str) -> Tuple[str, str]:
+    """Cache key of an ingredient estimate (case and spacing insensitive)."""
+    return (" ".join(name.lower().split()), " ".join((amount or "").lower().split()))
+
+
+def match_catalog_food(name: str) -> Dict[str, Any]:
+    """Find the catalog food an ingredient name refers to.
+
+    Args:
+        name: Ingredient name (e.g. "grilled salmon fillet", "egg")
+
+    Returns:
+        Catalog entry, or an empty dict if no catalog food matches
+    """
+    name = name.lower()
+    for food in _CATALOG_BY_LENGTH:
+        food_name = food["name"]
+        singular = food_name[:-1] if food_name.endswith("s") else food_name
+        if food_name in name or (len(singular) >= 3 and singular in name):
+            return food
+    return {}
+
+
+def amount_in_grams(amount: str) -> Optional[float]:
+    """Parse a weight or volume amount into grams (None if it has no such unit)."""
+    match = AMOUNT_PATTERN.search(amount or "")
+    if not match:
+        return None
+    unit = match.group(2).lower()
+    return float(match.group(1)) * UNIT_GRAMS[unit]
+
+
+def local_ingredient_estimate(name: str, amount: str) -> Dict[str, Any]:
+    """Estimate an ingredient without the LLM.
+
+    Uses a cached approved estimate for the same ingredient and amount if there is
+    one, else the matching catalog food scaled to the amount (one serving if the
+    amount has no weight), else zeros.
+
+    Args:
+        name: Ingredient name
+        amount: Amount with unit
+
+    Returns:
+        Estimation result in the estimator's format, with ``source`` set to
+        "cache", "catalog" or "none"
+    """
+    cached = get_ingredient_cache().get(ingredient_key(name, amount))
+    if cached is not None:
+        return {**cached, "source": "cache"}
+
+    estimates = {nutrient: 0.0 for nutrient in NUTRIENTS.keys()}
+    food = match_catalog_food(name)
+    if not food:
+        return {
+            "ingredient_name": name,
+            "amount": amount,
+            "estimates": estimates,
+            "reasoning": "No local data for this ingredient (LLM unavailable)",
+            "confidence_level": "low",
+            "source": "none",
+        }
+
+    grams = amount_in_grams(amount)
+    scale = grams / food["serving_g"] if grams and food.get("serving_g") else 1.0
+    for nutrient, value in food.get("nutrients", {}).items():
+        if nutrient in estimates:
+            estimates[nutrient] = round(value * scale, 3)
+
+    basis = f"{grams:g} g" if grams else f"one serving ({food['serving']})"
+    return {
+        "ingredient_name": name,
+        "amount": amount,
+        "estimates": estimates,
+        "reasoning": f"Catalog values for {food['name']}, scaled to {basis} (LLM unavailable)",
+        "confidence_level": "low",
+        "source": "catalog",
+    }
+
+
+def parse_meal_locally(description: str) -> Dict[str, Any]:
+    """Split a meal description into ingredients without the LLM.
+
+    Args:
+        description: Natural language meal description
+
+    Returns:
+        Dict with ingredients, cooking_process, meal_category and
+        preprocessing_reasoning, like the preprocessing agent's state update
+    """
+    ingredients = []
+    for part in SEPARATOR_PATTERN.split(description):
+        part = part.strip(" .")
+        if not part:
+            continue
+        match = AMOUNT_PATTERN.search(part)
+        amount = match.group(0) if match else ""
+        name = " ".join(AMOUNT_PATTERN.sub("", part).replace(" of ", " ").split()) or part
+        food = match_catalog_food(name)
+        if not amount:
+            amount = food.get("serving", "1 serving")
+        ingredients.append({
+            "name": name,
+            "amount": amount,
+            "notes": f"matched catalog food: {food['name']}" if food else None,
+        })
+
+    if not ingredients:
+        ingredients.append({"name": description.strip(), "amount": "1 serving", "notes": None})
+
+    # Cooking words in the description ("grilled salmon") pick the retention factors
+    method = get_retention_factors(description)[0]
+
+    return {
+        "ingredients": ingredients,
+        "cooking_process": {"method": method, "nutrient_impact": []},
+        "meal_category": "unknown",
+        "preprocessing_reasoning": "Description split locally against the food catalog (LLM unavailable)",
+    }
+
+
+def apply_cooking_adjustments(
+    estimates: Dict[str, float],
+    cooking_process: Dict[str, Any],
+) -> Tuple[Dict[str, float], str]:
+    """Adjust raw ingredient sums with fixed retention factors for the cooking method.
+
+    Args:
+        estimates: Summed raw ingredient estimates
+        cooking_process: Cooking process from preprocessing
+
+    Returns:
+        Tuple of (adjusted estimates, summary of the changes)
+    """
+    method, factors = get_retention_factors(cooking_process.get("method", ""))
+    adjusted = {
+        nutrient: round(value * factors.get(nutrient, 1.0), 3)
+        for nutrient, value in estimates.items()
+    }
+    if not factors:
+        return adjusted, "No cooking adjustments applied (LLM unavailable)"
+
+    changed: List[str] = [
+        f"{nutrient} -{round((1 - factor) * 100)}%"
+        for nutrient, factor in factors.items()
+        if estimates.get(nutrient)
+    ]
+    summary = f"Standard {method} retention factors applied (LLM unavailable)"
+    if changed:
+        summary += ": " + ", ".join(changed)
+    return adjusted, summary
@@ -1,15 +1,24 @@
 """Nutrient Gap Analysis Workflow - Analyzes daily nutrition gaps and suggests meals."""
 
-from typing import Any, Dict, List, Optional, TypedDict
+import copy
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict
 from langgraph.graph import StateGraph, END
-from langchain_anthropic import ChatAnthropic
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from pydantic import BaseModel, Field
 
 from config.nutrition_goals import NUTRITION_GOALS, get_priority_weight
 from config.settings import settings
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import create_chat_model
+from utils.cancellation import CancellationToken, OperationCancelled, cancellable
 from utils.logger import get_logger
+from utils.metrics import get_metrics
+from utils.progress import ProgressChannel, TokenBatcher, stream_text
+from utils.serialization import to_json
+from utils.ttl_cache import TTLCache
+from workflows.meal_suggestion_engine import get_suggestion_engine
 
 
 class GapAnalysisState(TypedDict, total=False):
@@ -17,6 +26,8 @@ class GapAnalysisState(TypedDict, total=False):
 
     # Input
     meals: List[Dict[str, Any]]  # List of meals with detailed_nutrients
+    cancel_token: Optional[CancellationToken]  # Cancelled when a newer analysis supersedes this one
+    progress: Optional[Callable[[dict], None]]  # Emits streamed reasoning (None without a client)
 
     # Aggregation outputs
     total_nutrients: Dict[str, float]  # Summed nutrients from all meals
@@ -25,9 +36,15 @@ class GapAnalysisState(TypedDict, total=False):
     nutrient_gaps: List[Dict[str, Any]]  # List of gaps with priority scores
     top_gaps: List[Dict[str, Any]]  # Top 5 gaps for frontend
 
+    # Prioritization outputs
+    gap_prioritization: Dict[str, Any]  # important_gaps, nutrient_groupings, reasoning
+
     # Meal suggestion outputs
     meal_suggestions: List[Dict[str, Any]]  # List of meal suggestions
 
+    # Set when an LLM step fell back to local results because the LLM was unavailable
+    degraded: bool
+
 
 class NutrientGap(BaseModel):
     """Model for a nutrient gap."""
@@ -64,12 +81,92 @@ class MealSuggestionResult(BaseModel):
     )
 
 
+class PrioritizedSuggestionResult(BaseModel):
+    """Result of the single-call prioritization and meal suggestion analysis."""
+    important_gaps: List[str] = Field(description="List of most important nutrient names")
+    nutrient_groupings: Dict[str, List[str]] = Field(
+        description="Groups of nutrients found in similar foods"
+    )
+    reasoning: str = Field(description="Brief reasoning for prioritization")
+    suggestions: List[MealSuggestion] = Field(
+        description="List of 3-5 meal suggestions",
+        min_items=3,
+        max_items=5
+    )
+
+
+# Suggestions used when both the LLM step and the local engine come up empty
+FALLBACK_MEAL_SUGGESTIONS = [
+    {
+        "meal": "Mixed berry smoothie with spinach",
+        "reasoning": "High in vitamins, antioxidants, and fiber",
+    },
+    {
+        "meal": "Salmon with quinoa and vegetables",
+        "reasoning": "Rich in omega-3, protein, and essential minerals",
+    },
+    {
+        "meal": "Lentil soup with whole grain bread",
+        "reasoning": "Excellent source of fiber, iron, and B vitamins",
+    },
+]
+
+
+def gap_signature(
+    gaps: List[Dict[str, Any]], top_n: int = 5, bucket_percent: float = 10
+) -> Tuple[Tuple[str, int], ...]:
+    """Quantize ranked gaps so similar days share LLM results.
+
+    Args:
+        gaps: Nutrient gaps sorted by importance
+        top_n: Number of leading gaps in the signature
+        bucket_percent: Width of the percentage-of-target buckets
+
+    Returns:
+        Tuple of ``(nutrient, bucket)`` pairs
+    """
+    return tuple(
+        (gap["nutrient"], int(gap["percentage"] // bucket_percent)) for gap in gaps[:top_n]
+    )
+
+
+# Global cache of LLM prioritization and suggestions, shared by all users of a process
+_gap_cache = None
+
+
+def get_gap_cache() -> TTLCache:
+    """Get the global gap-signature cache."""
+    global _gap_cache
+    if _gap_cache is None:
+        _gap_cache = TTLCache(
+            max_size=settings.gap_cache_size,
+            ttl_seconds=settings.gap_cache_ttl_seconds,
+            name="gap_cache",
+        )
+    return _gap_cache
+
+
 class GapAnalysisWorkflow:
     """Workflow that analyzes nutrient gaps and suggests meals."""
 
-    def __init__(self):
-        """Initialize workflow."""
+    def __init__(self, single_call: Optional[bool] = None, suggestion_mode: Optional[str] = None):
+        """Initialize workflow.
+
+        Args:
+            single_call: Prioritize gaps and suggest meals in one LLM call instead of
+                two (defaults to ``settings.gap_single_call``)
+            suggestion_mode: "llm", "seeded" (local candidates added to the LLM prompt)
+                or "local" (no LLM suggestion call); defaults to
+                ``settings.meal_suggestion_mode``
+        """
         self.logger = get_logger()
+        self.suggestion_mode = suggestion_mode or settings.meal_suggestion_mode
+        if self.suggestion_mode not in ("llm", "seeded", "local"):
+            raise ValueError(f"Unknown meal suggestion mode: {self.suggestion_mode}")
+        # Local suggestions need no LLM call to merge with the prioritization
+        self.single_call = (
+            settings.gap_single_call if single_call is None else single_call
+        ) and self.suggestion_mode != "local"
         self.graph = self._create_graph()
 
     def _create_graph(self) -> StateGraph:
@@ -83,17 +180,31 @@ class GapAnalysisWorkflow:
         # Add nodes
         workflow.add_node("aggregate_meals", self._aggregate_meals_node)
         workflow.add_node("calculate_gaps", self._calculate_gaps_node)
-        workflow.add_node("prioritize_gaps", self._prioritize_gaps_node)
-        workflow.add_node("suggest_meals", self._suggest_meals_node)
-
-        # Set entry point
-        workflow.set_entry_point("aggregate_meals")
+        if self.single_call:
+            workflow.add_node("prioritize_and_suggest", self._prioritize_and_suggest_node)
+            llm_entry = "prioritize_and_suggest"
+        else:
+            workflow.add_node("prioritize_gaps", self._prioritize_gaps_node)
+            workflow.add_node("suggest_meals", self._suggest_meals_node)
+            llm_entry = "prioritize_gaps"
+
+        # Set entry point: skip the deterministic nodes when gaps were precomputed
+        workflow.set_conditional_entry_point(
+            lambda s: "llm" if s.get("nutrient_gaps") is not None else "aggregate_meals",
+            {
+                "aggregate_meals": "aggregate_meals",
+                "llm": llm_entry,
+            },
+        )
 
         # Add edges
         workflow.add_edge("aggregate_meals", "calculate_gaps")
-        workflow.add_edge("calculate_gaps", "prioritize_gaps")
-        workflow.add_edge("prioritize_gaps", "suggest_meals")
-        workflow.add_edge("suggest_meals", END)
+        workflow.add_edge("calculate_gaps", llm_entry)
+        if self.single_call:
+            workflow.add_edge("prioritize_and_suggest", END)
+        else:
+            workflow.add_edge("prioritize_gaps", "suggest_meals")
+            workflow.add_edge("suggest_meals", END)
 
         return workflow.compile()
 
@@ -121,13 +232,12 @@ class GapAnalysisWorkflow:
         state["total_nutrients"] = total_nutrients
 
         # Create detailed log output
-        import json
         nutrients_list = "\n".join([f"  {name}: {value}" for name, value in total_nutrients.items()])
         log_response = f"Aggregated {len(total_nutrients)} nutrients from {len(meals)} meals:\n{nutrients_list}"
 
         self.logger.log_interaction(
             agent_name="aggregate_meals",
-            prompt=f"Aggregate all meal nutrients\n\nMeals: {json.dumps([m.get('description', 'unknown') for m in meals], indent=2)}",
+            prompt=f"Aggregate all meal nutrients\n\nMeals: {to_json([m.get('description', 'unknown') for m in meals], pretty=True)}",
             response=log_response,
             metadata={"meal_count": len(meals), "nutrient_count": len(total_nutrients)}
         )
@@ -223,7 +333,6 @@ class GapAnalysisWorkflow:
         state["top_gaps"] = top_gaps
 
         # Create comprehensive logging showing ALL nutrients
-        import json
 
         # Separate included and excluded nutrients
         included = [n for n in all_nutrients_analysis if "INCLUDED" in n["status"]]
@@ -291,7 +400,7 @@ FILTERING SUMMARY:
 
         return state
 
-    def _prioritize_gaps_node(self, state: GapAnalysisState) -> GapAnalysisState:
+    async def _prioritize_gaps_node(self, state: GapAnalysisState) -> GapAnalysisState:
         """Use LLM to prioritize gaps and group nutrients by food sources.
 
         Args:
@@ -306,10 +415,16 @@ FILTERING SUMMARY:
             # No gaps to prioritize
             return state
 
+        cache_key = self._cache_key("prioritize_gaps", gaps)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            state["gap_prioritization"] = cached
+            return state
+
         # Create LLM chain for gap prioritization
-        llm = ChatAnthropic(
+        llm = create_chat_model(
+            "prioritize_gaps",
             model=settings.estimator_model,
-            anthropic_api_key=settings.anthropic_api_key,
             temperature=0.3,
             max_tokens=2048,
         )
@@ -346,29 +461,21 @@ Provide your response as valid JSON only.""",
             },
         )
 
-        chain = prompt | llm | parser
-
         # Prepare gaps summary (top 15 for analysis)
-        gaps_summary = []
-        for gap in gaps[:15]:
-            gaps_summary.append({
-                "nutrient": gap["nutrient"],
-                "current": gap["current"],
-                "target": gap["target"],
-                "percentage": gap["percentage"],
-                "priority": gap["priority"],
-                "deficit": gap["deficit"],
-                "unit": gap["unit"],
-            })
+        gaps_summary = self._gaps_summary(gaps)
 
-        import json
-        gaps_json = json.dumps(gaps_summary, indent=2)
+        gaps_json = to_json(gaps_summary, pretty=True)
 
         try:
             prompt_inputs = {"gaps_json": gaps_json}
             prompt_text = prompt.format(**prompt_inputs)
 
-            result = chain.invoke(prompt_inputs)
+            # Both gap LLM calls are saved if the analysis was already superseded
+            started = time.perf_counter()
+            result = await self._invoke_streaming_reasoning(
+                state, prompt, llm, parser, prompt_inputs, llm_calls=2
+            )
+            self._cache_store(cache_key, result, time.perf_counter() - started)
 
             # Store prioritization results in state for meal suggestion
             state["gap_prioritization"] = result
@@ -376,13 +483,18 @@ Provide your response as valid JSON only.""",
             self.logger.log_interaction(
                 agent_name="prioritize_gaps",
                 prompt=prompt_text,
-                response=json.dumps(result, indent=2),
+                response=to_json(result, pretty=True),
                 metadata={
                     "gaps_analyzed": len(gaps_summary),
                     "important_gaps_count": len(result.get("important_gaps", [])),
                 }
             )
 
+        except OperationCancelled:
+            raise
+        except LLMUnavailable as e:
+            print(f"Gap prioritization unavailable, ranking gaps locally: {e}")
+            self._degrade_prioritization(state)
         except Exception as e:
             print(f"Error during gap prioritization: {e}")
             # Continue without prioritization
@@ -394,7 +506,7 @@ Provide your response as valid JSON only.""",
 
         return state
 
-    def _suggest_meals_node(self, state: GapAnalysisState) -> GapAnalysisState:
+    async def _suggest_meals_node(self, state: GapAnalysisState) -> GapAnalysisState:
         """Generate meal suggestions based on prioritized gaps.
 
         Args:
@@ -405,17 +517,34 @@ Provide your response as valid JSON only.""",
         """
         gaps = state.get("nutrient_gaps", [])
         prioritization = state.get("gap_prioritization", {})
-        total_nutrients = state.get("total_nutrients", {})
 
         if not gaps:
             # No gaps, no suggestions needed
             state["meal_suggestions"] = []
             return state
 
+        if self.suggestion_mode == "local":
+            suggestions = self._local_suggestions(state)
+            state["meal_suggestions"] = suggestions
+
+            self.logger.log_interaction(
+                agent_name="suggest_meals_local",
+                prompt=f"Rank catalog foods against {len(gaps)} nutrient gaps",
+                response=to_json(suggestions, pretty=True),
+                metadata={"suggestions_count": len(suggestions)}
+            )
+            return state
+
+        cache_key = self._cache_key("suggest_meals", gaps)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            state["meal_suggestions"] = cached
+            return state
+
         # Create LLM chain for meal suggestions
-        llm = ChatAnthropic(
+        llm = create_chat_model(
+            "suggest_meals",
             model=settings.estimator_model,
-            anthropic_api_key=settings.anthropic_api_key,
             temperature=0.5,  # Slightly higher for creative meal ideas
             max_tokens=1024,
         )
@@ -433,7 +562,7 @@ Nutrient groupings (nutrients found in similar foods):
 
 Current nutrient status (top 10 deficiencies):
 {top_deficiencies}
-
+{candidate_foods}
 Your task:
 Generate 3-5 meal suggestions that:
 1. Address the most important nutrient gaps (essential nutrients, vitamins, minerals)
@@ -451,6 +580,7 @@ Provide your response as valid JSON only.""",
             input_variables=["important_gaps", "nutrient_groupings", "top_deficiencies"],
             partial_variables={
                 "format_instructions": parser.get_format_instructions(),
+                "candidate_foods": self._candidate_foods_text(state),
             },
         )
 
@@ -475,8 +605,6 @@ Provide your response as valid JSON only.""",
             for gap in gaps[:10]
         ])
 
-        import json
-
         try:
             prompt_inputs = {
                 "important_gaps": important_gaps_text,
@@ -485,65 +613,324 @@ Provide your response as valid JSON only.""",
             }
             prompt_text = prompt.format(**prompt_inputs)
 
-            result = chain.invoke(prompt_inputs)
+            started = time.perf_counter()
+            result = await cancellable(chain.ainvoke(prompt_inputs), state.get("cancel_token"))
 
             # Format suggestions for frontend
-            suggestions = []
-            for suggestion in result.get("suggestions", [])[:5]:
-                suggestions.append({
-                    "meal": suggestion.get("meal", ""),
-                    "reasoning": suggestion.get("reasoning", ""),
-                })
+            suggestions = self._format_suggestions(result)
+            self._cache_store(cache_key, suggestions, time.perf_counter() - started)
 
             state["meal_suggestions"] = suggestions
 
             self.logger.log_interaction(
                 agent_name="suggest_meals",
                 prompt=prompt_text,
-                response=json.dumps(result, indent=2),
+                response=to_json(result, pretty=True),
                 metadata={
                     "suggestions_count": len(suggestions),
                     "gaps_addressed": len(important_gaps),
                 }
             )
 
+        except OperationCancelled:
+            raise
+        except LLMUnavailable as e:
+            print(f"Meal suggestion unavailable, suggesting from the food catalog: {e}")
+            state["meal_suggestions"] = self._local_suggestions(state) or list(FALLBACK_MEAL_SUGGESTIONS)
+            state["degraded"] = True
         except Exception as e:
             print(f"Error during meal suggestion: {e}")
             # Provide fallback suggestions
-            state["meal_suggestions"] = [
-                {
-                    "meal": "Mixed berry smoothie with spinach",
-                    "reasoning": "High in vitamins, antioxidants, and fiber",
-                },
-                {
-                    "meal": "Salmon with quinoa and vegetables",
-                    "reasoning": "Rich in omega-3, protein, and essential minerals",
-                },
-                {
-                    "meal": "Lentil soup with whole grain bread",
-                    "reasoning": "Excellent source of fiber, iron, and B vitamins",
-                },
-            ]
+            state["meal_suggestions"] = self._local_suggestions(state) or list(FALLBACK_MEAL_SUGGESTIONS)
 
         return state
 
+    async def _prioritize_and_suggest_node(self, state: GapAnalysisState) -> GapAnalysisState:
+        """Prioritize gaps and suggest meals in a single LLM call.
+
+        Falls back to the two-step prioritize/suggest path if the combined response
+        fails or contains no suggestions.
+
+        Args:
+            state: Current workflow state
+
+        Returns:
+            Updated state with gap_prioritization and meal_suggestions
+        """
+        gaps = state.get("nutrient_gaps", [])
+
+        if not gaps:
+            # No gaps, no suggestions needed
+            state["meal_suggestions"] = []
+            return state
+
+        cache_key = self._cache_key("prioritize_and_suggest", gaps)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            state["gap_prioritization"] = cached["gap_prioritization"]
+            state["meal_suggestions"] = cached["meal_suggestions"]
+            return state
+
+        llm = create_chat_model(
+            "prioritize_and_suggest",
+            model=settings.estimator_model,
+            temperature=0.4,
+            max_tokens=2048,
+        )
+
+        parser = JsonOutputParser(pydantic_object=PrioritizedSuggestionResult)
+
+        prompt = PromptTemplate(
+            template="""You are a nutrition expert analyzing daily nutrient gaps and suggesting meals to fill them.
+
+Current nutrient gaps (sorted by importance):
+{gaps_json}
+{candidate_foods}
+Your task:
+1. Identify the MOST IMPORTANT gaps to address:
+   - Prioritize essential nutrients (vitamins, minerals, essential fatty acids)
+   - High-priority deficiencies (marked as "high" priority)
+   - Large percentage deficiencies (below 50% of target)
+   - Less important: polyphenols, non-essential compounds
+
+2. Group nutrients that are commonly found in similar foods:
+   - Example: "Vitamin D, Omega-3, Calcium" -> Found in fatty fish, fortified dairy
+   - Example: "Vitamin C, Fiber, Potassium" -> Found in fruits and vegetables
+   - Try to maximize coverage of multiple deficiencies with single food groups
+
+3. Briefly explain your reasoning (max 3 sentences)
+
+4. Using those groupings, generate 3-5 meal suggestions that:
+   - Address the most important gaps and cover multiple deficiencies per meal
+   - Are practical, realistic meals built from whole foods and common ingredients
+   - meal: Short, specific meal title (max 8 words). Example: "Salmon with quinoa and broccoli"
+   - reasoning: Brief explanation of key nutrients covered (max 15 words)
+
+{format_instructions}
+
+Provide your response as valid JSON only.""",
+            input_variables=["gaps_json"],
+            partial_variables={
+                "format_instructions": parser.get_format_instructions(),
+                "candidate_foods": self._candidate_foods_text(state),
+            },
+        )
+
+        gaps_summary = self._gaps_summary(gaps)
+        prompt_inputs = {"gaps_json": to_json(gaps_summary, pretty=True)}
+
+        try:
+            prompt_text = prompt.format(**prompt_inputs)
+
+            started = time.perf_counter()
+            result = await self._invoke_streaming_reasoning(
+                state, prompt, llm, parser, prompt_inputs
+            )
+
+            suggestions = self._format_suggestions(result)
+            if not suggestions:
+                raise ValueError("response contained no meal suggestions")
+
+            state["gap_prioritization"] = {
+                "important_gaps": result.get("important_gaps", []),
+                "nutrient_groupings": result.get("nutrient_groupings", {}),
+                "reasoning": result.get("reasoning", ""),
+            }
+            state["meal_suggestions"] = suggestions
+            self._cache_store(cache_key, {
+                "gap_prioritization": state["gap_prioritization"],
+                "meal_suggestions": suggestions,
+            }, time.perf_counter() - started)
+
+            self.logger.log_interaction(
+                agent_name="prioritize_and_suggest",
+                prompt=prompt_text,
+                response=to_json(result, pretty=True),
+                metadata={
+                    "gaps_analyzed": len(gaps_summary),
+                    "important_gaps_count": len(result.get("important_gaps", [])),
+                    "suggestions_count": len(suggestions),
+                }
+            )
+
+        except OperationCancelled:
+            raise
+        except LLMUnavailable as e:
+            # The two-step path would hit the same outage: go local right away
+            print(f"Single-call gap analysis unavailable, using local results: {e}")
+            self._degrade_prioritization(state)
+            state["meal_suggestions"] = self._local_suggestions(state) or list(FALLBACK_MEAL_SUGGESTIONS)
+        except Exception as e:
+            print(f"Single-call gap analysis failed, falling back to two steps: {e}")
+            get_metrics().increment("gap_analysis.single_call_fallbacks")
+            state = await self._prioritize_gaps_node(state)
+            state = await self._suggest_meals_node(state)
+
+        return state
+
+    async def _invoke_streaming_reasoning(
+        self,
+        state: GapAnalysisState,
+        prompt: PromptTemplate,
+        llm: Any,
+        parser: JsonOutputParser,
+        inputs: Dict[str, Any],
+        llm_calls: int = 1,
+    ) -> Dict[str, Any]:
+        """Run a JSON prompt, streaming its ``reasoning`` field to the client.
+
+        Args:
+            state: Current workflow state (``progress`` and ``cancel_token``)
+            prompt: Prompt template
+            llm: Chat model
+            parser: Parser of the complete response
+            inputs: Prompt inputs
+            llm_calls: LLM calls saved if the token is already cancelled
+
+        Returns:
+            Parsed response
+        """
+        cancel_token = state.get("cancel_token")
+        progress = state.get("progress")
+        if not (progress and settings.stream_reasoning):
+            chain = prompt | llm | parser
+            return await cancellable(chain.ainvoke(inputs), cancel_token, llm_calls=llm_calls)
+
+        batcher = TokenBatcher(
+            progress,
+            "gap_prioritization",
+            interval=settings.reasoning_stream_interval_seconds,
+            field="reasoning",
+        )
+        text = await cancellable(
+            stream_text(prompt | llm | StrOutputParser(), inputs, batcher),
+            cancel_token,
+            llm_calls=llm_calls,
+        )
+        return parser.parse(text)
+
+    def _cache_key(self, step: str, gaps: List[Dict[str, Any]]) -> Tuple:
+        """Cache key for an LLM step on gaps with this signature."""
+        signature = gap_signature(gaps, settings.gap_cache_top_n, settings.gap_cache_bucket_percent)
+        return (step, self.suggestion_mode, signature)
+
+    def _cache_lookup(self, key: Tuple) -> Any:
+        """Get a cached LLM result, counting the latency it saves."""
+        entry = get_gap_cache().get(key)
+        if entry is None:
+            return None
+        metrics = get_metrics()
+        metrics.increment("gap_cache.latency_saved_seconds", entry["latency"])
+        metrics.observe("gap_cache.hit_saved_seconds", entry["latency"])
+        return copy.deepcopy(entry["value"])
+
+    def _cache_store(self, key: Tuple, value: Any, latency: float) -> None:
+        """Cache a successful LLM result with the time it took."""
+        get_gap_cache().set(key, {"value": copy.deepcopy(value), "latency": latency})
+
+    def _degrade_prioritization(self, state: GapAnalysisState) -> None:
+        """Rank gaps by their deterministic priority score instead of the LLM."""
+        state["gap_prioritization"] = {
+            "important_gaps": [gap["nutrient"] for gap in state.get("nutrient_gaps", [])[:5]],
+            "nutrient_groupings": {},
+            "reasoning": "Ranked by deficit and nutrient priority (AI analysis unavailable)",
+            "degraded": True,
+        }
+        state["degraded"] = True
+        get_metrics().increment("degraded.gap_analysis")
+
+    def _local_suggestions(self, state: GapAnalysisState) -> List[Dict[str, Any]]:
+        """Suggest meals from the bundled food catalog without any LLM call."""
+        return get_suggestion_engine().suggest(state.get("total_nutrients", {}), count=5)
+
+    def _candidate_foods_text(self, state: GapAnalysisState) -> str:
+        """Locally ranked foods to seed the LLM prompt with (empty unless seeded mode)."""
+        if self.suggestion_mode != "seeded":
+            return ""
+        foods = get_suggestion_engine().rank_foods(state.get("total_nutrients", {}), k=8)
+        if not foods:
+            return ""
+        lines = "\n".join(f"- {food['name']} ({food['serving']})" for food in foods)
+        return f"\nFoods that cover the most of these gaps per serving (build meals from these where sensible):\n{lines}\n"
+
+    def _gaps_summary(self, gaps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Summarize the top 15 gaps for an LLM prompt."""
+        return [
+            {
+                "nutrient": gap["nutrient"],
+                "current": gap["current"],
+                "target": gap["target"],
+                "percentage": gap["percentage"],
+                "priority": gap["priority"],
+                "deficit": gap["deficit"],
+                "unit": gap["unit"],
+            }
+            for gap in gaps[:15]
+        ]
+
+    def _format_suggestions(self, result: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Format up to five LLM meal suggestions for the frontend."""
+        return [
+            {
+                "meal": suggestion.get("meal", ""),
+                "reasoning": suggestion.get("reasoning", ""),
+            }
+            for suggestion in result.get("suggestions", [])[:5]
+        ]
+
+    def compute_gaps(self, meals: List[Dict[str, Any]]) -> Dict:
+        """Compute nutrient gaps without any LLM calls.
+
+        This is the deterministic first phase of the analysis (aggregation and gap
+        ranking), cheap enough to run on every meal change.
+
+        Args:
+            meals: List of meals with detailed_nutrients
+
+        Returns:
+            Dict with total_nutrients, nutrient_gaps and top_gaps
+        """
+        state: GapAnalysisState = {"meals": meals}
+        state = self._aggregate_meals_node(state)
+        state = self._calculate_gaps_node(state)
+
+        return {
+            "total_nutrients": state.get("total_nutrients", {}),
+            "nutrient_gaps": state.get("nutrient_gaps", []),
+            "top_gaps": state.get("top_gaps", []),
+        }
+
     async def analyze_gaps(
         self,
         meals: List[Dict[str, Any]],
         websocket=None,
+        cancel_token: Optional[CancellationToken] = None,
+        gaps: Optional[Dict[str, Any]] = None,
     ) -> Dict:
         """Analyze nutrient gaps and generate meal suggestions.
 
         Args:
             meals: List of meals with detailed_nutrients
             websocket: Optional WebSocket for streaming progress
+            cancel_token: Optional token; once cancelled no further LLM calls are made
+            gaps: Optional result of ``compute_gaps`` for these meals; when given only
+                the LLM prioritization and suggestion steps run
 
         Returns:
             Dict containing gap analysis results
+
+        Raises:
+            OperationCancelled: If the token is cancelled before the analysis completes
         """
+        # Reasoning is streamed from inside the LLM nodes through a channel
+        channel = ProgressChannel(websocket) if websocket else None
+
         # Initialize state
         state: GapAnalysisState = {
             "meals": meals,
+            "cancel_token": cancel_token,
+            "progress": channel.emit if channel else None,
+            **(gaps or {}),
         }
 
         # Notify start
@@ -556,8 +943,9 @@ Provide your response as valid JSON only.""",
         # Stream through the graph
         async for event in self.graph.astream(state, stream_mode="updates"):
             for node_name, node_state in event.items():
-                # Send progress updates
+                # Send progress updates (after any reasoning streamed by the node)
                 if websocket:
+                    await channel.flush()
                     if node_name == "aggregate_meals":
                         await websocket.send_json({
                             "type": "gap_analysis_status",
@@ -577,7 +965,7 @@ Provide your response as valid JSON only.""",
                             "status": "prioritizing",
                             "message": "Prioritizing important gaps...",
                         })
-                    elif node_name == "suggest_meals":
+                    elif node_name in ("suggest_meals", "prioritize_and_suggest"):
                         suggestions_count = len(node_state.get("meal_suggestions", []))
                         await websocket.send_json({
                             "type": "gap_analysis_status",
@@ -595,6 +983,7 @@ Provide your response as valid JSON only.""",
             "top_gaps": state.get("top_gaps", []),
             "meal_suggestions": state.get("meal_suggestions", []),
             "gap_prioritization": state.get("gap_prioritization", {}),
+            "degraded": state.get("degraded", False),
         }
 
 
@@ -0,0 +1,210 @@
+"""Deterministic meal suggestions from the bundled food catalog.
+
+Every catalog food is turned once into a density vector: its per-serving amount of
+each nutrient as a fraction of the daily target. Ranking a day's gaps is then a
+single capped matrix-vector product against the priority weights from
+``get_priority_weight``, and meals are built by greedily adding the foods that cover
+most of what the previous picks left open.
+"""
+
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from config.food_catalog import FOOD_CATALOG, FOOD_CATEGORIES
+from config.nutrition_goals import NUTRITION_GOALS, get_priority_weight
+
+# Hydration is not something a meal suggestion should try to fix
+EXCLUDED_NUTRIENTS = {"water"}
+
+
+class MealSuggestionEngine:
+    """Ranks catalog foods by weighted coverage of the current nutrient deficit."""
+
+    def __init__(self, catalog: Optional[List[Dict[str, Any]]] = None):
+        """Build the food coverage index.
+
+        Args:
+            catalog: Foods with per-serving ``nutrients`` (defaults to the bundled catalog)
+        """
+        self.foods = catalog if catalog is not None else FOOD_CATALOG
+        self.nutrients = [
+            name for name, goal in NUTRITION_GOALS.items()
+            if goal.get("target", 0) > 0 and name not in EXCLUDED_NUTRIENTS
+        ]
+        self.targets = np.array([NUTRITION_GOALS[name]["target"] for name in self.nutrients], dtype=float)
+        self.weights = np.array([get_priority_weight(name) for name in self.nutrients], dtype=float)
+
+        # density[i, j] = fraction of the daily target of nutrient j in one serving of food i
+        amounts = np.zeros((len(self.foods), len(self.nutrients)))
+        index = {name: j for j, name in enumerate(self.nutrients)}
+        for i, food in enumerate(self.foods):
+            for nutrient, value in food.get("nutrients", {}).items():
+                if nutrient in index:
+                    amounts[i, index[nutrient]] = value
+        self.density = amounts / self.targets
+
+        self._categories = [food.get("category", "") for food in self.foods]
+
+    def deficit_vector(self, total_nutrients: Dict[str, float]) -> np.ndarray:
+        """Get the missing fraction (0-1) of each nutrient's daily target.
+
+        Args:
+            total_nutrients: Nutrients consumed so far
+
+        Returns:
+            Deficit vector aligned with ``self.nutrients``
+        """
+        current = np.array([float(total_nutrients.get(name, 0.0)) for name in self.nutrients])
+        return np.clip(1.0 - current / self.targets, 0.0, 1.0)
+
+    def coverage(self, deficit: np.ndarray) -> np.ndarray:
+        """Weighted deficit coverage of one serving of every food.
+
+        A food only gets credit for the part of a gap it actually fills, so the
+        density matrix is capped at the deficit before the product with the weights.
+        """
+        return np.minimum(self.density, deficit) @ self.weights
+
+    def rank_foods(self, total_nutrients: Dict[str, float], k: int = 10) -> List[Dict[str, Any]]:
+        """Get the k catalog foods that best cover the current gaps.
+
+        Args:
+            total_nutrients: Nutrients consumed so far
+            k: Number of foods to return
+
+        Returns:
+            List of dicts with name, category, serving and score, best first
+        """
+        scores = self.coverage(self.deficit_vector(total_nutrients))
+        return [
+            {
+                "name": self.foods[i]["name"],
+                "category": self._categories[i],
+                "serving": self.foods[i].get("serving", ""),
+                "score": round(float(scores[i]), 3),
+            }
+            for i in self._top_k(scores, k)
+            if scores[i] > 0
+        ]
+
+    def suggest(
+        self,
+        total_nutrients: Dict[str, float],
+        count: int = 3,
+        max_foods: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """Suggest meals made of complementary catalog foods.
+
+        Each suggestion starts from one of the best-ranked foods not used yet and
+        greedily adds unused foods from other categories that cover the most of the
+        remaining deficit, so the suggestions do not repeat each other.
+
+        Args:
+            total_nutrients: Nutrients consumed so far
+            count: Number of meals to suggest
+            max_foods: Maximum foods per meal
+
+        Returns:
+            List of suggestions with meal, reasoning and foods
+        """
+        deficit = self.deficit_vector(total_nutrients)
+        scores = self.coverage(deficit)
+        if not scores.any():
+            return []
+
+        suggestions = []
+        used = set()
+        for seed in self._top_k(scores, len(self.foods)):
+            if len(suggestions) >= count or scores[seed] <= 0:
+                break
+            if seed in used:
+                continue
+
+            combo = self._extend(seed, deficit, scores[seed], max_foods, used)
+            used.update(combo)
+            suggestions.append(self._describe(combo, deficit))
+
+        return suggestions
+
+    def _extend(
+        self,
+        seed: int,
+        deficit: np.ndarray,
+        seed_score: float,
+        max_foods: int,
+        exclude: Set[int],
+    ) -> List[int]:
+        """Greedily add complementary foods to a seed food."""
+        combo = [seed]
+        remaining = np.clip(deficit - self.density[seed], 0.0, None)
+        while len(combo) < max_foods:
+            gains = self.coverage(remaining)
+            for i in exclude.union(combo):
+                gains[i] = 0.0
+            taken = {self._categories[i] for i in combo}
+            for i, category in enumerate(self._categories):
+                if category in taken:
+                    gains[i] = 0.0
+
+            best = int(np.argmax(gains))
+            # Stop once another food adds little next to the seed
+            if gains[best] < 0.1 * seed_score:
+                break
+            combo.append(best)
+            remaining = np.clip(remaining - self.density[best], 0.0, None)
+        return combo
+
+    def _describe(self, combo: List[int], deficit: np.ndarray) -> Dict[str, Any]:
+        """Turn a food combination into a meal suggestion."""
+        order = {category: n for n, category in enumerate(FOOD_CATEGORIES)}
+        combo = sorted(combo, key=lambda i: order.get(self._categories[i], len(order)))
+        names = [self.foods[i]["name"] for i in combo]
+
+        if len(names) == 1:
+            title = names[0]
+        else:
+            title = f"{names[0]} with {' and '.join(names[1:])}"
+
+        covered = np.minimum(self.density[combo].sum(axis=0), deficit) * self.weights
+        top = [self._display_name(self.nutrients[j]) for j in np.argsort(covered)[::-1][:3] if covered[j] > 0]
+        reasoning = f"Covers {', '.join(top[:-1])} and {top[-1]}" if len(top) > 1 else f"Covers {top[0]}"
+
+        return {
+            "meal": title[0].upper() + title[1:],
+            "reasoning": reasoning,
+            "foods": [
+                {"name": self.foods[i]["name"], "serving": self.foods[i].get("serving", "")}
+                for i in combo
+            ],
+        }
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> List[int]:
+        """Indices of the k highest scores, best first."""
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [int(i) for i in top[np.argsort(-scores[top], kind="stable")]]
+
+    @staticmethod
+    def _display_name(nutrient: str) -> str:
+        """Human-readable nutrient name for reasoning text."""
+        if nutrient == "epa-dha":
+            return "omega-3 (EPA/DHA)"
+        if nutrient.startswith("vitamin-"):
+            return "vitamin " + nutrient.split("-", 1)[1].upper()
+        return nutrient.replace("-", " ")
+
+
+# Global engine instance (the coverage index is built once per process)
+_engine = None
+
+
+def get_suggestion_engine() -> MealSuggestionEngine:
+    """Get the global suggestion engine."""
+    global _engine
+    if _engine is None:
+        _engine = MealSuggestionEngine()
+    return _engine
@@ -1,6 +1,10 @@
 """Parallel Nutrition Workflow - Processes ingredients in parallel with estimator-validator loops."""
 
-from typing import Any, Dict, List, Optional, TypedDict
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypedDict
 from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableParallel
 
@@ -9,7 +13,92 @@ from agents.ingredient_estimator import IngredientEstimator
 from agents.ingredient_validator import IngredientValidator
 from config.nutrients import NUTRIENTS
 from config.settings import settings
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import deadline_remaining, llm_deadline
+from utils.cancellation import CancellationToken, OperationCancelled, cancellable
 from utils.logger import get_logger
+from utils.metrics import get_metrics
+from utils.progress import ProgressChannel, TokenBatcher, stream_text
+from utils.serialization import to_json
+from workflows.approval_stats import (
+    SINGLE,
+    SKIP,
+    ApprovalStats,
+    get_approval_stats,
+    ingredient_class,
+)
+from workflows.degraded_mode import (
+    apply_cooking_adjustments,
+    get_ingredient_cache,
+    ingredient_key,
+    local_ingredient_estimate,
+    parse_meal_locally,
+)
+from workflows.provisional_estimate import (
+    get_meal_cache,
+    get_provisional_estimator,
+    macros_from_estimates,
+    meal_key,
+)
+
+
+# Share of the meal's latency budget for each LLM stage, in execution order
+STAGE_BUDGET_SHARES = {
+    "preprocessing": 0.2,
+    "coordinator": 0.45,
+    "interaction_analysis": 0.35,
+}
+
+
+def stage_deadline(*stages: str):
+    """Deadline for one or more consecutive stages: their share of the budget left.
+
+    Time a stage does not use rolls over to the later ones, and the last stage gets
+    whatever is left. Without a meal deadline the stage is unbounded.
+
+    Args:
+        stages: Keys of STAGE_BUDGET_SHARES, in order (several when stages overlap)
+
+    Returns:
+        ``llm_deadline`` context manager for the stages
+    """
+    remaining = deadline_remaining()
+    if remaining is None:
+        return llm_deadline(0)
+    names = list(STAGE_BUDGET_SHARES)
+    later = sum(STAGE_BUDGET_SHARES[name] for name in names[names.index(stages[0]):])
+    share = sum(STAGE_BUDGET_SHARES[name] for name in stages)
+    # An exhausted budget still yields a (past) deadline rather than none
+    return llm_deadline(max(remaining * share / later, 0.001))
+
+
+# Progress stages reported to clients: preprocessing, coordinator, merge, interaction_analysis
+TOTAL_STAGES = 4
+
+# Mapping from lowercase/snake_case variants to the canonical nutrient keys
+NUTRIENT_NAME_MAP: Dict[str, str] = {}
+for _proper_name in NUTRIENTS.keys():
+    _snake_case = _proper_name.lower().replace(" ", "_").replace("+", "_").replace("-", "_")
+    NUTRIENT_NAME_MAP[_snake_case] = _proper_name
+    NUTRIENT_NAME_MAP[_proper_name.lower()] = _proper_name
+    NUTRIENT_NAME_MAP[_proper_name] = _proper_name
+
+
+def add_estimates(totals: Dict[str, float], estimates: Dict[str, float]) -> Dict[str, float]:
+    """Add an ingredient's estimates into totals keyed by canonical nutrient names.
+
+    Args:
+        totals: Running sums, updated in place
+        estimates: Ingredient estimates (keys may be snake_case or other variants)
+
+    Returns:
+        The updated totals
+    """
+    for nutrient_key, value in estimates.items():
+        proper_name = NUTRIENT_NAME_MAP.get(nutrient_key, nutrient_key)
+        if proper_name in NUTRIENTS or proper_name in totals:
+            totals[proper_name] = totals.get(proper_name, 0.0) + value
+    return totals
 
 
 # State schemas
@@ -32,6 +121,14 @@ class IngredientSubgraphState(TypedDict, total=False):
     feedback: Optional[str]
     issues_found: int
 
+    # Set when the estimate came from local data because the LLM was unavailable
+    degraded: bool
+
+    # Adaptive validation: class and first confidence of the ingredient, and its rule
+    ingredient_class: str
+    first_confidence: str
+    validation_rule: str
+
 
 class ParallelNutritionState(TypedDict, total=False):
     """State for the main parallel nutrition workflow."""
@@ -39,6 +136,9 @@ class ParallelNutritionState(TypedDict, total=False):
     # Input
     description: str
     max_rounds: int  # Max rounds per ingredient in estimator-validator loop
+    cancel_token: Optional[CancellationToken]  # Set when the meal may be abandoned
+    started_at: float  # time.monotonic() when the estimate started
+    progress: Optional[Callable[[dict], None]]  # Thread-safe sink for progress events
 
     # Preprocessing outputs
     ingredients: List[Dict[str, Any]]  # List of {name, amount, notes}
@@ -58,46 +158,109 @@ class ParallelNutritionState(TypedDict, total=False):
     interaction_reasoning: str
     process_impact_reasoning: str
 
+    # Stages that fell back to local data because the LLM was unavailable
+    degraded_stages: List[str]
+
 
 def create_ingredient_subgraph(
     estimator: IngredientEstimator,
     validator: IngredientValidator,
-    max_rounds: int = 3
+    max_rounds: int = 3,
+    cancel_token: Optional[CancellationToken] = None,
+    approval_stats: Optional[ApprovalStats] = None,
+    progress: Optional[Callable[[dict], None]] = None,
 ):
     """Create a subgraph for estimating and validating a single ingredient.
 
     This creates an estimator ↔ validator loop similar to the joke ↔ jury example.
+    With approval statistics, the first estimate's ingredient class and confidence
+    pick how much of the round budget the ingredient gets (see approval_stats).
+    The subgraph is stateless and can run several ingredients concurrently.
 
     Args:
         estimator: Ingredient estimator agent
         validator: Ingredient validator agent
         max_rounds: Maximum rounds of estimation-validation loop
+        cancel_token: Optional token checked before every LLM call
+        approval_stats: Optional statistics that record validations and pick rules
+        progress: Optional thread-safe callback receiving an ``agent_status`` event
+            as each estimator round and validator verdict starts and finishes
 
     Returns:
         Compiled StateGraph for single ingredient processing
     """
     graph = StateGraph(IngredientSubgraphState)
 
+    def report(agent_type: str, status: str, message: str, state, **extra) -> None:
+        """Emit an agent status event for this ingredient."""
+        if progress:
+            progress({
+                "type": "agent_status",
+                "agent_type": agent_type,
+                "status": status,
+                "message": f"{message} ({state['ingredient_name']}: {state['amount']})",
+                "ingredient": state["ingredient_name"],
+                "round": state.get("round", 0),
+                **extra,
+            })
+
     def estimator_node(state: IngredientSubgraphState) -> IngredientSubgraphState:
         """Run ingredient estimator."""
         round_num = state.get("round", 0)
 
-        # If max rounds reached, just return current state
-        if round_num >= max_rounds:
+        # If max rounds reached, keep the last estimate
+        if round_num >= state.get("max_rounds", max_rounds):
             state["approved"] = True  # Force approval to exit loop
+            if approval_stats and state.get("validation_rule") == SINGLE:
+                approval_stats.record_capped(state["ingredient_class"], state["first_confidence"])
             return state
 
-        # Run estimation synchronously
-        result = estimator.estimate_sync(
-            ingredient_name=state["ingredient_name"],
-            amount=state["amount"],
-            notes=state.get("notes")
-        )
+        # Stop before calling the LLM if the meal was abandoned
+        if cancel_token:
+            cancel_token.check(llm_calls=2)
+
+        report("estimator", "running", "Estimating" if round_num == 0 else "Re-estimating", {
+            **state, "round": round_num + 1,
+        })
+
+        # Run estimation synchronously, falling back to local data if the LLM is unavailable
+        try:
+            result = estimator.estimate_sync(
+                ingredient_name=state["ingredient_name"],
+                amount=state["amount"],
+                notes=state.get("notes")
+            )
+        except LLMUnavailable as e:
+            print(f"Estimating {state['ingredient_name']} from local data: {e}")
+            result = local_ingredient_estimate(state["ingredient_name"], state["amount"])
+            state["degraded"] = True
 
         state["estimates"] = result["estimates"]
         state["reasoning"] = result["reasoning"]
         state["confidence_level"] = result["confidence_level"]
         state["round"] = round_num + 1
+        report(
+            "estimator",
+            "done",
+            "Estimated from local data" if state.get("degraded") else "Estimated",
+            state,
+            confidence_level=result["confidence_level"],
+        )
+
+        # The first estimate's class and confidence decide the validation rule
+        if round_num == 0 and approval_stats and not state.get("degraded"):
+            cls = ingredient_class(state["ingredient_name"])
+            rule = approval_stats.plan(cls, result["confidence_level"])
+            state["ingredient_class"] = cls
+            state["first_confidence"] = result["confidence_level"]
+            state["validation_rule"] = rule
+            if rule == SKIP:
+                approval_stats.record_skipped(cls, result["confidence_level"])
+                state["approved"] = True
+                state["feedback"] = "Not validated (class is almost always approved)"
+                report("validator", "done", "Validation skipped", state, approved=True)
+            elif rule == SINGLE:
+                state["max_rounds"] = 1
 
         return state
 
@@ -105,16 +268,61 @@ def create_ingredient_subgraph(
         """Run ingredient validator."""
         estimates = state.get("estimates", {})
 
+        # Local estimates cannot be improved by another round
+        if state.get("degraded"):
+            state["approved"] = True
+            return state
+
+        if cancel_token:
+            cancel_token.check()
+
+        report("validator", "running", "Validating", state)
+
         # Run validation synchronously
-        result = validator.validate_sync(
-            ingredient_name=state["ingredient_name"],
-            amount=state["amount"],
-            estimates=estimates
-        )
+        try:
+            result = validator.validate_sync(
+                ingredient_name=state["ingredient_name"],
+                amount=state["amount"],
+                estimates=estimates
+            )
+        except LLMUnavailable as e:
+            print(f"Keeping unvalidated estimate for {state['ingredient_name']}: {e}")
+            state["approved"] = True
+            state["feedback"] = "Not validated (LLM unavailable)"
+            state["degraded"] = True
+            report("validator", "done", "Not validated", state, approved=True)
+            return state
 
         state["approved"] = result["approved"]
         state["feedback"] = result.get("feedback")
         state["issues_found"] = result.get("issues_found", 0)
+        report(
+            "validator",
+            "done",
+            "Approved" if state["approved"] else "Rejected",
+            state,
+            approved=state["approved"],
+            feedback=state["feedback"],
+        )
+
+        # First validations (not defaulted after an error) feed the approval statistics
+        if approval_stats and state.get("round") == 1 and not result.get("error"):
+            approval_stats.record_validation(
+                state["ingredient_class"],
+                state["first_confidence"],
+                state["approved"],
+                state["validation_rule"],
+            )
+
+        # Approved estimates back the degraded mode for later meals
+        if state["approved"]:
+            get_ingredient_cache().set(ingredient_key(state["ingredient_name"], state["amount"]), {
+                "ingredient_name": state["ingredient_name"],
+                "amount": state["amount"],
+                "estimates": estimates,
+                "reasoning": state.get("reasoning", ""),
+                "confidence_level": state.get("confidence_level", "medium"),
+            })
 
         return state
 
@@ -125,16 +333,13 @@ def create_ingredient_subgraph(
     # Set entry point
     graph.set_entry_point("estimator")
 
-    # Add edges: estimator → validator → (estimator or END)
-    graph.add_edge("estimator", "validator")
-    graph.add_conditional_edges(
-        "validator",
-        lambda s: "END" if s.get("approved", False) else "estimator",
-        {
-            "estimator": "estimator",
-            "END": END,
-        },
-    )
+    def route(state: IngredientSubgraphState) -> str:
+        return "END" if state.get("approved", False) else "next"
+
+    # Add edges: estimator → (validator or END) → (estimator or END). The estimator
+    # approves when validation is skipped or the round budget is used up.
+    graph.add_conditional_edges("estimator", route, {"next": "validator", "END": END})
+    graph.add_conditional_edges("validator", route, {"next": "estimator", "END": END})
 
     return graph.compile()
 
@@ -142,16 +347,20 @@ def create_ingredient_subgraph(
 class ParallelNutritionWorkflow:
     """Workflow that processes ingredients in parallel with individual estimator-validator loops."""
 
-    def __init__(self, max_rounds_per_ingredient: int = 3):
+    def __init__(self, max_rounds_per_ingredient: int = 3, pipelined: Optional[bool] = None):
         """Initialize workflow.
 
         Args:
             max_rounds_per_ingredient: Max rounds for each ingredient's estimator-validator loop
+            pipelined: Start estimating ingredients while preprocessing still streams
+                (defaults to settings.pipelined_estimation)
         """
         self.preprocessing_agent = PreprocessingAgent()
         self.ingredient_estimator = IngredientEstimator()
         self.ingredient_validator = IngredientValidator()
         self.max_rounds = max_rounds_per_ingredient
+        self.pipelined = settings.pipelined_estimation if pipelined is None else pipelined
+        self.mode = "pipelined" if self.pipelined else "sequential"
         self.graph = self._create_graph()
 
     def _create_graph(self) -> StateGraph:
@@ -163,22 +372,38 @@ class ParallelNutritionWorkflow:
         workflow = StateGraph(ParallelNutritionState)
 
         # Add nodes
-        workflow.add_node("preprocessing", self.preprocessing_agent)
-        workflow.add_node("coordinator", self._coordinator_node)
         workflow.add_node("merge", self._merge_node)
         workflow.add_node("interaction_analysis", self._interaction_analysis_node)
 
-        # Set entry point
-        workflow.set_entry_point("preprocessing")
+        if self.pipelined:
+            # Preprocessing streams straight into the ingredient loops
+            workflow.add_node("pipeline", self._pipeline_node)
+            workflow.set_entry_point("pipeline")
+            workflow.add_edge("pipeline", "merge")
+        else:
+            workflow.add_node("preprocessing", self._preprocessing_node)
+            workflow.add_node("coordinator", self._coordinator_node)
+            workflow.set_entry_point("preprocessing")
+            workflow.add_edge("preprocessing", "coordinator")
+            workflow.add_edge("coordinator", "merge")
 
         # Add edges
-        workflow.add_edge("preprocessing", "coordinator")
-        workflow.add_edge("coordinator", "merge")
         workflow.add_edge("merge", "interaction_analysis")
         workflow.add_edge("interaction_analysis", END)
 
         return workflow.compile()
 
+    def _preprocessing_node(self, state: ParallelNutritionState) -> ParallelNutritionState:
+        """Run the preprocessing agent, splitting the description locally if it is unavailable."""
+        try:
+            with stage_deadline("preprocessing"):
+                return self.preprocessing_agent(state)
+        except LLMUnavailable as e:
+            print(f"Preprocessing locally: {e}")
+            state.update(parse_meal_locally(state["description"]))
+            self._mark_degraded(state, "preprocessing")
+            return state
+
     def _coordinator_node(self, state: ParallelNutritionState) -> ParallelNutritionState:
         """Coordinator node that spawns parallel ingredient subgraphs.
 
@@ -191,87 +416,201 @@ class ParallelNutritionWorkflow:
             state["ingredient_results"] = {}
             return state
 
-        # Create a subgraph for each ingredient
-        subgraphs = {}
-        for ing in ingredients:
-            ing_name = ing["name"]
-            ing_amount = ing["amount"]
-            # Create compiled subgraph for this ingredient
-            subgraph = create_ingredient_subgraph(
-                self.ingredient_estimator,
-                self.ingredient_validator,
-                max_rounds=self.max_rounds
-            )
+        # Each ingredient needs at least an estimator and a validator call
+        cancel_token = state.get("cancel_token")
+        if cancel_token:
+            cancel_token.check(llm_calls=2 * len(ingredients))
 
-            # Wrap the subgraph invocation in a lambda that captures the ingredient data
-            def make_runner(ingredient_data, websocket_ref):
-                def runner(input_state):
-                    # Initialize state for this ingredient's subgraph
-                    ing_state: IngredientSubgraphState = {
-                        "ingredient_name": ingredient_data["name"],
-                        "amount": ingredient_data["amount"],
-                        "notes": ingredient_data.get("notes"),
-                        "round": 0,
-                        "max_rounds": self.max_rounds,
-                        "approved": False,
-                    }
-                    # Run the subgraph
-                    result = subgraph.invoke(ing_state)
-                    return result
-                return runner
-
-            subgraphs[ing_name] = make_runner(ing, state.get("_websocket"))
+        # Wrap the subgraph invocation in a lambda that captures the ingredient data
+        run_ingredient = self._ingredient_runner(state, ingredients)
+        subgraphs = {
+            ing["name"]: (lambda _, ingredient_data=ing: run_ingredient(ingredient_data))
+            for ing in ingredients
+        }
 
         # Run all subgraphs in parallel
         parallel = RunnableParallel(**subgraphs)
-        results = parallel.invoke({})
+        with stage_deadline("coordinator"):
+            results = parallel.invoke({})
 
         # Store results in state
         state["ingredient_results"] = results
+        if any(result.get("degraded") for result in results.values()):
+            self._mark_degraded(state, "ingredient_estimation")
 
         return state
 
+    async def _pipeline_node(self, state: ParallelNutritionState) -> ParallelNutritionState:
+        """Preprocess and estimate in one overlapped stage.
+
+        The preprocessing response is streamed, and each ingredient starts its
+        estimator-validator loop in a worker thread as soon as its JSON object is
+        complete, while the rest of the ingredient list (and the cooking process) is
+        still being generated. The loops get the preprocessing and coordinator shares
+        of the latency budget from the start.
+        """
+        loop = asyncio.get_running_loop()
+        progress = state.get("progress")
+        ingredients: List[Dict[str, Any]] = []
+        tasks: Dict[str, asyncio.Future] = {}
+        run_ingredient = self._ingredient_runner(state, ingredients)
+
+        # Loops started while preprocessing streams must not inherit its deadline
+        with stage_deadline("preprocessing", "coordinator"):
+            estimation_context = contextvars.copy_context()
+
+        def dispatch(ingredient: Dict[str, Any]) -> None:
+            # Like the coordinator, a repeated ingredient name is estimated once
+            if ingredient["name"] in tasks:
+                return
+            ingredients.append(ingredient)
+            tasks[ingredient["name"]] = loop.run_in_executor(
+                None, estimation_context.copy().run, run_ingredient, ingredient
+            )
+
+        try:
+            try:
+                with stage_deadline("preprocessing"):
+                    result = await self.preprocessing_agent.preprocess_streaming(
+                        state["description"], dispatch
+                    )
+                state["ingredients"] = result["ingredients"]
+                state["cooking_process"] = result["cooking_process"]
+                state["meal_category"] = result["meal_category"]
+                state["preprocessing_reasoning"] = result["reasoning"]
+            except LLMUnavailable as e:
+                print(f"Preprocessing locally: {e}")
+                state.update(parse_meal_locally(state["description"]))
+                self._mark_degraded(state, "preprocessing")
+
+            # Ingredients only the complete response (or the local split) produced
+            for ingredient in state.get("ingredients", []):
+                dispatch(ingredient)
+
+            if progress:
+                for message in self._preprocessed_events(state.get("ingredients", []), 1):
+                    progress(message)
+
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            # Loops already running finish on their own (their LLM calls stop at the
+            # next cancellation check), but nobody waits for them any more
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        state["ingredient_results"] = dict(zip(tasks, results, strict=True))
+        if any(result.get("degraded") for result in results):
+            self._mark_degraded(state, "ingredient_estimation")
+
+        return state
+
+    def _ingredient_runner(
+        self,
+        state: ParallelNutritionState,
+        ingredients: List[Dict[str, Any]],
+    ) -> Callable[[Dict[str, Any]], IngredientSubgraphState]:
+        """Build the function that runs one ingredient's subgraph in a worker thread.
+
+        The function reports each completed ingredient with its nutrient contribution
+        and the running totals, and records the meal's time to first estimate.
+
+        Args:
+            state: Meal state (round budget, cancellation token, progress sink)
+            ingredients: The meal's ingredients (may still grow while preprocessing
+                streams; its length is reported as the total so far)
+
+        Returns:
+            Function taking an ingredient ``{name, amount, notes}`` dict
+        """
+        # One stateless subgraph runs every ingredient
+        max_rounds = state.get("max_rounds", self.max_rounds)
+        progress = state.get("progress")
+        subgraph = create_ingredient_subgraph(
+            self.ingredient_estimator,
+            self.ingredient_validator,
+            max_rounds=max_rounds,
+            cancel_token=state.get("cancel_token"),
+            approval_stats=get_approval_stats(),
+            progress=progress,
+        )
+
+        # Completed ingredients' contributions, summed as they finish
+        running_sum = {nutrient: 0.0 for nutrient in NUTRIENTS.keys()}
+        completed = []
+        sum_lock = threading.Lock()
+
+        def report_complete(result: IngredientSubgraphState) -> None:
+            contribution = add_estimates({}, result.get("estimates") or {})
+            with sum_lock:
+                add_estimates(running_sum, contribution)
+                completed.append(result["ingredient_name"])
+                totals = self._extract_macros(running_sum)
+                count = len(completed)
+            if count == 1 and state.get("started_at"):
+                get_metrics().observe(
+                    f"meal_estimate.first_estimate_seconds.{self.mode}",
+                    time.monotonic() - state["started_at"],
+                )
+            if progress:
+                progress({
+                    "type": "ingredient_complete",
+                    "ingredient": result["ingredient_name"],
+                    "amount": result["amount"],
+                    "approved": result.get("approved", False),
+                    "rounds": result.get("round", 0),
+                    "degraded": result.get("degraded", False),
+                    "macros": self._extract_macros(contribution),
+                    "nutrients": {key: value for key, value in contribution.items() if value},
+                    "running_totals": totals,
+                    "completed": count,
+                    "total": len(ingredients),
+                })
+
+        def run(ingredient_data: Dict[str, Any]) -> IngredientSubgraphState:
+            # Initialize state for this ingredient's subgraph
+            ing_state: IngredientSubgraphState = {
+                "ingredient_name": ingredient_data["name"],
+                "amount": ingredient_data["amount"],
+                "notes": ingredient_data.get("notes"),
+                "round": 0,
+                "max_rounds": max_rounds,
+                "approved": False,
+            }
+            # Run the subgraph
+            result = subgraph.invoke(ing_state)
+            report_complete(result)
+            return result
+
+        return run
+
     def _merge_node(self, state: ParallelNutritionState) -> ParallelNutritionState:
         """Merge node that sums up nutrients from all ingredients."""
         ingredient_results = state.get("ingredient_results", {})
 
-        # Initialize sum dictionary with Title Case keys from NUTRIENTS
+        # Initialize sum dictionary with the canonical keys from NUTRIENTS
         estimates_sum = {nutrient: 0.0 for nutrient in NUTRIENTS.keys()}
 
-        # Create a mapping from lowercase/snake_case to proper nutrient names
-        nutrient_name_map = {}
-        for proper_name in NUTRIENTS.keys():
-            # Create snake_case version
-            snake_case = proper_name.lower().replace(" ", "_").replace("+", "_").replace("-", "_")
-            nutrient_name_map[snake_case] = proper_name
-            # Also map lowercase version
-            nutrient_name_map[proper_name.lower()] = proper_name
-            # And exact match
-            nutrient_name_map[proper_name] = proper_name
-
         # Sum up all nutrients
-        for ing_name, result in ingredient_results.items():
-            estimates = result.get("estimates", {})
-            for nutrient_key, value in estimates.items():
-                # Try to find the proper nutrient name
-                proper_name = nutrient_name_map.get(nutrient_key)
-                if proper_name and proper_name in estimates_sum:
-                    estimates_sum[proper_name] += value
-                elif nutrient_key in estimates_sum:
-                    # Fallback: direct key match
-                    estimates_sum[nutrient_key] += value
+        for result in ingredient_results.values():
+            add_estimates(estimates_sum, result.get("estimates", {}))
 
         state["estimates_sum"] = estimates_sum
 
         return state
 
     async def _interaction_analysis_node(self, state: ParallelNutritionState) -> ParallelNutritionState:
+        """Run the interaction analysis within its share of the meal's latency budget."""
+        with stage_deadline("interaction_analysis"):
+            return await self._analyze_interactions(state)
+
+    async def _analyze_interactions(self, state: ParallelNutritionState) -> ParallelNutritionState:
         """Analyze nutrient interactions and cooking process impact using two-agent approach.
 
         Agent 1: Detailed natural language analysis of every nutrient
         Agent 2: Structured final estimates based on the analysis
         """
-        from langchain_anthropic import ChatAnthropic
+        from integrations.llm_gateway import create_chat_model
         from langchain_core.prompts import PromptTemplate
         from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
         from pydantic import BaseModel, Field
@@ -285,14 +624,14 @@ class ParallelNutritionWorkflow:
 
         cooking_process = state.get("cooking_process", {})
         estimates_sum = state.get("estimates_sum", {})
+        cancel_token = state.get("cancel_token")
 
-        import json
-        estimates_json = json.dumps(estimates_sum, indent=2)
+        estimates_json = to_json(estimates_sum, pretty=True)
 
         # Create LLM for both agents
-        llm = ChatAnthropic(
+        llm = create_chat_model(
+            "interaction_analysis",
             model=settings.estimator_model,
-            anthropic_api_key=settings.anthropic_api_key,
             temperature=0.2,  # Low temperature for scientific accuracy
             max_tokens=8000,  # Higher for detailed analysis
         )
@@ -363,8 +702,6 @@ Now provide your detailed analysis for EVERY nutrient:""",
         analysis_chain = analysis_prompt | llm | StrOutputParser()
 
         try:
-            import asyncio
-
             # Prepare inputs
             analysis_inputs = {
                 "description": state.get("description", ""),
@@ -376,16 +713,20 @@ Now provide your detailed analysis for EVERY nutrient:""",
                 "estimates_json": estimates_json,
             }
 
-            # Get detailed natural language analysis with timeout
+            # Get detailed natural language analysis (bounded by the stage deadline),
+            # streamed to the client as it is written
             print("Running detailed nutrient analysis...")
-            try:
-                detailed_analysis = await asyncio.wait_for(
-                    analysis_chain.ainvoke(analysis_inputs),
-                    timeout=60.0  # 60 second timeout
+            progress = state.get("progress")
+            if progress and settings.stream_reasoning:
+                batcher = TokenBatcher(
+                    progress,
+                    "interaction_analysis",
+                    interval=settings.reasoning_stream_interval_seconds,
                 )
-            except asyncio.TimeoutError:
-                print("Warning: Detailed nutrient analysis timed out after 60s, using simplified approach")
-                detailed_analysis = "Analysis timed out - using raw estimates"
+                analysis = stream_text(analysis_chain, analysis_inputs, batcher)
+            else:
+                analysis = analysis_chain.ainvoke(analysis_inputs)
+            detailed_analysis = await cancellable(analysis, cancel_token, llm_calls=2)
 
             # Store the detailed analysis
             state["detailed_nutrient_analysis"] = detailed_analysis
@@ -456,31 +797,20 @@ Provide your response as valid JSON only.""",
 
             estimates_chain = estimates_prompt | llm | estimates_parser
 
-            # Get final structured estimates with timeout
+            # Get final structured estimates (bounded by the stage deadline)
             print("Calculating final nutrient values...")
             estimates_inputs = {
                 "estimates_json": estimates_json,
                 "detailed_analysis": detailed_analysis,
             }
 
-            try:
-                result = await asyncio.wait_for(
-                    estimates_chain.ainvoke(estimates_inputs),
-                    timeout=60.0  # 60 second timeout
-                )
-            except asyncio.TimeoutError:
-                print("Warning: Final estimates calculation timed out after 60s, using sum estimates")
-                # Fallback to using the sum estimates
-                result = {
-                    "final_estimates": estimates_sum,
-                    "summary": "Calculation timed out - using raw ingredient sums"
-                }
+            result = await cancellable(estimates_chain.ainvoke(estimates_inputs), cancel_token)
 
             # Log the final estimates calculation
             logger.log_interaction(
                 agent_name="final_estimates_calculator",
                 prompt=estimates_prompt.format(**estimates_inputs),
-                response=json.dumps(result, indent=2),
+                response=to_json(result, pretty=True),
                 metadata={
                     "description": state.get("description", ""),
                     "num_nutrients": len(result["final_estimates"])
@@ -492,13 +822,18 @@ Provide your response as valid JSON only.""",
             state["interaction_reasoning"] = detailed_analysis[:500] + "..." if len(detailed_analysis) > 500 else detailed_analysis
             state["process_impact_reasoning"] = result["summary"]
 
-        except asyncio.TimeoutError as e:
-            print(f"Timeout during interaction analysis: {e}")
-            # Fall back to sum estimates
-            state["final_estimates"] = state.get("estimates_sum", {})
-            state["interaction_reasoning"] = "Analysis timed out after 120s total"
-            state["process_impact_reasoning"] = "No adjustments made due to timeout"
-            state["detailed_nutrient_analysis"] = "Analysis timed out"
+        except OperationCancelled:
+            raise
+        except LLMUnavailable as e:
+            print(f"Applying standard cooking adjustments instead of interaction analysis: {e}")
+            final_estimates, summary = apply_cooking_adjustments(
+                state.get("estimates_sum", {}), state.get("cooking_process", {})
+            )
+            state["final_estimates"] = final_estimates
+            state["interaction_reasoning"] = "Interaction analysis skipped (LLM unavailable)"
+            state["process_impact_reasoning"] = summary
+            state["detailed_nutrient_analysis"] = "Not available (LLM unavailable)"
+            self._mark_degraded(state, "interaction_analysis")
         except Exception as e:
             print(f"Error during interaction analysis: {e}")
             import traceback
@@ -509,6 +844,8 @@ Provide your response as valid JSON only.""",
             state["interaction_reasoning"] = f"Error occurred: {str(e)}"
             state["process_impact_reasoning"] = "No adjustments made due to error"
             state["detailed_nutrient_analysis"] = f"Error during analysis: {str(e)}"
+            # Unadjusted sums must not be cached or shown as a finished estimate
+            self._mark_degraded(state, "interaction_analysis")
 
         return state
 
@@ -516,7 +853,8 @@ Provide your response as valid JSON only.""",
         self,
         description: str,
         websocket=None,
-        max_rounds_per_ingredient: int = 3,
+        max_rounds_per_ingredient: Optional[int] = None,
+        cancel_token: Optional[CancellationToken] = None,
     ) -> Dict:
         """Estimate nutrition for a meal using parallel ingredient processing.
 
@@ -524,15 +862,30 @@ Provide your response as valid JSON only.""",
             description: Natural language meal description
             websocket: Optional WebSocket for streaming progress
             max_rounds_per_ingredient: Max rounds for each ingredient's validation loop
+                (defaults to the workflow's)
+            cancel_token: Optional token; once cancelled no further LLM calls are made
 
         Returns:
             Dict containing final estimates and metadata
+
+        Raises:
+            OperationCancelled: If the token is cancelled before the meal completes
         """
+        # Nothing has been sent to the LLM yet: preprocessing is the first call
+        if cancel_token:
+            cancel_token.check()
+
+        # Ingredient subgraphs report progress from worker threads through a channel
+        channel = ProgressChannel(websocket) if websocket else None
+
         # Initialize state
+        started_at = time.monotonic()
         state: ParallelNutritionState = {
             "description": description,
-            "max_rounds": max_rounds_per_ingredient,
-            "_websocket": websocket,  # Pass websocket through state
+            "started_at": started_at,
+            "max_rounds": max_rounds_per_ingredient or self.max_rounds,
+            "cancel_token": cancel_token,
+            "progress": channel.emit if channel else None,
         }
 
         # Notify start
@@ -551,228 +904,191 @@ Provide your response as valid JSON only.""",
                 "message": "Analyzing ingredients...",
             })
 
+        # Rough macros from a fast first pass, replaced by the final estimate
+        provisional = None
+        if websocket and settings.provisional_estimates:
+            provisional = asyncio.create_task(
+                self._send_provisional(description, websocket, cancel_token)
+            )
+
         # Track current stage for iteration simulation
         current_stage = 0
-        total_stages = 4  # preprocessing, coordinator, merge, interaction_analysis
+        total_stages = TOTAL_STAGES
 
         # Stream through the graph
-        async for event in self.graph.astream(state, stream_mode="updates"):
-            for node_name, node_state in event.items():
-                current_stage += 1
-
-                # After preprocessing
-                if node_name == "preprocessing":
-                    ingredients = node_state.get("ingredients", [])
-                    cooking_process = node_state.get("cooking_process", {})
-
-                    if websocket:
-                        import asyncio
-
-                        # Mark preprocessing as done
-                        await websocket.send_json({
-                            "type": "agent_status",
-                            "agent_type": "preprocessing",
-                            "status": "done",
-                            "message": f"Found {len(ingredients)} ingredients",
-                        })
-
-                        # Send iteration event
-                        await websocket.send_json({
-                            "type": "iteration",
-                            "iteration": current_stage,
-                            "max": total_stages,
-                        })
-
-                        # Send status event
-                        await websocket.send_json({
-                            "type": "status",
-                            "status": "preprocessing",
-                            "message": f"Analyzing ingredients ({len(ingredients)} found)...",
-                        })
-
-                        # Now predictively show what's coming next: estimators for all ingredients
-                        for ing in ingredients:
-                            ing_name = ing["name"]
-                            ing_amount = ing["amount"]
-
-                            # Show estimator status as "running"
+        try:
+            async for event in self.graph.astream(state, stream_mode="updates"):
+                for node_name, node_state in event.items():
+                    current_stage += 1
+
+                    # After preprocessing
+                    if node_name == "preprocessing":
+                        ingredients = node_state.get("ingredients", [])
+
+                        if websocket:
+                            # Estimators and validators report their own progress from here on
+                            for message in self._preprocessed_events(ingredients, current_stage):
+                                await websocket.send_json(message)
+
+                    # After coordinator (parallel execution), or preprocessing and the
+                    # coordinator overlapped (the pipeline announced preprocessing itself)
+                    elif node_name in ("coordinator", "pipeline"):
+                        if node_name == "pipeline":
+                            current_stage += 1
+                        ingredient_results = node_state.get("ingredient_results", {})
+
+                        if websocket:
+                            # Every ingredient event is sent before the stage moves on
+                            await channel.flush()
+
+                            # Send iteration event
+                            await websocket.send_json({
+                                "type": "iteration",
+                                "iteration": current_stage,
+                                "max": total_stages,
+                            })
+
+                            # Send status event
+                            await websocket.send_json({
+                                "type": "status",
+                                "status": "estimating",
+                                "message": f"Estimated nutrients of {len(ingredient_results)} ingredients",
+                            })
+
+                            # Predictively show next stage: detailed analyzer
                             await websocket.send_json({
                                 "type": "agent_status",
-                                "agent_type": "estimator",
+                                "agent_type": "detailed_analyzer",
                                 "status": "running",
-                                "message": f"Estimating ({ing_name}: {ing_amount})",
-                                "ingredient": ing_name,
+                                "message": "Assessing the potential interactions",
+                            })
+
+                    # After merge
+                    elif node_name == "merge":
+                        estimates_sum = node_state.get("estimates_sum", {})
+
+                        if websocket:
+                            # Send iteration event
+                            await websocket.send_json({
+                                "type": "iteration",
+                                "iteration": current_stage,
+                                "max": total_stages,
+                            })
+
+                            # Send status event
+                            await websocket.send_json({
+                                "type": "status",
+                                "status": "verifying",
+                                "message": "Combining ingredient estimates...",
+                            })
+
+                            # Extract macros for display
+                            macros = self._extract_macros(estimates_sum)
+
+                            # The ingredient sums supersede the provisional estimate
+                            if provisional is not None:
+                                provisional.cancel()
+
+                            # Send estimates event (raw ingredient sums, before interactions)
+                            await websocket.send_json({
+                                "type": "estimates",
+                                "provisional": True,
+                                "source": "ingredients",
+                                "macros": macros,
+                                "confidence": "high",  # Aggregate confidence
+                                "reasoning": f"Combined {len(node_state.get('ingredient_results', {}))} ingredients",
+                                "full_count": len(estimates_sum),
                             })
 
-                # After coordinator (parallel execution)
-                elif node_name == "coordinator":
-                    ingredient_results = node_state.get("ingredient_results", {})
-                    ingredients = state.get("ingredients", [])
+                            # No agent status updates here - detailed_analyzer is already running from coordinator
 
-                    if websocket:
-                        import asyncio
+                    # After interaction analysis
+                    elif node_name == "interaction_analysis":
+                        final_estimates = node_state.get("final_estimates", {})
 
-                        # Mark all estimators as done
-                        for ing in ingredients:
-                            ing_name = ing["name"]
-                            ing_amount = ing["amount"]
+                        if websocket:
+                            # The streamed analysis text is sent before the result
+                            await channel.flush()
 
-                            # Mark estimator as done
+                            # Mark detailed analyzer as done
                             await websocket.send_json({
                                 "type": "agent_status",
-                                "agent_type": "estimator",
+                                "agent_type": "detailed_analyzer",
                                 "status": "done",
-                                "message": f"Estimated ({ing_name}: {ing_amount})",
-                                "ingredient": ing_name,
+                                "message": "Interactions assessed",
                             })
 
-                        # Now show all validators as running
-                        for ing in ingredients:
-                            ing_name = ing["name"]
-                            ing_amount = ing["amount"]
-
-                            # Show validator as running
+                            # Show final estimates running
                             await websocket.send_json({
                                 "type": "agent_status",
-                                "agent_type": "validator",
+                                "agent_type": "final_estimates",
                                 "status": "running",
-                                "message": f"Validating ({ing_name}: {ing_amount})",
-                                "ingredient": ing_name,
+                                "message": "Calculating final nutrient values",
                             })
 
-                        # Mark all validators as done
-                        for ing in ingredients:
-                            ing_name = ing["name"]
-                            ing_amount = ing["amount"]
-
-                            # Mark validator as done
+                            # Mark final estimates as done
                             await websocket.send_json({
                                 "type": "agent_status",
-                                "agent_type": "validator",
+                                "agent_type": "final_estimates",
                                 "status": "done",
-                                "message": f"Validated ({ing_name}: {ing_amount})",
-                                "ingredient": ing_name,
+                                "message": "Done",
+                            })
+
+                            # Send iteration event
+                            await websocket.send_json({
+                                "type": "iteration",
+                                "iteration": current_stage,
+                                "max": total_stages,
                             })
 
-                        # Send iteration event
-                        await websocket.send_json({
-                            "type": "iteration",
-                            "iteration": current_stage,
-                            "max": total_stages,
-                        })
-
-                        # Send status event
-                        await websocket.send_json({
-                            "type": "status",
-                            "status": "estimating",
-                            "message": f"Estimating nutrients in parallel ({len(ingredient_results)} ingredients)...",
-                        })
-
-                        # Predictively show next stage: detailed analyzer
-                        await websocket.send_json({
-                            "type": "agent_status",
-                            "agent_type": "detailed_analyzer",
-                            "status": "running",
-                            "message": "Assessing the potential interactions",
-                        })
-
-                # After merge
-                elif node_name == "merge":
-                    estimates_sum = node_state.get("estimates_sum", {})
-
-                    if websocket:
-                        # Send iteration event
-                        await websocket.send_json({
-                            "type": "iteration",
-                            "iteration": current_stage,
-                            "max": total_stages,
-                        })
-
-                        # Send status event
-                        await websocket.send_json({
-                            "type": "status",
-                            "status": "verifying",
-                            "message": "Combining ingredient estimates...",
-                        })
-
-                        # Extract macros for display
-                        macros = self._extract_macros(estimates_sum)
-
-                        # Send estimates event (similar to original)
-                        await websocket.send_json({
-                            "type": "estimates",
-                            "macros": macros,
-                            "confidence": "high",  # Aggregate confidence
-                            "reasoning": f"Combined {len(node_state.get('ingredient_results', {}))} ingredients",
-                            "full_count": len(estimates_sum),
-                        })
-
-                        # No agent status updates here - detailed_analyzer is already running from coordinator
-
-                # After interaction analysis
-                elif node_name == "interaction_analysis":
-                    final_estimates = node_state.get("final_estimates", {})
-
-                    if websocket:
-                        # Mark detailed analyzer as done
-                        await websocket.send_json({
-                            "type": "agent_status",
-                            "agent_type": "detailed_analyzer",
-                            "status": "done",
-                            "message": "Interactions assessed",
-                        })
-
-                        # Show final estimates running
-                        await websocket.send_json({
-                            "type": "agent_status",
-                            "agent_type": "final_estimates",
-                            "status": "running",
-                            "message": "Calculating final nutrient values",
-                        })
-
-                        # Mark final estimates as done
-                        await websocket.send_json({
-                            "type": "agent_status",
-                            "agent_type": "final_estimates",
-                            "status": "done",
-                            "message": "Done",
-                        })
-
-                        # Send iteration event
-                        await websocket.send_json({
-                            "type": "iteration",
-                            "iteration": current_stage,
-                            "max": total_stages,
-                        })
-
-                        # Send status event
-                        await websocket.send_json({
-                            "type": "status",
-                            "status": "verifying",
-                            "message": "Analyzing nutrient interactions and cooking impact...",
-                        })
-
-                        # Extract macros for display
-                        macros = self._extract_macros(final_estimates)
-
-                        # Send final estimates
-                        await websocket.send_json({
-                            "type": "estimates",
-                            "macros": macros,
-                            "confidence": "high",
-                            "reasoning": node_state.get("interaction_reasoning", "")[:200],  # Truncate for websocket
-                            "full_count": len(final_estimates),
-                        })
-
-                        # Send consensus event (analysis complete)
-                        await websocket.send_json({
-                            "type": "consensus",
-                            "message": "Analysis complete! Nutrient estimates finalized.",
-                            "iterations": total_stages,
-                        })
-
-                # Update state reference
-                state = node_state
+                            # Send status event
+                            await websocket.send_json({
+                                "type": "status",
+                                "status": "verifying",
+                                "message": "Analyzing nutrient interactions and cooking impact...",
+                            })
+
+                            # Extract macros for display
+                            macros = self._extract_macros(final_estimates)
+
+                            # A provisional estimate must not arrive after the final one
+                            if provisional is not None:
+                                provisional.cancel()
+
+                            # Send final estimates
+                            await websocket.send_json({
+                                "type": "estimates",
+                                "provisional": False,
+                                "source": "final",
+                                "macros": macros,
+                                "confidence": "high",
+                                "reasoning": node_state.get("interaction_reasoning", "")[:200],  # Truncate for websocket
+                                "full_count": len(final_estimates),
+                            })
+
+                            # Send consensus event (analysis complete)
+                            degraded_stages = node_state.get("degraded_stages", [])
+                            await websocket.send_json({
+                                "type": "consensus",
+                                "message": (
+                                    "Estimated from local data (AI analysis unavailable)."
+                                    if degraded_stages
+                                    else "Analysis complete! Nutrient estimates finalized."
+                                ),
+                                "iterations": total_stages,
+                                "degraded": bool(degraded_stages),
+                            })
+
+                    # Update state reference
+                    state = node_state
+        finally:
+            # Never let a rough estimate arrive after better numbers or a failure
+            if provisional is not None:
+                provisional.cancel()
+
+        get_metrics().observe(
+            f"meal_estimate.total_seconds.{self.mode}", time.monotonic() - started_at
+        )
 
         # Prepare final result
         final_estimates = state.get("final_estimates", {})
@@ -803,10 +1119,22 @@ Provide your response as valid JSON only.""",
         if cooking_process.get("nutrient_impact"):
             all_assumptions.append(f"Cooking impact: {', '.join(cooking_process['nutrient_impact'])}")
 
+        # Degraded results come from local data and are never more than low confidence
+        degraded_stages = state.get("degraded_stages", [])
+        if not degraded_stages:
+            get_meal_cache().set(meal_key(description), macros)
+        if degraded_stages:
+            overall_confidence = "low"
+            all_assumptions.append(
+                f"Degraded mode: {', '.join(degraded_stages)} used local data (LLM unavailable)"
+            )
+
         return {
             **macros,
             "estimates": final_estimates,
             "confidence": overall_confidence,
+            "degraded": bool(degraded_stages),
+            "degraded_stages": degraded_stages,
             "iterations": total_stages,  # Number of workflow stages
             "approval": 100,  # All ingredients approved after parallel validation
             "assumptions": all_assumptions,
@@ -819,6 +1147,59 @@ Provide your response as valid JSON only.""",
             "process_impact_reasoning": state.get("process_impact_reasoning", ""),
         }
 
+    @staticmethod
+    async def _send_provisional(
+        description: str,
+        websocket,
+        cancel_token: Optional[CancellationToken],
+    ) -> None:
+        """Send rough macros from the provisional estimator, if it finds any."""
+        try:
+            result = await get_provisional_estimator().estimate(description)
+            if result is None or (cancel_token and cancel_token.cancelled):
+                return
+            await websocket.send_json({
+                "type": "estimates",
+                "provisional": True,
+                "source": result["source"],
+                "macros": result["macros"],
+                "confidence": "low",
+                "reasoning": f"Rough estimate ({result['source']}), refining...",
+            })
+        except Exception as e:
+            print(f"No provisional estimate: {e}")
+
+    @staticmethod
+    def _preprocessed_events(ingredients: List[Dict[str, Any]], iteration: int) -> List[dict]:
+        """Progress events announcing that preprocessing found the ingredients."""
+        return [
+            # Mark preprocessing as done
+            {
+                "type": "agent_status",
+                "agent_type": "preprocessing",
+                "status": "done",
+                "message": f"Found {len(ingredients)} ingredients",
+            },
+            # Iteration event
+            {
+                "type": "iteration",
+                "iteration": iteration,
+                "max": TOTAL_STAGES,
+            },
+            # Status event
+            {
+                "type": "status",
+                "status": "preprocessing",
+                "message": f"Analyzing ingredients ({len(ingredients)} found)...",
+            },
+        ]
+
+    @staticmethod
+    def _mark_degraded(state: ParallelNutritionState, stage: str) -> None:
+        """Record that a stage fell back to local data."""
+        state["degraded_stages"] = state.get("degraded_stages", []) + [stage]
+        get_metrics().increment(f"degraded.{stage}")
+
     def _extract_macros(self, estimates: Dict[str, float]) -> Dict[str, float]:
         """Extract key macronutrients for display.
 
@@ -828,19 +1209,8 @@ Provide your response as valid JSON only.""",
         Returns:
             Dict with calories, protein, carbs, fat
         """
-        protein = estimates.get("protein", 0)
-        carbs = estimates.get("carbohydrates", 0)
-        fat = estimates.get("total-fats", 0)
-
-        # Calculate calories (4 cal/g protein, 4 cal/g carbs, 9 cal/g fat)
-        calories = (protein * 4) + (carbs * 4) + (fat * 9)
-
-        return {
-            "calories": round(calories),
-            "protein": round(protein, 1),
-            "carbs": round(carbs, 1),
-            "fat": round(fat, 1),
-        }
+        # 4 kcal/g protein, 4 kcal/g carbs, 9 kcal/g fat
+        return macros_from_estimates(estimates)
 
 
 # Example usage
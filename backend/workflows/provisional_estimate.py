@@ -0,0 +1,156 @@
+"""Fast provisional macros shown while the full estimate runs.
+
+The first pass runs alongside the nutrition workflow and tries, in order:
+
+1. the whole-meal cache of finished estimates for the same description
+2. the local food catalog, when every ingredient of the locally split description
+   matches a catalog food (or a cached ingredient estimate)
+3. one small LLM call (``QuickEstimator``) bounded by ``PROVISIONAL_TIMEOUT_SECONDS``
+4. the partial catalog estimate, if some ingredients matched
+
+The result is sent as an ``estimates`` event with ``provisional: true`` and is
+replaced by the refined estimate once interaction analysis completes.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from agents.quick_estimator import QuickEstimator
+from config.settings import settings
+from integrations.circuit_breaker import LLMUnavailable
+from integrations.llm_gateway import llm_deadline
+from utils.metrics import get_metrics
+from utils.ttl_cache import TTLCache
+from workflows.degraded_mode import local_ingredient_estimate, parse_meal_locally
+
+# Global cache of finished whole-meal macros
+_meal_cache = None
+
+
+def get_meal_cache() -> TTLCache:
+    """Get the process-wide cache of finished whole-meal macros."""
+    global _meal_cache
+    if _meal_cache is None:
+        _meal_cache = TTLCache(
+            settings.meal_cache_size,
+            settings.meal_cache_ttl_seconds,
+            name="meal_cache",
+        )
+    return _meal_cache
+
+
+def meal_key(description: str) -> str:
+    """Cache key of a meal description (case, spacing and trailing dots insensitive)."""
+    return " ".join(description.lower().split()).strip(" .")
+
+
+def macros_from_estimates(estimates: Dict[str, float]) -> Dict[str, float]:
+    """Calories and macronutrients from canonical nutrient estimates."""
+    protein = estimates.get("protein", 0)
+    carbs = estimates.get("carbohydrates", 0)
+    fat = estimates.get("total-fats", 0)
+    return {
+        "calories": round((protein * 4) + (carbs * 4) + (fat * 9)),
+        "protein": round(protein, 1),
+        "carbs": round(carbs, 1),
+        "fat": round(fat, 1),
+    }
+
+
+def catalog_meal_estimate(description: str) -> Optional[Dict[str, Any]]:
+    """Rough macros from the locally split description and the food catalog.
+
+    Args:
+        description: Natural language meal description
+
+    Returns:
+        Dict with macros and ``coverage`` (fraction of ingredients with local data),
+        or None if no ingredient has local data
+    """
+    ingredients = parse_meal_locally(description)["ingredients"]
+    totals: Dict[str, float] = {}
+    known = 0
+    for ingredient in ingredients:
+        estimate = local_ingredient_estimate(ingredient["name"], ingredient["amount"])
+        if estimate["source"] == "none":
+            continue
+        known += 1
+        for nutrient, value in estimate["estimates"].items():
+            totals[nutrient] = totals.get(nutrient, 0.0) + value
+    if not known:
+        return None
+    return {"macros": macros_from_estimates(totals), "coverage": known / len(ingredients)}
+
+
+class ProvisionalEstimator:
+    """Produces rough macros for a meal within about a second."""
+
+    def __init__(self, use_llm: bool = True, timeout: float = 3.0):
+        """Initialize the estimator.
+
+        Args:
+            use_llm: Allow the small LLM call when no complete local estimate exists
+            timeout: Seconds the LLM call may take
+        """
+        self.use_llm = use_llm
+        self.timeout = timeout
+        self.quick_estimator = QuickEstimator() if use_llm else None
+
+    async def estimate(self, description: str) -> Optional[Dict[str, Any]]:
+        """Estimate a meal's macros from the fastest available source.
+
+        Args:
+            description: Natural language meal description
+
+        Returns:
+            Dict with macros and source ("cache", "catalog" or "llm"), or None if
+            no source produced an estimate
+        """
+        started = time.monotonic()
+        result = self._estimate_locally(description)
+        if result is None or (result["source"] == "catalog" and result["coverage"] < 1):
+            partial = result
+            result = await self._estimate_with_llm(description) or partial
+
+        if result is not None:
+            metrics = get_metrics()
+            metrics.increment(f"provisional_estimate.{result['source']}")
+            metrics.observe("provisional_estimate.seconds", time.monotonic() - started)
+        return result
+
+    def _estimate_locally(self, description: str) -> Optional[Dict[str, Any]]:
+        cached = get_meal_cache().get(meal_key(description))
+        if cached is not None:
+            return {"macros": cached, "source": "cache", "coverage": 1.0}
+        local = catalog_meal_estimate(description)
+        if local is None:
+            return None
+        return {**local, "source": "catalog"}
+
+    async def _estimate_with_llm(self, description: str) -> Optional[Dict[str, Any]]:
+        if not self.use_llm:
+            return None
+        try:
+            with llm_deadline(self.timeout):
+                macros = await self.quick_estimator.estimate(description)
+        except LLMUnavailable as e:
+            print(f"No quick estimate: {e}")
+            return None
+        if macros is None:
+            return None
+        return {"macros": macros, "source": "llm", "coverage": 1.0}
+
+
+# Global provisional estimator instance
+_provisional_estimator = None
+
+
+def get_provisional_estimator() -> ProvisionalEstimator:
+    """Get the global provisional estimator."""
+    global _provisional_estimator
+    if _provisional_estimator is None:
+        _provisional_estimator = ProvisionalEstimator(
+            use_llm=settings.provisional_llm,
+            timeout=settings.provisional_timeout_seconds,
+        )
+    return _provisional_estimator